@@ -16,6 +16,7 @@ ALGORITHM_LIST = [
 
     ("A* Search", "a_star"),
     ("A* Search (Double Moves)", "a_star_ANDOR"),
+    ("Anytime A* (ARA*)", "ara_star"),
 
     ("IDA* Search", "ida_star"),
     ("IDA* (Double Moves)", "ida_star_ANDOR"),
@@ -29,14 +30,20 @@ ALGORITHM_LIST = [
     ("Stochastic Hill Climbing", "stochastic_hill"),
     ("Stochastic Hill Climbing (Double Moves)", "stochastic_hill_ANDOR"),
 
+    ("Tabu Search", "tabu_search"),
+    ("Tabu Search (Double Moves)", "tabu_search_ANDOR"),
+
     ("Beam Search", "beam_search"),
     ("Beam Search(Double Moves)", "beam_search_ANDOR"),
 
     ("Simulated Annealing", "simulated_annealing"),
     ("Simulated Annealing (Double Moves)", "simulated_annealing_ANDOR"),
+    ("Simulated Annealing (Parallel Tempering)", "parallel_tempering"),
     
     ("Genetic Algorithm", "genetic"),
     ("Genetic Algorithm (Double Moves)", "genetic_ANDOR"),
+    ("Genetic Algorithm (Vectorized)", "ga_population"),
+    ("Genetic Algorithm (Islands)", "genetic_islands"),
 
     ("QLearning", "q_learning"),
 ]
\ No newline at end of file
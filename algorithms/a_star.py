@@ -1,5 +1,7 @@
 from heapq import heappush, heappop
 
+from .multi_goal import GoalSetHeuristic
+
 def manhattan_distance(state, goal_state):
     total = 0
     for i in range(9):
@@ -34,15 +36,15 @@ def reconstruct_path(state, parent):
     path.reverse()
     return path
 
-def solve(start_state, goal_state):
-    pq = [(0 + manhattan_distance(start_state, goal_state), 0, start_state)]
+def search(start_state, is_goal, heuristic):
+    pq = [(0 + heuristic(start_state), 0, start_state)]
     parent = {start_state: None}
     g_costs = {start_state: 0}
     visited = set()
     
     while pq:
         f_value, g_value, current = heappop(pq)
-        if current == goal_state:
+        if is_goal(current):
             return reconstruct_path(current, parent)
         if current in visited:
             continue
@@ -51,11 +53,24 @@ def solve(start_state, goal_state):
             if next_state in visited:
                 continue
             new_g = g_value + 1
-            h_value = manhattan_distance(next_state, goal_state)
+            h_value = heuristic(next_state)
             f_value = new_g + h_value
             if next_state in g_costs and new_g >= g_costs[next_state]:
                 continue
             g_costs[next_state] = new_g
             parent[next_state] = current
             heappush(pq, (f_value, new_g, next_state))
-    return None
\ No newline at end of file
+    return None
+
+def solve(start_state, goal_state):
+    return search(start_state, lambda state: state == goal_state,
+                  lambda state: manhattan_distance(state, goal_state))
+
+def solve_goal_set(start_state, goal_states, exact=False):
+    """
+    A* tới đích gần nhất trong một tập đích, trong một lần tìm kiếm (thay vì
+    chạy solve cho từng đích). h = min Manhattan trên các đích, hoặc khoảng
+    cách chính xác với exact=True (xem multi_goal.GoalSetHeuristic).
+    """
+    heuristic = GoalSetHeuristic(goal_states, exact=exact)
+    return search(tuple(start_state), heuristic.is_goal, heuristic)
@@ -0,0 +1,134 @@
+# algorithms/anim_trace.py
+from array import array
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+Frame = Tuple[int, ...]
+
+
+class DeltaTrace:
+    """
+    Dãy khung hình (trạng thái lưới) lưu dạng delta thay cho list các trạng thái.
+
+    Mỗi bước chỉ ghi các ô thay đổi so với khung trước vào một array('B'):
+    [n, ô_1, cũ_1 ^ mới_1, ..., ô_n, cũ_n ^ mới_n, n]. Phép XOR áp dụng được
+    theo cả hai chiều, còn n ở hai đầu cho phép lùi một bước mà không cần
+    chỉ mục riêng cho từng khung. Cứ keyframe_interval khung lại lưu một khung
+    đầy đủ (keyframe) cùng vị trí của nó trong dòng delta, nên trace[i] chỉ
+    phải áp dụng tối đa keyframe_interval delta; đi tiếp / lùi một bước từ
+    khung vừa đọc là O(1). Một nước đi 8-Puzzle tốn 6 byte.
+
+    Dùng được như list: len(trace), trace[i] (tuple), trace[-1], lát cắt,
+    duyệt tuần tự, append/extend/clear. Chỉ số ô và giá trị nằm trong [0, 255].
+    """
+
+    def __init__(self, frames: Optional[Iterable[Sequence[int]]] = None, keyframe_interval: int = 32):
+        if keyframe_interval < 1:
+            raise ValueError("keyframe_interval must be positive")
+        self.keyframe_interval = keyframe_interval
+        self.clear()
+        if frames is not None:
+            self.extend(frames)
+
+    def clear(self) -> None:
+        self.num_cells = 0
+        self._count = 0
+        self._deltas = array('B')
+        self._keyframes = array('B')
+        self._key_offsets = array('I')
+        self._last: List[int] = []
+        self._cursor = -1
+        self._cursor_offset = 0
+        self._cursor_frame: List[int] = []
+
+    # --- Ghi ---
+    def append(self, frame: Sequence[int]) -> None:
+        if self._count == 0:
+            self.num_cells = len(frame)
+            self._last = list(frame)
+            self._count = 1
+            self._keyframes.extend(self._last)
+            self._key_offsets.append(0)
+            return
+        if len(frame) != self.num_cells:
+            raise ValueError(f"Frame has {len(frame)} cells, expected {self.num_cells}")
+        last = self._last
+        self._push([(cell, value) for cell, value in enumerate(frame) if last[cell] != value])
+
+    def append_changes(self, changes: Iterable[Tuple[int, int]]) -> None:
+        """Thêm khung mới = khung cuối + các thay đổi (ô, giá trị mới), không cần dựng cả khung."""
+        if self._count == 0:
+            raise ValueError("append_changes needs an initial frame")
+        last = self._last
+        self._push([(cell, value) for cell, value in changes if last[cell] != value])
+
+    def extend(self, frames: Iterable[Sequence[int]]) -> None:
+        for frame in frames:
+            self.append(frame)
+
+    def _push(self, changes: List[Tuple[int, int]]) -> None:
+        last, deltas = self._last, self._deltas
+        deltas.append(len(changes))
+        for cell, value in changes:
+            deltas.append(cell)
+            deltas.append(last[cell] ^ value)
+            last[cell] = value
+        deltas.append(len(changes))
+        if self._count % self.keyframe_interval == 0:
+            self._keyframes.extend(last)
+            self._key_offsets.append(len(deltas))
+        self._count += 1
+
+    # --- Đọc ---
+    def __len__(self) -> int:
+        return self._count
+
+    def __bool__(self) -> bool:
+        return self._count > 0
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("trace index out of range")
+        if self._cursor < 0 or abs(index - self._cursor) > 1:
+            key = index // self.keyframe_interval
+            start = key * self.num_cells
+            self._cursor_frame = self._keyframes[start:start + self.num_cells].tolist()
+            self._cursor = key * self.keyframe_interval
+            self._cursor_offset = self._key_offsets[key]
+        frame, deltas, offset = self._cursor_frame, self._deltas, self._cursor_offset
+        while self._cursor < index:
+            count = deltas[offset]
+            for position in range(offset + 1, offset + 1 + 2 * count, 2):
+                frame[deltas[position]] ^= deltas[position + 1]
+            offset += 2 * count + 2
+            self._cursor += 1
+        while self._cursor > index:
+            count = deltas[offset - 1]
+            offset -= 2 * count + 2
+            for position in range(offset + 1, offset + 1 + 2 * count, 2):
+                frame[deltas[position]] ^= deltas[position + 1]
+            self._cursor -= 1
+        self._cursor_offset = offset
+        return tuple(frame)
+
+    def __iter__(self) -> Iterator[Frame]:
+        if self._count == 0:
+            return
+        frame = self._keyframes[:self.num_cells].tolist()
+        deltas = self._deltas
+        yield tuple(frame)
+        offset = 0
+        for _ in range(1, self._count):
+            count = deltas[offset]
+            for position in range(offset + 1, offset + 1 + 2 * count, 2):
+                frame[deltas[position]] ^= deltas[position + 1]
+            offset += 2 * count + 2
+            yield tuple(frame)
+
+    def nbytes(self) -> int:
+        """Kích thước dữ liệu đã mã hóa (byte)."""
+        return (len(self._deltas) + len(self._keyframes)
+                + self._key_offsets.itemsize * len(self._key_offsets))
@@ -0,0 +1,196 @@
+# algorithms/annealing_schedules.py
+import math
+import random
+from abc import ABC, abstractmethod
+from typing import Callable, List, Optional, TypeVar, Union
+
+S = TypeVar("S")
+
+
+class Schedule(ABC):
+    """
+    Lịch làm mát cho Simulated Annealing.
+
+    Vòng lặp SA gọi start(t0) một lần, rồi sau mỗi bước gọi
+    update(accepted, energy) và dừng khi finished() trả về True. Lịch tự
+    ghi lại số lần lặp và số bước được chấp nhận (xem stats()). Lớp con phải
+    cài cool(); thiếu nó thì lỗi ngay khi tạo lịch chứ không phải giữa lần chạy.
+    """
+
+    name = "schedule"
+
+    def __init__(self, initial_temperature: Optional[float] = None, min_temperature: float = 1e-4):
+        self.initial_temperature = initial_temperature
+        self.min_temperature = min_temperature
+        self.temperature = 0.0
+        self.iterations = 0
+        self.accepted = 0
+
+    def start(self, initial_temperature: float) -> None:
+        if self.initial_temperature is None:
+            self.initial_temperature = initial_temperature
+        self.temperature = self.initial_temperature
+        self.iterations = 0
+        self.accepted = 0
+
+    def update(self, accepted: bool, energy: float) -> None:
+        self.iterations += 1
+        self.accepted += accepted
+        self.cool(accepted, energy)
+
+    @abstractmethod
+    def cool(self, accepted: bool, energy: float) -> None:
+        """Cập nhật self.temperature sau một bước."""
+
+    def finished(self) -> bool:
+        return self.temperature <= self.min_temperature
+
+    def stats(self) -> dict:
+        return {
+            "schedule": self.name,
+            "iterations": self.iterations,
+            "accepted": self.accepted,
+            "accept_ratio": self.accepted / self.iterations if self.iterations else 0.0,
+            "initial_temperature": self.initial_temperature,
+            "final_temperature": self.temperature,
+        }
+
+
+class GeometricSchedule(Schedule):
+    """T <- T * (1 - cooling_rate) sau mỗi bước (lịch cũ của simulated_annealing.py)."""
+
+    name = "geometric"
+
+    def __init__(self, initial_temperature: Optional[float] = None, cooling_rate: float = 0.003,
+                 min_temperature: float = 1e-4):
+        super().__init__(initial_temperature, min_temperature)
+        self.cooling_rate = cooling_rate
+
+    def cool(self, accepted: bool, energy: float) -> None:
+        self.temperature *= (1 - self.cooling_rate)
+
+
+class LamSchedule(Schedule):
+    """
+    Lịch thích nghi của Lam: điều chỉnh T để tỉ lệ chấp nhận (trung bình trượt)
+    bám theo đường mục tiêu - cao lúc đầu, giữ 0.44 ở giữa, rồi giảm dần về 0
+    khi gần hết max_iterations.
+    """
+
+    name = "lam"
+
+    def __init__(self, max_iterations: int = 20000, initial_temperature: Optional[float] = None,
+                 adjust: float = 0.998, min_temperature: float = 1e-4):
+        super().__init__(initial_temperature, min_temperature)
+        self.max_iterations = max_iterations
+        self.adjust = adjust
+        self.accept_rate = 0.5
+
+    def start(self, initial_temperature: float) -> None:
+        super().start(initial_temperature)
+        self.accept_rate = 0.5
+
+    def target_rate(self) -> float:
+        progress = self.iterations / self.max_iterations
+        if progress < 0.15:
+            return 0.44 + 0.56 * 560 ** (-progress / 0.15)
+        if progress < 0.65:
+            return 0.44
+        return 0.44 * 440 ** (-(progress - 0.65) / 0.35)
+
+    def cool(self, accepted: bool, energy: float) -> None:
+        self.accept_rate = 0.99 * self.accept_rate + 0.01 * accepted
+        if self.accept_rate > self.target_rate():
+            self.temperature *= self.adjust
+        else:
+            self.temperature /= self.adjust
+
+    def finished(self) -> bool:
+        return self.iterations >= self.max_iterations or super().finished()
+
+
+class ReheatingSchedule(Schedule):
+    """
+    Bọc một lịch khác: nếu năng lượng tốt nhất không cải thiện sau `patience`
+    bước, nâng nhiệt độ lên ít nhất reheat_ratio * T0 để thoát cực tiểu địa phương.
+    """
+
+    def __init__(self, base: Schedule, patience: int = 500, reheat_ratio: float = 0.5,
+                 max_reheats: int = 20):
+        super().__init__(base.initial_temperature, base.min_temperature)
+        self.base = base
+        self.name = f"{base.name}+reheat"
+        self.patience = patience
+        self.reheat_ratio = reheat_ratio
+        self.max_reheats = max_reheats
+        self.best_energy = math.inf
+        self.stagnant = 0
+        self.reheats = 0
+
+    def start(self, initial_temperature: float) -> None:
+        self.base.start(initial_temperature)
+        super().start(self.base.initial_temperature)
+        self.best_energy = math.inf
+        self.stagnant = 0
+        self.reheats = 0
+
+    def cool(self, accepted: bool, energy: float) -> None:
+        self.base.update(accepted, energy)
+        if energy < self.best_energy:
+            self.best_energy = energy
+            self.stagnant = 0
+        else:
+            self.stagnant += 1
+            if self.stagnant >= self.patience and self.reheats < self.max_reheats:
+                self.base.temperature = max(self.base.temperature,
+                                            self.reheat_ratio * self.base.initial_temperature)
+                self.stagnant = 0
+                self.reheats += 1
+        self.temperature = self.base.temperature
+
+    def finished(self) -> bool:
+        return self.base.finished()
+
+    def stats(self) -> dict:
+        result = super().stats()
+        result["reheats"] = self.reheats
+        return result
+
+
+def calibrate_initial_temperature(state: S, neighbors: Callable[[S], List[S]], energy: Callable[[S], float],
+                                  samples: int = 200, acceptance: float = 0.8,
+                                  rng: Optional[random.Random] = None) -> float:
+    """
+    Ước lượng T0 từ một bước đi ngẫu nhiên ngắn: lấy trung bình các delta dương
+    và chọn T0 sao cho exp(-delta / T0) = acceptance.
+    """
+    rng = rng or random
+    current, current_energy = state, energy(state)
+    uphill = []
+    for _ in range(samples):
+        options = neighbors(current)
+        if not options:
+            break
+        nxt = rng.choice(options)
+        nxt_energy = energy(nxt)
+        if nxt_energy > current_energy:
+            uphill.append(nxt_energy - current_energy)
+        current, current_energy = nxt, nxt_energy
+    if not uphill:
+        return 1.0
+    return (sum(uphill) / len(uphill)) / -math.log(acceptance)
+
+
+def make_schedule(schedule: Union[str, Schedule], max_iterations: int = 20000) -> Schedule:
+    """Tạo lịch từ tên: 'geometric', 'lam', 'reheat' (geometric + reheat), 'lam_reheat'."""
+    if isinstance(schedule, Schedule):
+        return schedule
+    if schedule == "geometric":
+        return GeometricSchedule()
+    if schedule == "lam":
+        return LamSchedule(max_iterations)
+    if schedule == "reheat":
+        return ReheatingSchedule(GeometricSchedule(cooling_rate=0.001))
+    if schedule == "lam_reheat":
+        return ReheatingSchedule(LamSchedule(max_iterations))
+    raise ValueError(f"Unknown annealing schedule: {schedule}")
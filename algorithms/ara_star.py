@@ -0,0 +1,107 @@
+import time
+from heapq import heappush, heappop, heapify
+
+from .a_star import manhattan_distance, get_neighbors, reconstruct_path
+
+def solve(start_state, goal_state, initial_weight=3.0, weight_step=0.5,
+          time_limit=None, on_solution=None):
+    """
+    Giải 8-Puzzle bằng Anytime Repairing A* (ARA*).
+
+    Lần tìm đầu tiên dùng f = g + w*h với trọng số w lớn nên nhanh chóng có
+    lời giải. Sau đó w giảm dần về 1; các trạng thái có g được cải thiện sau
+    khi đã đóng (INCONS) được đưa lại vào OPEN, nên mỗi lần lặp tái sử dụng
+    kết quả tìm kiếm trước thay vì chạy lại từ đầu. Khi w = 1 và lần tìm kết
+    thúc, đường đi là tối ưu.
+
+    Args:
+        start_state (tuple): Trạng thái bắt đầu.
+        goal_state (tuple): Trạng thái đích.
+        initial_weight (float): Trọng số heuristic ban đầu (>= 1).
+        weight_step (float): Lượng giảm trọng số sau mỗi lần cải thiện.
+        time_limit (float): Ngân sách thời gian (giây), None nếu chạy tới khi tối ưu.
+        on_solution (callable): Gọi on_solution(path, bound) mỗi khi có lời giải
+            tốt hơn; bound là cận trên của tỉ lệ (độ dài / độ dài tối ưu).
+
+    Returns:
+        tuple: (đường đi tốt nhất hoặc None, số node đã mở rộng)
+    """
+    start_state = tuple(start_state)
+    goal_state = tuple(goal_state)
+    deadline = None if time_limit is None else time.time() + time_limit
+
+    h_cache = {}
+    def h(state):
+        value = h_cache.get(state)
+        if value is None:
+            value = manhattan_distance(state, goal_state)
+            h_cache[state] = value
+        return value
+
+    g_costs = {start_state: 0}
+    parent = {start_state: None}
+    open_set = {start_state}
+    closed = set()
+    incons = set()
+    weight = max(1.0, initial_weight)
+    pq = [(weight * h(start_state), 0, start_state)]
+    nodes_expanded = 0
+    best_path = None
+    last_bound = float('inf')
+
+    def improve_path():
+        nonlocal nodes_expanded
+        while pq:
+            goal_g = g_costs.get(goal_state, float('inf'))
+            f_value, g_value, current = pq[0]
+            if goal_g <= f_value:
+                return True
+            heappop(pq)
+            if current not in open_set or g_value != g_costs[current]:
+                continue
+            open_set.discard(current)
+            closed.add(current)
+            nodes_expanded += 1
+            if deadline is not None and nodes_expanded % 256 == 0 and time.time() > deadline:
+                return False
+            new_g = g_value + 1
+            for next_state in get_neighbors(current):
+                if new_g < g_costs.get(next_state, float('inf')):
+                    g_costs[next_state] = new_g
+                    parent[next_state] = current
+                    if next_state in closed:
+                        incons.add(next_state)
+                    else:
+                        open_set.add(next_state)
+                        heappush(pq, (new_g + weight * h(next_state), new_g, next_state))
+        return goal_state in g_costs
+
+    while True:
+        finished = improve_path()
+        if goal_state in g_costs:
+            goal_g = g_costs[goal_state]
+            improved = best_path is None or goal_g < len(best_path) - 1
+            if improved:
+                best_path = reconstruct_path(goal_state, parent)
+            candidates = [g_costs[s] + h(s) for s in open_set | incons]
+            lower_bound = min(candidates) if candidates else goal_g
+            bound = min(weight, goal_g / lower_bound) if lower_bound > 0 else 1.0
+            if on_solution is not None and (improved or bound < last_bound):
+                on_solution(best_path, bound)
+            last_bound = min(last_bound, bound)
+            if bound <= 1.0:
+                break
+        if not finished or weight <= 1.0:
+            break
+        if deadline is not None and time.time() > deadline:
+            break
+
+        # Giảm trọng số, đưa INCONS vào OPEN, tính lại khóa và xóa CLOSED.
+        weight = max(1.0, weight - weight_step)
+        open_set |= incons
+        incons.clear()
+        closed.clear()
+        pq = [(g_costs[s] + weight * h(s), g_costs[s], s) for s in open_set]
+        heapify(pq)
+
+    return (best_path, nodes_expanded)
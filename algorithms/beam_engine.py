@@ -0,0 +1,81 @@
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .puzzle_index import NUM_STATES, rank, unrank
+from .puzzle_tables import manhattan_table
+
+State = Tuple[int, ...]
+
+
+def _reconstruct(layers: List[Tuple[np.ndarray, np.ndarray]], index: int) -> List[State]:
+    """Đi ngược chỉ số cha qua các tầng beam để dựng lại đường đi."""
+    path: List[State] = []
+    for ranks, parents in reversed(layers):
+        path.append(unrank(int(ranks[index])))
+        index = int(parents[index])
+    path.reverse()
+    return path
+
+
+def beam_search(start_state: State, goal_state: State, beam_width: int,
+                successors: np.ndarray, max_depth: Optional[int] = None) -> Optional[List[State]]:
+    """
+    Beam search trên rank của trạng thái.
+
+    Mỗi tầng beam chỉ gồm hai mảng: rank của các trạng thái và chỉ số cha
+    trong tầng trước, nên không phải sao chép đường đi cho từng ứng viên.
+    Toàn bộ con của một tầng được sinh bằng một phép gather trên bảng
+    `successors`, chấm điểm bằng một lần tra bảng Manhattan, và chọn
+    beam_width ứng viên tốt nhất bằng np.argpartition. Tập đã thăm là một
+    bitmap cố định 362880 phần tử thay vì set tăng dần.
+
+    Args:
+        start_state (tuple): Trạng thái bắt đầu.
+        goal_state (tuple): Trạng thái đích.
+        beam_width (int): Số trạng thái giữ lại ở mỗi tầng.
+        successors (np.ndarray): Bảng (362880, k) rank kế tiếp, -1 nếu không hợp lệ.
+        max_depth (int): Số tầng tối đa, None nếu không giới hạn.
+
+    Returns:
+        list: Đường đi từ start_state tới goal_state, hoặc None.
+    """
+    start_rank = rank(start_state)
+    goal_rank = rank(goal_state)
+    if start_rank == goal_rank:
+        return [tuple(start_state)]
+
+    heuristic = manhattan_table(tuple(goal_state))
+    visited = np.zeros(NUM_STATES, dtype=bool)
+    visited[start_rank] = True
+    layers = [(np.array([start_rank], dtype=np.int32), np.array([-1], dtype=np.int32))]
+    branching = successors.shape[1]
+    depth = 0
+
+    while max_depth is None or depth < max_depth:
+        depth += 1
+        beam = layers[-1][0]
+        children = successors[beam].ravel()
+        parents = np.repeat(np.arange(beam.size, dtype=np.int32), branching)
+        valid = children >= 0
+        children, parents = children[valid], parents[valid]
+
+        children, first = np.unique(children, return_index=True)
+        parents = parents[first]
+        fresh = ~visited[children]
+        children, parents = children[fresh], parents[fresh]
+        if children.size == 0:
+            return None
+        visited[children] = True
+
+        hit = np.flatnonzero(children == goal_rank)
+        if hit.size:
+            layers.append((children[hit], parents[hit]))
+            return _reconstruct(layers, 0)
+
+        if children.size > beam_width:
+            keep = np.argpartition(heuristic[children], beam_width - 1)[:beam_width]
+            children, parents = children[keep], parents[keep]
+        layers.append((children, parents))
+
+    return None
@@ -0,0 +1,278 @@
+# algorithms/belief_space.py
+import hashlib
+import heapq
+import time
+from array import array
+from collections import deque
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .puzzle_index import HALF_STATES, NUM_STATES, rank, unrank
+from .multi_goal import GoalSetHeuristic
+from .puzzle_tables import MOVE_NAMES, transition_table
+
+State = Tuple[int, ...]
+
+_BLANK_STRIDE = HALF_STATES // 9 # rank = parity * 181440 + blank_index * 20160 + ...
+
+
+def make_belief(states: Iterable[State]) -> np.ndarray:
+    """Belief (tập trạng thái có thể) dưới dạng mảng rank int32 đã sắp xếp, không trùng."""
+    return np.unique(np.array([rank(tuple(s)) for s in states], dtype=np.int32))
+
+
+def belief_states(belief: np.ndarray) -> List[State]:
+    return [unrank(int(r)) for r in belief]
+
+
+def goal_mask(goal_states: Iterable[State]) -> np.ndarray:
+    """Mảng bool (362880,) đánh dấu các rank thuộc tập đích."""
+    mask = np.zeros(NUM_STATES, dtype=bool)
+    for goal in goal_states:
+        mask[rank(tuple(goal))] = True
+    return mask
+
+
+def move_belief(belief: np.ndarray, move: int, successors: np.ndarray, invalid: str = "stay") -> Optional[np.ndarray]:
+    """
+    Áp dụng một nước đi cho cả belief bằng một phép gather trên bảng chuyển.
+    invalid="stay": trạng thái không đi được thì đứng yên (như blind.apply_move + giữ nguyên).
+    invalid="block": nước đi chỉ hợp lệ khi mọi trạng thái đều đi được; ngược lại trả về None.
+    """
+    moved = successors[belief, move]
+    stuck = moved < 0
+    if stuck.any():
+        if invalid == "block":
+            return None
+        moved = np.where(stuck, belief, moved)
+    return np.unique(moved)
+
+
+def expand_belief(belief: np.ndarray, successors: np.ndarray, invalid: str = "stay"):
+    """
+    Sinh (move, belief kế tiếp) cho cả 4 nước đi cùng lúc: một phép gather
+    (k, 4) và một lần sắp xếp theo cột, thay vì 4 lần move_belief - với belief
+    chỉ vài phần tử, chi phí gọi numpy lớn hơn nhiều so với dữ liệu.
+    """
+    moved = successors[belief]
+    stuck = moved < 0
+    blocked = stuck.any(axis=0)
+    if blocked.any() and invalid != "block":
+        moved = np.where(stuck, belief[:, None], moved)
+    moved = np.sort(moved, axis=0).T.copy()
+    duplicated = (moved[:, 1:] == moved[:, :-1]).any(axis=1)
+    for move in range(moved.shape[0]):
+        if invalid == "block" and blocked[move]:
+            continue
+        next_belief = moved[move]
+        if duplicated[move]:
+            next_belief = np.unique(next_belief)
+        yield move, next_belief
+
+
+def fingerprint(belief: np.ndarray) -> bytes:
+    """Dấu vân tay 128-bit của belief (blake2b trên các byte của mảng rank đã sắp xếp)."""
+    return hashlib.blake2b(belief.tobytes(), digest_size=16).digest()
+
+
+def _moves_from(parents: array, moves: array, node: int) -> List[str]:
+    path = []
+    while node > 0:
+        path.append(MOVE_NAMES[moves[node]])
+        node = parents[node]
+    path.reverse()
+    return path
+
+
+def find_common_path(initial_states: Iterable[State], goal_states: Iterable[State],
+                     max_expansions: Optional[int] = None, invalid: str = "stay") -> Optional[List[str]]:
+    """
+    BFS trên không gian belief: tìm dãy nước đi (tên 'Up'/'Down'/'Left'/'Right')
+    đưa mọi trạng thái ban đầu vào tập đích.
+
+    Belief được lưu dưới dạng mảng rank, chỉ nằm trong hàng đợi khi còn ở
+    frontier; tập đã thăm chỉ chứa dấu vân tay 16 byte. Đường đi được dựng lại
+    từ mảng cha/nước đi (array) thay vì sao chép danh sách cho mỗi node.
+
+    Returns:
+        list: Dãy tên nước đi ([] nếu đã ở đích), hoặc None nếu không có /
+              vượt max_expansions.
+    """
+    belief = make_belief(initial_states)
+    if belief.size == 0:
+        return None
+    is_goal = goal_mask(goal_states)
+    if is_goal[belief].all():
+        return []
+
+    successors = transition_table()
+    parents = array('i', [-1])
+    moves = array('b', [-1])
+    visited = {fingerprint(belief)}
+    queue = deque([(0, belief)])
+    expansions = 0
+
+    while queue:
+        node, belief = queue.popleft()
+        expansions += 1
+        if max_expansions is not None and expansions > max_expansions:
+            return None
+        for move, next_belief in expand_belief(belief, successors, invalid):
+            key = fingerprint(next_belief)
+            if key in visited:
+                continue
+            visited.add(key)
+            parents.append(node)
+            moves.append(move)
+            if is_goal[next_belief].all():
+                return _moves_from(parents, moves, len(parents) - 1)
+            queue.append((len(parents) - 1, next_belief))
+    return None
+
+
+def lockstep_dead_end(belief: np.ndarray, goal_states: List[State]) -> bool:
+    """
+    Belief mà mọi thành viên có ô trống cùng vị trí sẽ di chuyển đồng bộ mãi
+    mãi (cùng đi hoặc cùng đứng yên), nên phép đổi nhãn ô giữa các thành viên
+    là bất biến. Belief đó là ngõ cụt nếu không có đích g nào mà ảnh của g qua
+    các phép đổi nhãn ấy đều nằm trong tập đích.
+    """
+    blanks = (belief % HALF_STATES) // _BLANK_STRIDE
+    if belief.size < 2 or (blanks != blanks[0]).any():
+        return False
+    members = [unrank(int(r)) for r in belief]
+    first = members[0]
+    # member = relabel(first) mãi mãi, nên khi first tới đích g, member ở relabel(g).
+    relabels = [dict(zip(first, member)) for member in members[1:]]
+    goal_set = set(goal_states)
+    for goal in goal_states:
+        if all(tuple(relabel[tile] for tile in goal) in goal_set for relabel in relabels):
+            return False
+    return True
+
+
+def _dominated(members, cost, expanded, costs, expanded_by_member):
+    for member in members:
+        for other in expanded_by_member.get(member, ()):
+            subset = expanded[other]
+            if len(subset) < len(members) and costs[other] <= cost and subset <= members:
+                return True
+    return False
+
+
+def astar_common_path(initial_states: Iterable[State], goal_states: Iterable[State],
+                      heuristic: str = "exact", max_expansions: Optional[int] = None,
+                      invalid: str = "stay", prune_dominated: bool = True,
+                      time_budget: Optional[float] = None, stats: Optional[dict] = None) -> Optional[List[str]]:
+    """
+    A* trên không gian belief.
+
+    h(belief) = max trên các trạng thái thành viên của khoảng cách tới đích gần
+    nhất - chính xác (heuristic="exact", BFS đa nguồn) hoặc Manhattan
+    (heuristic="manhattan"). Mỗi nước đi chỉ đưa mỗi thành viên đi tối đa một
+    bước, nên h chấp nhận được và nhất quán.
+
+    Với prune_dominated=True, belief là tập cha của một belief đã mở rộng với
+    g không lớn hơn bị bỏ qua: mọi kế hoạch cho tập cha cũng giải được tập con.
+    Các belief đã mở rộng được đánh chỉ mục ngược theo phần tử nhỏ nhất (dạng
+    frozenset, nên phép kiểm tra tập con chạy trong C).
+
+    Belief ngõ cụt (xem lockstep_dead_end) bị loại ngay khi sinh ra.
+
+    Args:
+        time_budget (float): Giới hạn thời gian (giây), ngoài max_expansions.
+        stats (dict): Nếu truyền vào, được điền số node mở rộng / sinh ra / bị
+            loại, lý do dừng và thời gian chạy.
+
+    Returns:
+        list: Dãy tên nước đi ngắn nhất ([] nếu đã ở đích), hoặc None nếu không
+              có / vượt max_expansions.
+    """
+    started = time.perf_counter()
+    counters = {"expanded": 0, "generated": 0, "duplicates": 0, "dominated": 0, "dead_ends": 0}
+
+    def finish(result, reason):
+        if stats is not None:
+            stats.update(counters)
+            stats["result"] = reason
+            stats["plan_length"] = None if result is None else len(result)
+            stats["elapsed"] = time.perf_counter() - started
+        return result
+
+    belief = make_belief(initial_states)
+    goal_states = [tuple(goal) for goal in goal_states]
+    if belief.size == 0 or not goal_states:
+        return finish(None, "empty")
+    if heuristic not in ("exact", "manhattan"):
+        raise ValueError(f"Unknown belief heuristic: {heuristic}")
+    distances = GoalSetHeuristic(goal_states, exact=heuristic == "exact").table()
+    if (distances[belief] < 0).any():
+        return finish(None, "unreachable")
+    is_goal = goal_mask(goal_states)
+    deadline = None if time_budget is None else started + time_budget
+
+    successors = transition_table()
+    beliefs = [belief]
+    parents = array('i', [-1])
+    moves = array('b', [-1])
+    costs = array('i', [0])
+    best_cost = {fingerprint(belief): 0}
+    expanded = {}
+    expanded_by_min = {}
+    heap = [(int(distances[belief].max()), 0, 0)]
+    expansions = 0
+
+    while heap:
+        _, cost, node = heapq.heappop(heap)
+        if cost > costs[node]:
+            continue
+        belief = beliefs[node]
+        if is_goal[belief].all():
+            return finish(_moves_from(parents, moves, node), "solved")
+        if max_expansions is not None and expansions >= max_expansions:
+            return finish(None, "expansion_budget")
+        if deadline is not None and expansions % 256 == 0 and time.perf_counter() > deadline:
+            return finish(None, "time_budget")
+        expansions += 1
+        counters["expanded"] = expansions
+        if prune_dominated:
+            expanded[node] = frozenset(belief.tolist())
+            expanded_by_min.setdefault(int(belief[0]), []).append(node)
+
+        next_cost = cost + 1
+        for move, next_belief in expand_belief(belief, successors, invalid):
+            key = fingerprint(next_belief)
+            seen_cost = best_cost.get(key)
+            if seen_cost is not None and seen_cost <= next_cost:
+                counters["duplicates"] += 1
+                continue
+            if lockstep_dead_end(next_belief, goal_states):
+                counters["dead_ends"] += 1
+                continue
+            if prune_dominated and next_belief.size > 1 and _dominated(
+                    frozenset(next_belief.tolist()), next_cost, expanded, costs, expanded_by_min):
+                counters["dominated"] += 1
+                continue
+            counters["generated"] += 1
+            best_cost[key] = next_cost
+            beliefs.append(next_belief)
+            parents.append(node)
+            moves.append(move)
+            costs.append(next_cost)
+            heapq.heappush(heap, (next_cost + int(distances[next_belief].max()), next_cost, len(beliefs) - 1))
+    return finish(None, "exhausted")
+
+
+if __name__ == "__main__":
+    # Kiểm tra hồi quy (python -m algorithms.belief_space): belief hai thành viên
+    # cùng vị trí ô trống, giải được bằng Down, Down, không được coi là ngõ cụt.
+    identity = (1, 2, 3, 4, 5, 6, 7, 8, 9)
+    transpose = (1, 4, 7, 2, 5, 8, 3, 6, 9)
+    goals = [identity, transpose, (2, 1, 3, 4, 5, 6, 7, 8, 9)]
+    successors = transition_table()
+    up, down = MOVE_NAMES.index("Up"), MOVE_NAMES.index("Down")
+    belief = make_belief(unrank(int(successors[successors[rank(state), up], up])) for state in (identity, transpose))
+    assert not lockstep_dead_end(belief, goals)
+    assert astar_common_path(belief_states(belief), goals) == ["Down", "Down"]
+    print("belief_space: OK")
@@ -2,10 +2,11 @@
 import pygame
 import sys
 import random
-from collections import deque
-import time
 import copy # For deep copying states if necessary
 
+from algorithms.conformant_planner import ConformantPlanner, apply_move
+from algorithms.state_sampler import StateSampler
+
 # --- Constants and Colors ---
 DARK_BG = (18, 27, 18)
 PRIMARY = (52, 168, 83)
@@ -36,49 +37,17 @@ except pygame.error:
 
 # --- Helper Functions ---
 
-def get_inversions(state):
-    """Helper to count inversions."""
-    state_without_blank = [x for x in state if x != 9]
-    inversions = 0
-    for i in range(len(state_without_blank)):
-        for j in range(i + 1, len(state_without_blank)):
-            if state_without_blank[i] > state_without_blank[j]:
-                inversions += 1
-    return inversions
-
-def is_solvable(state):
-    """Checks solvability for standard goal (1..9)."""
-    if 9 not in state or len(state) != 9: return False
-    inversions = get_inversions(state)
-    return inversions % 2 == 0
-
-def apply_move(state, move_direction):
-    """Applies a move to the blank tile (9). Returns new tuple or None."""
-    s = list(state)
-    try: blank_index = s.index(9)
-    except ValueError: return None
-    row, col = divmod(blank_index, 3)
-    dr, dc = 0, 0
-    if move_direction == 'Up': dr = -1
-    elif move_direction == 'Down': dr = 1
-    elif move_direction == 'Left': dc = -1
-    elif move_direction == 'Right': dc = 1
-    else: return None
-    new_row, new_col = row + dr, col + dc
-    if 0 <= new_row < 3 and 0 <= new_col < 3:
-        new_index = new_row * 3 + new_col
-        s[blank_index], s[new_index] = s[new_index], s[blank_index]
-        return tuple(s)
-    return None
+# apply_move / is_solvable: algorithms/conformant_planner.py (dùng chung với blind.py)
+
+_state_sampler = None
+_planner = ConformantPlanner(TARGET_GOAL_STATES, invalid="block", max_expansions=150000)
 
 def generate_random_solvable_state():
-    """Generates a random, solvable state where state[0] == 1."""
-    while True:
-        remaining_tiles = list(range(2, 10))
-        random.shuffle(remaining_tiles)
-        state = tuple([1] + remaining_tiles)
-        if is_solvable(state):
-            return state
+    """Generates a random, solvable state where state[0] == 1 (uniform, no rejection loop)."""
+    global _state_sampler
+    if _state_sampler is None:
+        _state_sampler = StateSampler([(1, 2, 3, 4, 5, 6, 7, 8, 9)])
+    return _state_sampler.uniform(fixed_cells={0: 1})[0]
 
 # --- Classes ---
 
@@ -155,51 +124,20 @@ class Button:
 
 # --- Blind Search Algorithm ---
 def find_common_path(initial_belief_states, target_goals):
-    """BFS on belief state space (expects exactly 2 states)."""
-    if not initial_belief_states or len(initial_belief_states) != 2:
-        print("Error: find_common_path requires exactly 2 states.")
+    """Conformant planning with blocking moves: a move is used only if it is valid for every state."""
+    if not initial_belief_states:
+        print("Error: find_common_path requires at least one state.")
         return None
 
-    initial_belief_tuple = tuple(initial_belief_states)
-    target_goals_set = set(target_goals)
-
-    if all(state in target_goals_set for state in initial_belief_tuple):
-        return [] # Already solved
-
-    queue = deque([(initial_belief_tuple, [])])
-    visited = {initial_belief_tuple}
-    move_directions = ['Up', 'Down', 'Left', 'Right']
-    max_iterations = 150000
-    iterations = 0
-    start_time = time.time()
-
-    while queue and iterations < max_iterations:
-        iterations += 1
-        current_belief_tuple, current_path = queue.popleft()
-
-        if iterations % 20000 == 0: # Less frequent updates
-            elapsed = time.time() - start_time
-            print(f"BFS iter {iterations}, queue: {len(queue)}, path len: {len(current_path)}, time: {elapsed:.1f}s")
-
-        for move in move_directions:
-            state1, state2 = current_belief_tuple
-            next_state1 = apply_move(state1, move)
-            next_state2 = apply_move(state2, move)
-
-            if next_state1 is not None and next_state2 is not None:
-                next_belief_tuple = (next_state1, next_state2)
-                if next_belief_tuple not in visited:
-                    if all(state in target_goals_set for state in next_belief_tuple):
-                        elapsed = time.time() - start_time
-                        print(f"Common path found! Iter: {iterations}, Len: {len(current_path) + 1}, Time: {elapsed:.2f}s")
-                        return current_path + [move]
-
-                    visited.add(next_belief_tuple)
-                    queue.append((next_belief_tuple, current_path + [move]))
-
-    elapsed = time.time() - start_time
-    print(f"BFS failed for pair after {iterations} iterations. Time: {elapsed:.2f}s")
-    return None
+    planner = _planner if set(target_goals) == set(_planner.goal_states) else ConformantPlanner(
+        target_goals, invalid="block", max_expansions=150000)
+    result = planner.plan(initial_belief_states)
+    stats = result.stats
+    if result.solved:
+        print(f"Common path found! Expanded: {stats['expanded']}, Len: {len(result.plan)}, Time: {stats['elapsed']:.2f}s")
+    else:
+        print(f"Search failed ({stats.get('result')}) after {stats.get('expanded', 0)} expansions. Time: {stats.get('elapsed', 0):.2f}s")
+    return result.plan
 
 # --- GUI Function ---
 def run_blind_search():
@@ -324,7 +262,11 @@ def run_blind_search():
             pygame.display.flip() # Show searching status
 
             # Generate a new pair
-            current_pair = [generate_random_solvable_state() for _ in range(2)]
+            # Sinh ngược từ tập đích (luôn có kế hoạch chung với nước đi bị chặn);
+            # cặp ngẫu nhiên độc lập hầu như không bao giờ giải được.
+            current_pair = _planner.sample_instance(2, random.randint(6, 12), fixed_cells={0: 1})
+            if current_pair is None:
+                current_pair = [generate_random_solvable_state() for _ in range(2)]
             print(f"Generated Pair: {current_pair[0]}, {current_pair[1]}")
 
             # Find path for this specific pair
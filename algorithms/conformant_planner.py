@@ -0,0 +1,157 @@
+# algorithms/conformant_planner.py
+import random
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Tuple
+
+from .belief_space import astar_common_path, fingerprint, make_belief
+from .puzzle_index import BLANK, parity_of
+from .puzzle_tables import MOVE_NAMES, MOVES, OPPOSITE_MOVE
+
+State = Tuple[int, ...]
+
+_MOVE_DELTAS = dict(zip(MOVE_NAMES, MOVES))
+_OPPOSITE_NAMES = {name: MOVE_NAMES[OPPOSITE_MOVE[index]] for index, name in enumerate(MOVE_NAMES)}
+
+
+def apply_move(state: State, move_direction: str) -> Optional[State]:
+    """Di chuyển ô trống theo hướng 'Up'/'Down'/'Left'/'Right'; None nếu ra ngoài bảng."""
+    delta = _MOVE_DELTAS.get(move_direction)
+    if delta is None or BLANK not in state:
+        return None
+    blank_index = state.index(BLANK)
+    row, col = divmod(blank_index, 3)
+    new_row, new_col = row + delta[0], col + delta[1]
+    if not (0 <= new_row < 3 and 0 <= new_col < 3):
+        return None
+    s = list(state)
+    new_index = new_row * 3 + new_col
+    s[blank_index], s[new_index] = s[new_index], s[blank_index]
+    return tuple(s)
+
+
+def is_solvable(state: State) -> bool:
+    """Cùng lớp chẵn lẻ với đích chuẩn (1, 2, ..., 9)."""
+    return len(state) == 9 and BLANK in state and parity_of(state) == 0
+
+
+def execute_plan(initial_states: Iterable[State], plan: List[str], invalid: str = "stay") -> List[State]:
+    """Thực hiện kế hoạch trên từng trạng thái ban đầu, trả về các trạng thái cuối."""
+    states = [tuple(state) for state in initial_states]
+    for move in plan:
+        moved = [apply_move(state, move) for state in states]
+        if invalid == "block" and None in moved:
+            raise ValueError(f"Move {move} is blocked for some state")
+        states = [state if nxt is None else nxt for state, nxt in zip(states, moved)]
+    return states
+
+
+class PlanResult:
+    """Kết quả một lần lập kế hoạch: plan là dãy tên nước đi (None nếu thất bại)."""
+
+    def __init__(self, initial_states: List[State], plan: Optional[List[str]], stats: dict):
+        self.initial_states = initial_states
+        self.plan = plan
+        self.stats = stats
+
+    @property
+    def solved(self) -> bool:
+        return self.plan is not None
+
+    def __repr__(self):
+        length = None if self.plan is None else len(self.plan)
+        return f"PlanResult(states={len(self.initial_states)}, plan_length={length}, result={self.stats.get('result')})"
+
+
+class ConformantPlanner:
+    """
+    Lập kế hoạch không cảm biến (conformant) cho 8-Puzzle, không phụ thuộc pygame:
+    tìm một dãy nước đi đưa MỌI trạng thái ban đầu vào tập đích.
+
+    invalid="stay": nước đi không hợp lệ với một trạng thái thì trạng thái đó
+    đứng yên (blind.py); invalid="block": nước đi chỉ được dùng khi hợp lệ với
+    mọi trạng thái. Mỗi lần plan() chịu giới hạn max_expansions và time_budget;
+    kết quả được lưu trong một LRU theo dấu vân tay của belief ban đầu.
+    """
+
+    def __init__(self, goal_states: Iterable[State], invalid: str = "stay", heuristic: str = "exact",
+                 max_expansions: Optional[int] = 300000, time_budget: Optional[float] = None,
+                 prune_dominated: bool = True, cache_size: int = 256):
+        if invalid not in ("stay", "block"):
+            raise ValueError(f"Unknown invalid-move semantics: {invalid}")
+        self.goal_states = list(dict.fromkeys(tuple(goal) for goal in goal_states))
+        self.invalid = invalid
+        self.heuristic = heuristic
+        self.max_expansions = max_expansions
+        self.time_budget = time_budget
+        self.prune_dominated = prune_dominated
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self.totals = {"plans": 0, "solved": 0, "cache_hits": 0, "expanded": 0, "elapsed": 0.0}
+
+    def plan(self, initial_states: Iterable[State]) -> PlanResult:
+        initial_states = [tuple(state) for state in initial_states]
+        key = fingerprint(make_belief(initial_states)) if initial_states else None
+        cached = self._cache.get(key)
+        self.totals["plans"] += 1
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self.totals["cache_hits"] += 1
+            self.totals["solved"] += cached.solved
+            return PlanResult(initial_states, cached.plan, dict(cached.stats, cached=True))
+
+        stats = {}
+        plan = astar_common_path(initial_states, self.goal_states, heuristic=self.heuristic,
+                                 max_expansions=self.max_expansions, invalid=self.invalid,
+                                 prune_dominated=self.prune_dominated,
+                                 time_budget=self.time_budget, stats=stats)
+        result = PlanResult(initial_states, plan, stats)
+        self.totals["solved"] += result.solved
+        self.totals["expanded"] += stats.get("expanded", 0)
+        self.totals["elapsed"] += stats.get("elapsed", 0.0)
+        # Kết quả dừng vì hết thời gian phụ thuộc máy, nên không lưu.
+        if key is not None and stats.get("result") != "time_budget":
+            self._cache[key] = result
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    def plan_many(self, batches: Iterable[Iterable[State]]) -> List[PlanResult]:
+        """Lập kế hoạch cho nhiều tập trạng thái ban đầu (dùng chung bảng và bộ nhớ đệm)."""
+        return [self.plan(initial_states) for initial_states in batches]
+
+    def sample_instance(self, num_states: int, plan_length: int, fixed_cells: Optional[dict] = None,
+                        rng: Optional[random.Random] = None, attempts: int = 20,
+                        max_belief: int = 256) -> Optional[List[State]]:
+        """
+        Sinh num_states trạng thái ban đầu khác nhau CHẮC CHẮN có kế hoạch chung,
+        bằng cách đi ngược plan_length bước từ tập đích: tiền ảnh của t qua nước
+        đi m gồm trạng thái đi m từ đó tới t, và (với "stay") chính t nếu m
+        không hợp lệ tại t. Mỗi bước chọn nước đi có tiền ảnh khác rỗng, ưu tiên
+        tiền ảnh lớn; tập con bất kỳ của belief cuối cùng đều giải được.
+        """
+        rng = rng or random.Random()
+        fixed_cells = fixed_cells or {}
+        for _ in range(attempts):
+            belief = set(self.goal_states)
+            for _ in range(plan_length):
+                options = []
+                for move in MOVE_NAMES:
+                    preimage = set()
+                    for state in belief:
+                        if self.invalid == "stay" and apply_move(state, move) is None:
+                            preimage.add(state)
+                        previous = apply_move(state, _OPPOSITE_NAMES[move])
+                        if previous is not None:
+                            preimage.add(previous)
+                    if preimage:
+                        options.append(preimage)
+                if not options:
+                    break
+                belief = rng.choices(options, weights=[len(option) for option in options])[0]
+                if len(belief) > max_belief:
+                    belief = set(rng.sample(sorted(belief), max_belief))
+            candidates = sorted(state for state in belief
+                                if all(state[cell] == tile for cell, tile in fixed_cells.items()))
+            if len(candidates) >= num_states:
+                return rng.sample(candidates, num_states)
+        return None
@@ -0,0 +1,172 @@
+# algorithms/ga_population.py
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .puzzle_index import rank, unrank
+from .puzzle_tables import manhattan_table, transition_table
+
+State = Tuple[int, ...]
+
+
+class PopulationEngine:
+    """
+    Quần thể GA lưu dưới dạng mảng NumPy.
+
+    Mỗi nhiễm sắc thể là một hàng của mảng 2 chiều `genes` (mã nước đi, uint8)
+    kèm độ dài trong `lengths`; các gen sau độ dài là phần đệm chưa dùng.
+    Cả quần thể được "chạy lại" cùng lúc qua bảng `successors` (rank x mã nước
+    đi -> rank, -1 nếu không hợp lệ): nước đi không hợp lệ được bỏ qua, và mỗi
+    nhiễm sắc thể dừng lại ngay khi chạm đích.
+    """
+
+    def __init__(self, start_state: State, goal_state: State, population_size: int,
+                 max_length: int, successors: Optional[np.ndarray] = None,
+                 move_costs: Optional[np.ndarray] = None, seed: Optional[int] = None):
+        self.successors = transition_table() if successors is None else successors
+        num_moves = self.successors.shape[1]
+        self.move_costs = np.ones(num_moves, dtype=np.int32) if move_costs is None else move_costs
+        self.heuristic = manhattan_table(tuple(goal_state))
+        self.start_rank = rank(tuple(start_state))
+        self.goal_rank = rank(tuple(goal_state))
+        self.max_length = max_length
+        self.rng = np.random.default_rng(seed)
+        self.genes = self.rng.integers(0, num_moves, size=(population_size, max_length), dtype=np.uint8)
+        self.lengths = np.zeros(population_size, dtype=np.int32)
+        self.fitness = np.zeros(population_size, dtype=np.float64)
+        self.final_ranks = np.zeros(population_size, dtype=np.int32)
+        self.costs = np.zeros(population_size, dtype=np.int32)
+        self.reached = np.zeros(population_size, dtype=bool)
+
+    def initialize(self, max_initial_length: int) -> None:
+        size = self.genes.shape[0]
+        self.lengths = self.rng.integers(1, max_initial_length + 1, size=size, dtype=np.int32)
+
+    def evaluate(self) -> None:
+        """Chạy lại toàn bộ quần thể và tính fitness (càng cao càng tốt)."""
+        size = self.genes.shape[0]
+        ranks = np.full(size, self.start_rank, dtype=np.int32)
+        costs = np.zeros(size, dtype=np.int32)
+        reached = ranks == self.goal_rank
+        for step in range(int(self.lengths.max(initial=0))):
+            active = (step < self.lengths) & ~reached
+            if not active.any():
+                break
+            moves = self.genes[:, step]
+            next_ranks = self.successors[ranks, moves]
+            moved = active & (next_ranks >= 0)
+            ranks = np.where(moved, next_ranks, ranks)
+            costs += np.where(moved, self.move_costs[moves], 0)
+            reached |= moved & (ranks == self.goal_rank)
+        h = self.heuristic[ranks].astype(np.float64)
+        # Cùng công thức với genetic.Individual, vốn tính len(path) theo số trạng thái
+        # (kể cả trạng thái đầu), tức số nước đi + 1.
+        path_lengths = costs + 1
+        fitness = 1.0 / (1.0 + h + 0.1 * path_lengths)
+        fitness += np.where(reached, 1000.0 / (1.0 + path_lengths), 0.0)
+        self.final_ranks, self.costs, self.reached, self.fitness = ranks, costs, reached, fitness
+
+    def tournament(self, count: int, tournament_size: int) -> np.ndarray:
+        contestants = self.rng.integers(0, self.genes.shape[0], size=(count, tournament_size))
+        winners = np.argmax(self.fitness[contestants], axis=1)
+        return contestants[np.arange(count), winners]
+
+    def next_generation(self, elite_size: int, tournament_size: int, crossover_rate: float,
+                        mutation_rate: float, max_length_change: int) -> None:
+        """Tạo thế hệ mới: elitism, tournament selection, lai một điểm và đột biến."""
+        size, max_length = self.genes.shape
+        elite = np.argsort(-self.fitness)[:elite_size]
+        num_children = size - elite.size
+        mothers = self.tournament(num_children, tournament_size)
+        fathers = self.tournament(num_children, tournament_size)
+        genes_a, genes_b = self.genes[mothers], self.genes[fathers]
+        len_a, len_b = self.lengths[mothers], self.lengths[fathers]
+
+        # Lai một điểm: phần đầu của mẹ + phần sau của cha.
+        points = self.rng.integers(1, max_length, size=num_children, dtype=np.int32)
+        do_cross = self.rng.random(num_children) < crossover_rate
+        points = np.where(do_cross, points, max_length)
+        take_mother = np.arange(max_length) < points[:, None]
+        child_genes = np.where(take_mother, genes_a, genes_b)
+        child_lengths = np.where(points < len_b, len_b, np.minimum(points, len_a))
+
+        # Đột biến: đổi một gen ngẫu nhiên trong phần đang dùng, và thay đổi độ dài.
+        mutated = np.flatnonzero(self.rng.random(num_children) < mutation_rate)
+        positions = (self.rng.random(mutated.size) * child_lengths[mutated]).astype(np.int64)
+        child_genes[mutated, positions] = self.rng.integers(0, self.successors.shape[1], size=mutated.size, dtype=np.uint8)
+        length_mask = self.rng.random(num_children) < mutation_rate
+        delta = self.rng.integers(-max_length_change, max_length_change + 1, size=num_children, dtype=np.int32)
+        child_lengths = np.clip(np.where(length_mask, child_lengths + delta, child_lengths), 1, max_length)
+
+        self.genes = np.concatenate([self.genes[elite], child_genes])
+        self.lengths = np.concatenate([self.lengths[elite], child_lengths]).astype(np.int32)
+
+    def emigrants(self, count: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Bản sao gen và độ dài của `count` cá thể tốt nhất (theo fitness hiện tại)."""
+        best = np.argsort(-self.fitness)[:count]
+        return self.genes[best].copy(), self.lengths[best].copy()
+
+    def immigrate(self, genes: np.ndarray, lengths: np.ndarray) -> None:
+        """Ghi đè các cá thể cuối quần thể (con mới, không phải elite) bằng cá thể nhập cư."""
+        count = min(genes.shape[0], self.genes.shape[0])
+        if count == 0:
+            return
+        self.genes[-count:] = genes[:count, :self.max_length]
+        self.lengths[-count:] = np.clip(lengths[:count], 1, self.max_length)
+
+    def best_index(self) -> int:
+        if self.reached.any():
+            candidates = np.flatnonzero(self.reached)
+            return int(candidates[np.argmin(self.costs[candidates])])
+        return int(np.argmax(self.fitness))
+
+    def decode_path(self, index: int) -> List[State]:
+        """Dựng lại đường đi (list trạng thái) của một cá thể, bỏ qua nước đi không hợp lệ."""
+        current = self.start_rank
+        path = [unrank(current)]
+        for move in self.genes[index, :self.lengths[index]]:
+            if current == self.goal_rank:
+                break
+            next_rank = int(self.successors[current, move])
+            if next_rank >= 0:
+                current = next_rank
+                path.append(unrank(current))
+        return path
+
+
+def solve(start_state: State, goal_state: State,
+          population_size: int = 10000,
+          num_generations: int = 300,
+          max_length: int = 40,
+          max_initial_path_len: int = 25,
+          tournament_size: int = 3,
+          crossover_rate: float = 0.8,
+          mutation_rate: float = 0.15,
+          max_length_change: int = 3,
+          elite_size: int = 20,
+          seed: Optional[int] = None) -> Optional[List[State]]:
+    """
+    Giải 8-Puzzle bằng GA vector hóa (xem PopulationEngine).
+    Trả về đường đi (list các State) hoặc None nếu không đạt đích.
+    """
+    start_state = tuple(start_state)
+    goal_state = tuple(goal_state)
+    if start_state == goal_state:
+        return [start_state]
+
+    engine = PopulationEngine(start_state, goal_state, population_size, max_length, seed=seed)
+    engine.initialize(min(max_initial_path_len, max_length))
+    for generation in range(num_generations):
+        engine.evaluate()
+        if engine.reached.any():
+            best = engine.best_index()
+            print(f"Gen {generation}: Found goal! Path cost: {engine.costs[best]}")
+            return engine.decode_path(best)
+        if generation % 20 == 0:
+            best = engine.best_index()
+            print(f"Generation {generation}: Best fitness = {engine.fitness[best]:.4f}, "
+                  f"Heuristic = {engine.heuristic[engine.final_ranks[best]]}")
+        engine.next_generation(elite_size, tournament_size, crossover_rate, mutation_rate, max_length_change)
+
+    print("Genetic Algorithm (vectorized) finished. No solution found.")
+    return None
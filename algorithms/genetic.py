@@ -208,14 +208,38 @@ def solve(start_state: State, goal_state: State,
           mutation_rate: float = 0.15,
           max_initial_path_len: int = 25, # Độ dài tối đa của đường đi ban đầu
           max_mutation_steps: int = 5, # Số bước ngẫu nhiên tối đa khi đột biến
-          elite_size: int = 5) -> Optional[List[State]]: # Giữ lại elite_size cá thể tốt nhất
+          elite_size: int = 5, # Giữ lại elite_size cá thể tốt nhất
+          vectorized: bool = False,
+          num_islands: int = 0) -> Optional[List[State]]:
     """
     Giải 8-Puzzle bằng thuật toán di truyền.
     Trả về đường đi (list các State) hoặc None.
+
+    Với vectorized=True, quần thể được chạy bằng ga_population.PopulationEngine
+    (mảng NumPy mã nước đi), phù hợp cho quần thể hàng chục nghìn cá thể.
+    Với num_islands > 0, chạy mô hình đảo trên nhiều tiến trình (genetic_islands).
     """
     start_state = tuple(start_state)
     goal_state = tuple(goal_state)
 
+    if num_islands > 0:
+        from .genetic_islands import solve as solve_islands
+        return solve_islands(start_state, goal_state, num_islands=num_islands,
+                             num_generations=num_generations,
+                             max_initial_path_len=max_initial_path_len,
+                             mutation_rate=mutation_rate,
+                             max_length_change=max_mutation_steps)
+
+    if vectorized:
+        from .ga_population import solve as solve_vectorized
+        return solve_vectorized(start_state, goal_state,
+                                population_size=population_size,
+                                num_generations=num_generations,
+                                max_initial_path_len=max_initial_path_len,
+                                mutation_rate=mutation_rate,
+                                max_length_change=max_mutation_steps,
+                                elite_size=elite_size)
+
     if start_state == goal_state:
         return [start_state]
 
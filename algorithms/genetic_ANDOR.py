@@ -1,10 +1,11 @@
 import random
+from collections import OrderedDict
 from typing import List, Tuple, Optional, Dict, Set
 import copy # For deep copying states if needed
 
 # Định nghĩa kiểu dữ liệu cho trạng thái (một tuple các số nguyên)
 State = Tuple[int, ...]
-Move = str # e.g., 'Up', 'Left', 'Down_Double_Right' (if we encode double moves like this)
+Move = int # Mã nước đi: 0-3 là di chuyển đơn, 4-15 là di chuyển kép (xem MOVE_NAMES)
 Chromosome = List[Move] # A sequence of moves
 
 # --- Heuristic Function (Manhattan Distance) ---
@@ -68,68 +69,105 @@ def apply_single_move(state: State, move: str) -> Optional[State]:
 
 
 POSSIBLE_SINGLE_MOVES = ['Up', 'Down', 'Left', 'Right']
+_SINGLE_MOVE_DELTAS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+_OPPOSITE_MOVE = [1, 0, 3, 2]
+
+# Mã nước đi dạng số nguyên nhỏ: 0-3 là di chuyển đơn, tiếp theo là các cặp
+# di chuyển kép (bước 2 không được hoàn tác bước 1). Tên chỉ dùng để hiển thị.
+MOVE_SEQUENCES: List[Tuple[int, ...]] = [(m,) for m in range(4)] + [
+    (m1, m2) for m1 in range(4) for m2 in range(4) if m2 != _OPPOSITE_MOVE[m1]]
+MOVE_NAMES: List[str] = ["_Then_".join(POSSIBLE_SINGLE_MOVES[m] for m in seq) for seq in MOVE_SEQUENCES]
+MOVE_COSTS: List[int] = [len(seq) for seq in MOVE_SEQUENCES]
+
+def apply_move_code(state: Optional[State], code: Move) -> Optional[State]:
+    """Applies an encoded (single or double) move. Returns None if any step leaves the board."""
+    if state is None:
+        return None
+    s_list = list(state)
+    size = int(len(state)**0.5)
+    try:
+        blank_index = s_list.index(size * size)
+    except ValueError:
+        return None
+    row, col = divmod(blank_index, size)
+    for move in MOVE_SEQUENCES[code]:
+        dr, dc = _SINGLE_MOVE_DELTAS[move]
+        new_row, new_col = row + dr, col + dc
+        if not (0 <= new_row < size and 0 <= new_col < size):
+            return None
+        new_index = new_row * size + new_col
+        s_list[blank_index], s_list[new_index] = s_list[new_index], s_list[blank_index]
+        blank_index, row, col = new_index, new_row, new_col
+    return tuple(s_list)
 
 def get_possible_moves_from_state(state: State) -> List[Tuple[Move, State, int]]:
     """
     Generates all possible next moves (single and double) from the current state.
-    Returns a list of tuples: (move_name_str, next_state_tuple, move_cost)
+    Returns a list of tuples: (move_code, next_state_tuple, move_cost)
     """
     possible_moves_details = []
-    current_s_list = list(state)
-    size = int(len(state)**0.5)
-    blank_tile = size * size
-    
-    try:
-        original_blank_idx = current_s_list.index(blank_tile)
-    except ValueError:
-        return [] # Invalid state
-
-    # 1. Single Moves
-    single_move_successors = [] # Store (move_name, resulting_state, new_blank_idx)
-    for move1_name in POSSIBLE_SINGLE_MOVES:
-        next_state_s1 = apply_single_move(state, move1_name)
-        if next_state_s1:
-            possible_moves_details.append((move1_name, next_state_s1, 1))
-            try:
-                new_blank_idx_s1 = list(next_state_s1).index(blank_tile)
-                single_move_successors.append((move1_name, next_state_s1, new_blank_idx_s1))
-            except ValueError:
-                continue # Should not happen if apply_single_move worked
-
-    # 2. Double Moves (derived from single moves)
-    for move1_name, state_s1, blank_idx_s1 in single_move_successors:
-        for move2_name in POSSIBLE_SINGLE_MOVES:
-            # Prevent immediate reversal for the second part of a double move
-            # e.g., if move1 was 'Up', move2 shouldn't be 'Down' if it brings blank back
-            temp_state_after_move2_check = apply_single_move(state_s1, move2_name)
-            if temp_state_after_move2_check == state: # This move would undo the first part
-                continue
-
-            next_state_s2 = apply_single_move(state_s1, move2_name)
-            if next_state_s2:
-                # Check if this double move results in the same state as the original start_state
-                # This is a bit tricky, the main check is that the blank tile doesn't return to original_blank_idx directly
-                
-                # A simpler check: ensure the blank's final position after two moves isn't its starting position.
-                try:
-                    final_blank_idx_s2 = list(next_state_s2).index(blank_tile)
-                    if final_blank_idx_s2 == original_blank_idx and move1_name != move2_name : # Avoid A-B-A if moves are different
-                        # This logic can be complex. The core idea is that a "double move"
-                        # should be a meaningful progression, not just shuffling back and forth.
-                        # For now, we rely on the cost and fitness to sort this out,
-                        # but a strict definition might disallow A-B-A type double moves.
-                        # Let's allow it but it will have cost 2.
-                        pass
-
-                except ValueError:
-                    continue
-                
-                double_move_name = f"{move1_name}_Then_{move2_name}"
-                possible_moves_details.append((double_move_name, next_state_s2, 2))
-                
+    for code in range(len(MOVE_SEQUENCES)):
+        next_state = apply_move_code(state, code)
+        if next_state is not None:
+            possible_moves_details.append((code, next_state, MOVE_COSTS[code]))
     return possible_moves_details
 
 
+class PrefixStateCache:
+    """
+    Bộ nhớ đệm tiền tố nước đi -> trạng thái, tổ chức như một trie.
+
+    Mỗi nút trie có một id; khóa (id_nút_cha, mã nước đi) ánh xạ tới
+    (id_nút_con, trạng thái sau tiền tố). Khi chạy lại một nhiễm sắc thể, ta
+    đi xuống trie theo các nước đi và chỉ thực sự áp dụng nước đi từ tiền tố
+    dài nhất đã có trong bộ đệm. Các khóa được loại bỏ theo LRU khi vượt quá
+    capacity; con của một nút bị loại không còn truy cập được và sẽ tự bị loại sau.
+    """
+
+    def __init__(self, start_state: State, capacity: int = 200000):
+        self.start_state = start_state
+        self.capacity = capacity
+        self.entries: "OrderedDict[Tuple[int, int], Tuple[int, Optional[State]]]" = OrderedDict()
+        self.next_node_id = 1
+        self.hits = 0
+        self.misses = 0
+
+    def replay(self, moves: Chromosome) -> Optional[State]:
+        """Trả về trạng thái sau chuỗi nước đi, hoặc None nếu có nước đi không hợp lệ."""
+        node = 0
+        state: Optional[State] = self.start_state
+        for code in moves:
+            key = (node, code)
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                node, state = entry
+                self.hits += 1
+            else:
+                state = apply_move_code(state, code)
+                node = self.next_node_id
+                self.next_node_id += 1
+                self.entries[key] = (node, state)
+                if len(self.entries) > self.capacity:
+                    self.entries.popitem(last=False)
+                self.misses += 1
+            if state is None:
+                return None
+        return state
+
+
+def replay_moves(start_state: State, moves: Chromosome, cache: Optional[PrefixStateCache] = None) -> Optional[State]:
+    """Áp dụng chuỗi nước đi từ start_state (qua bộ đệm tiền tố nếu có)."""
+    if cache is not None:
+        return cache.replay(moves)
+    current_state: Optional[State] = start_state
+    for code in moves:
+        current_state = apply_move_code(current_state, code)
+        if current_state is None:
+            return None
+    return current_state
+
+
 # --- Genetic Algorithm Components ---
 
 def generate_initial_population(pop_size: int, initial_max_len: int, start_state: State) -> List[Chromosome]:
@@ -149,8 +187,8 @@ def generate_initial_population(pop_size: int, initial_max_len: int, start_state
                 break # Cannot make more moves from this state
 
             # Choose a random move (can be single or double)
-            move_name, next_s, _ = random.choice(valid_next_steps)
-            chromosome.append(move_name)
+            move_code, next_s, _ = random.choice(valid_next_steps)
+            chromosome.append(move_code)
             current_state_for_chromosome_gen = next_s
             
         if chromosome: # Only add if at least one move was made
@@ -159,50 +197,25 @@ def generate_initial_population(pop_size: int, initial_max_len: int, start_state
     if not population and pop_size > 0:
         valid_next_steps = get_possible_moves_from_state(start_state)
         if valid_next_steps:
-            move_name, _, _ = random.choice(valid_next_steps)
-            population.append([move_name])
+            move_code, _, _ = random.choice(valid_next_steps)
+            population.append([move_code])
 
     return population
 
 
-def calculate_fitness(chromosome: Chromosome, start_state: State, goal_state: State) -> Tuple[int, int]:
+def calculate_fitness(chromosome: Chromosome, start_state: State, goal_state: State,
+                      cache: Optional[PrefixStateCache] = None) -> Tuple[int, int]:
     """
     Calculates the fitness of a chromosome.
     Returns: (manhattan_distance_to_goal, total_move_cost)
     Lower Manhattan distance is better. Lower cost is better.
+    With a PrefixStateCache, replay resumes from the longest cached prefix.
     """
-    current_state = start_state
-    total_cost = 0
-    path_is_valid = True
-
-    for move_str in chromosome:
-        temp_state = current_state
-        cost_this_move = 0
-
-        if "_Then_" in move_str: # Double move
-            parts = move_str.split("_Then_")
-            if len(parts) == 2:
-                move1, move2 = parts[0], parts[1]
-                s1 = apply_single_move(temp_state, move1)
-                if s1:
-                    current_state = apply_single_move(s1, move2)
-                    cost_this_move = 2
-                else: # First part of double move failed
-                    current_state = None
-            else: # Malformed double move string
-                current_state = None
-        else: # Single move
-            current_state = apply_single_move(temp_state, move_str)
-            cost_this_move = 1
-
-        if current_state is None: # Invalid move sequence
-            path_is_valid = False
-            break
-        total_cost += cost_this_move
-
-    if not path_is_valid or current_state is None: # Penalize invalid paths heavily
+    current_state = replay_moves(start_state, chromosome, cache)
+    if current_state is None: # Penalize invalid paths heavily
         return (float('inf'), float('inf'))
 
+    total_cost = sum(MOVE_COSTS[code] for code in chromosome)
     dist = manhattan_distance(current_state, goal_state)
     return (dist, total_cost)
 
@@ -232,7 +245,8 @@ def crossover(parent1: Chromosome, parent2: Chromosome, crossover_rate: float) -
     return parent1[:], parent2[:] # Return copies of parents if no crossover
 
 
-def mutate(chromosome: Chromosome, mutation_rate: float, max_path_deviation: int, start_state_for_validation: State) -> Chromosome:
+def mutate(chromosome: Chromosome, mutation_rate: float, max_path_deviation: int, start_state_for_validation: State,
+           cache: Optional[PrefixStateCache] = None) -> Chromosome:
     """
     Performs mutation on a chromosome.
     Types of mutation:
@@ -249,49 +263,23 @@ def mutate(chromosome: Chromosome, mutation_rate: float, max_path_deviation: int
             idx_to_mutate = random.randrange(len(mutated_chromosome))
             
             # To pick a new valid move, we need to know the state *before* this move
-            temp_state = start_state_for_validation
-            valid_path_so_far = True
-            for i in range(idx_to_mutate):
-                move_str = mutated_chromosome[i]
-                prev_temp_state = temp_state
-                if "_Then_" in move_str:
-                    parts = move_str.split("_Then_")
-                    s1 = apply_single_move(prev_temp_state, parts[0])
-                    if s1: temp_state = apply_single_move(s1, parts[1])
-                    else: valid_path_so_far = False; break
-                else:
-                    temp_state = apply_single_move(prev_temp_state, move_str)
-                if temp_state is None: valid_path_so_far = False; break
-            
-            if valid_path_so_far and temp_state is not None:
+            temp_state = replay_moves(start_state_for_validation, mutated_chromosome[:idx_to_mutate], cache)
+            if temp_state is not None:
                 possible_new_moves = get_possible_moves_from_state(temp_state)
                 if possible_new_moves:
-                    new_move_name, _, _ = random.choice(possible_new_moves)
-                    mutated_chromosome[idx_to_mutate] = new_move_name
+                    new_move_code, _, _ = random.choice(possible_new_moves)
+                    mutated_chromosome[idx_to_mutate] = new_move_code
 
     if random.random() < mutation_rate * 0.5 : # Add a move (lower probability)
         if len(mutated_chromosome) < original_len + max_path_deviation :
             # Find state at a random point to insert a new valid move
             insert_idx = random.randint(0, len(mutated_chromosome))
-            temp_state = start_state_for_validation
-            valid_path_so_far = True
-            for i in range(insert_idx):
-                move_str = mutated_chromosome[i]
-                prev_temp_state = temp_state
-                if "_Then_" in move_str:
-                    parts = move_str.split("_Then_")
-                    s1 = apply_single_move(prev_temp_state, parts[0])
-                    if s1: temp_state = apply_single_move(s1, parts[1])
-                    else: valid_path_so_far = False; break
-                else:
-                    temp_state = apply_single_move(prev_temp_state, move_str)
-                if temp_state is None: valid_path_so_far = False; break
-
-            if valid_path_so_far and temp_state is not None:
+            temp_state = replay_moves(start_state_for_validation, mutated_chromosome[:insert_idx], cache)
+            if temp_state is not None:
                 possible_new_moves = get_possible_moves_from_state(temp_state)
                 if possible_new_moves:
-                    new_move_name, _, _ = random.choice(possible_new_moves)
-                    mutated_chromosome.insert(insert_idx, new_move_name)
+                    new_move_code, _, _ = random.choice(possible_new_moves)
+                    mutated_chromosome.insert(insert_idx, new_move_code)
 
     if random.random() < mutation_rate * 0.5: # Delete a move (lower probability)
         if mutated_chromosome and len(mutated_chromosome) > max(1, original_len - max_path_deviation):
@@ -305,18 +293,10 @@ def reconstruct_path_from_moves(start_state: State, moves: Chromosome) -> Option
     """Reconstructs the state path given a sequence of moves."""
     path: List[State] = [start_state]
     current_state = start_state
-    for move_str in moves:
-        next_state = None
-        if "_Then_" in move_str:
-            parts = move_str.split("_Then_")
-            if len(parts) == 2:
-                s1 = apply_single_move(current_state, parts[0])
-                if s1: next_state = apply_single_move(s1, parts[1])
-        else:
-            next_state = apply_single_move(current_state, move_str)
-
+    for move_code in moves:
+        next_state = apply_move_code(current_state, move_code)
         if next_state is None:
-            # print(f"Warning: Invalid move '{move_str}' from state {current_state} during path reconstruction.")
+            # print(f"Warning: Invalid move '{MOVE_NAMES[move_code]}' from state {current_state} during path reconstruction.")
             return None # Invalid move sequence found
         current_state = next_state
         path.append(current_state)
@@ -324,14 +304,19 @@ def reconstruct_path_from_moves(start_state: State, moves: Chromosome) -> Option
 
 
 # --- Main GA Solver ---
-def solve(start_state: State, goal_state: State) -> Optional[List[State]]:
+def solve(start_state: State, goal_state: State, num_islands: int = 0) -> Optional[List[State]]:
     """
     Attempts to find a path from start_state to goal_state using a Genetic Algorithm.
     Allows both single (cost 1) and double (cost 2) moves.
+    With num_islands > 0, runs the multi-process island model (genetic_islands) instead.
     """
     start_state = tuple(start_state)
     goal_state = tuple(goal_state)
 
+    if num_islands > 0:
+        from .genetic_islands import solve as solve_islands
+        return solve_islands(start_state, goal_state, num_islands=num_islands, double_moves=True)
+
     if len(start_state) != len(goal_state) or int(len(start_state)**0.5)**2 != len(start_state):
         # print("Lỗi: Trạng thái bắt đầu hoặc kết thúc không hợp lệ.")
         return None
@@ -355,11 +340,15 @@ def solve(start_state: State, goal_state: State) -> Optional[List[State]]:
     best_overall_chromosome: Optional[Chromosome] = None
     best_overall_fitness: Tuple[int, int] = (float('inf'), float('inf'))
 
+    # Elitism và lai ghép giữ lại nhiều tiền tố chung giữa các thế hệ,
+    # nên việc chạy lại được tiếp tục từ tiền tố dài nhất đã lưu.
+    prefix_cache = PrefixStateCache(start_state)
+
     for generation in range(MAX_GENERATIONS):
         # Calculate fitness for each individual
         fitnesses: List[Tuple[int, int]] = []
         for chromo in population:
-            fitness_val = calculate_fitness(chromo, start_state, goal_state)
+            fitness_val = calculate_fitness(chromo, start_state, goal_state, prefix_cache)
             fitnesses.append(fitness_val)
 
         # Check for solution and find best in current generation
@@ -403,8 +392,8 @@ def solve(start_state: State, goal_state: State) -> Optional[List[State]]:
             
             child1, child2 = crossover(parent1, parent2, CROSSOVER_RATE)
             
-            child1_mutated = mutate(child1, MUTATION_RATE, MAX_PATH_DEVIATION_MUTATION, start_state)
-            child2_mutated = mutate(child2, MUTATION_RATE, MAX_PATH_DEVIATION_MUTATION, start_state)
+            child1_mutated = mutate(child1, MUTATION_RATE, MAX_PATH_DEVIATION_MUTATION, start_state, prefix_cache)
+            child2_mutated = mutate(child2, MUTATION_RATE, MAX_PATH_DEVIATION_MUTATION, start_state, prefix_cache)
             
             if child1_mutated: new_population.append(child1_mutated)
             if len(new_population) < POPULATION_SIZE and child2_mutated:
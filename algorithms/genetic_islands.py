@@ -0,0 +1,159 @@
+# algorithms/genetic_islands.py
+import multiprocessing as mp
+import os
+import queue
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .ga_population import PopulationEngine
+from .puzzle_tables import successor_table_with_double_moves, transition_table
+
+State = Tuple[int, ...]
+
+# Chi phí của mã nước đi khi bật di chuyển kép: 4 nước đơn rồi 12 nước kép.
+DOUBLE_MOVE_COSTS = np.array([1] * 4 + [2] * 12, dtype=np.int32)
+
+# Chu kỳ (giây) tiến trình cha kiểm tra các đảo còn sống khi chờ kết quả.
+RESULT_POLL_SECONDS = 0.5
+# Số đảo tối đa khi num_islands không được chỉ định (không mở một tiến trình mỗi lõi).
+MAX_DEFAULT_ISLANDS = 4
+
+
+def _move_tables(double_moves: bool) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    if double_moves:
+        return successor_table_with_double_moves(), DOUBLE_MOVE_COSTS
+    return transition_table(), None
+
+
+def _island_worker(island_id: int, start_state: State, goal_state: State, params: dict,
+                   inbox, outbox, stop_event, results) -> None:
+    """
+    Chạy một đảo (quần thể riêng) trong tiến trình con.
+
+    Cứ migration_interval thế hệ, đảo gửi num_migrants cá thể tốt nhất sang đảo
+    kế tiếp (vòng tròn) dưới dạng mảng mã nước đi uint8 + độ dài, và nhận cá thể
+    nhập cư từ đảo trước. Đảo nào chạm đích trước thì báo kết quả và bật
+    stop_event để mọi đảo khác dừng.
+    """
+    # Cá thể di cư chưa kịp đọc khi đảo nhận đã dừng có thể bỏ đi, không chặn lúc thoát.
+    outbox.cancel_join_thread()
+    successors, move_costs = _move_tables(params["double_moves"])
+    seed = params["seed"]
+    engine = PopulationEngine(start_state, goal_state, params["population_size"], params["max_length"],
+                              successors=successors, move_costs=move_costs,
+                              seed=None if seed is None else seed + island_id)
+    engine.initialize(min(params["max_initial_path_len"], params["max_length"]))
+
+    # Luôn báo về đúng một bản ghi, kể cả khi đảo gặp lỗi: tiến trình cha đếm
+    # bản ghi để biết khi nào mọi đảo đã xong.
+    found = None
+    try:
+        for generation in range(params["num_generations"]):
+            if stop_event.is_set():
+                break
+            engine.evaluate()
+            if engine.reached.any():
+                best = engine.best_index()
+                stop_event.set()
+                found = (generation, int(engine.costs[best]), engine.decode_path(best))
+                break
+            migrate = generation > 0 and generation % params["migration_interval"] == 0
+            if migrate:
+                outbox.put(engine.emigrants(params["num_migrants"]))
+            engine.next_generation(params["elite_size"], params["tournament_size"], params["crossover_rate"],
+                                   params["mutation_rate"], params["max_length_change"])
+            if migrate:
+                while True:
+                    try:
+                        genes, lengths = inbox.get_nowait()
+                    except queue.Empty:
+                        break
+                    engine.immigrate(genes, lengths)
+    finally:
+        results.put((island_id,) + (found or (None, None, None)))
+
+
+def solve(start_state: State, goal_state: State,
+          num_islands: Optional[int] = None,
+          population_size: int = 2000,
+          num_generations: int = 300,
+          max_length: int = 40,
+          max_initial_path_len: int = 25,
+          migration_interval: int = 10,
+          num_migrants: int = 20,
+          tournament_size: int = 3,
+          crossover_rate: float = 0.8,
+          mutation_rate: float = 0.15,
+          max_length_change: int = 3,
+          elite_size: int = 10,
+          double_moves: bool = False,
+          seed: Optional[int] = None) -> Optional[List[State]]:
+    """
+    Giải 8-Puzzle bằng GA mô hình đảo: num_islands quần thể (mặc định bằng số
+    lõi CPU, tối đa MAX_DEFAULT_ISLANDS) chạy song song trong các tiến trình riêng và trao đổi cá thể tốt
+    nhất theo vòng tròn. Dừng toàn cục ngay khi một đảo bất kỳ chạm đích.
+
+    Returns:
+        list: Đường đi (list các State) hoặc None nếu không đảo nào đạt đích.
+    """
+    start_state = tuple(start_state)
+    goal_state = tuple(goal_state)
+    if start_state == goal_state:
+        return [start_state]
+
+    num_islands = num_islands or min(os.cpu_count() or 1, MAX_DEFAULT_ISLANDS)
+    params = dict(population_size=population_size, num_generations=num_generations,
+                  max_length=max_length, max_initial_path_len=max_initial_path_len,
+                  migration_interval=migration_interval, num_migrants=num_migrants,
+                  tournament_size=tournament_size, crossover_rate=crossover_rate,
+                  mutation_rate=mutation_rate, max_length_change=max_length_change,
+                  elite_size=elite_size, double_moves=double_moves, seed=seed)
+
+    # "spawn": solve có thể được gọi từ luồng nền của giao diện pygame, và fork
+    # một tiến trình nhiều luồng có thể làm tiến trình con treo. Mỗi đảo tự dựng
+    # bảng nước đi / heuristic của mình.
+    ctx = mp.get_context("spawn")
+    stop_event = ctx.Event()
+    results = ctx.Queue()
+    channels = [ctx.Queue() for _ in range(num_islands)]
+    workers = [
+        ctx.Process(target=_island_worker,
+                    args=(i, start_state, goal_state, params,
+                          channels[i], channels[(i + 1) % num_islands], stop_event, results),
+                    daemon=True)
+        for i in range(num_islands)
+    ]
+    for worker in workers:
+        worker.start()
+
+    best_path = None
+    try:
+        remaining = num_islands
+        while remaining:
+            try:
+                island_id, generation, cost, path = results.get(timeout=RESULT_POLL_SECONDS)
+            except queue.Empty:
+                if any(worker.is_alive() for worker in workers):
+                    continue
+                # Mọi đảo đã thoát (có thể bị giết trước khi kịp báo): đọc nốt
+                # bản ghi còn trong hàng đợi rồi thôi, không chờ mãi.
+                try:
+                    island_id, generation, cost, path = results.get(timeout=RESULT_POLL_SECONDS)
+                except queue.Empty:
+                    break
+            remaining -= 1
+            if path is not None:
+                print(f"Island {island_id}, gen {generation}: Found goal! Path cost: {cost}")
+                best_path = path
+                break
+    finally:
+        stop_event.set()
+        for worker in workers:
+            worker.join(timeout=5)
+            if worker.is_alive():
+                worker.terminate()
+
+    if best_path is None:
+        print("Genetic Algorithm (islands) finished. No solution found.")
+    return best_path
@@ -0,0 +1,332 @@
+# algorithms/grid_csp.py
+from array import array
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .anim_trace import DeltaTrace
+
+ASSIGN, PRUNE, BACKTRACK = 0, 1, 2
+EVENT_NAMES = ("assign", "prune", "backtrack")
+
+
+class Trace:
+    """
+    Nhật ký sự kiện của bộ giải, lưu gọn trong ba mảng song song:
+    loại sự kiện (B), ô (H) và dữ liệu (Q) - giá trị khi gán / quay lui,
+    bitmask các giá trị bị loại khi prune. Lưới có hơn 64 giá trị (từ 9x9)
+    cho bitmask không vừa Q; khi đó payloads chuyển sang list số nguyên.
+    """
+
+    def __init__(self):
+        self.kinds = array('B')
+        self.cells = array('H')
+        self.payloads = array('Q')
+
+    def append(self, kind: int, cell: int, payload: int) -> None:
+        self.kinds.append(kind)
+        self.cells.append(cell)
+        try:
+            self.payloads.append(payload)
+        except OverflowError:
+            self.payloads = list(self.payloads)
+            self.payloads.append(payload)
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def __iter__(self) -> Iterator[Tuple[int, int, int]]:
+        return zip(self.kinds, self.cells, self.payloads)
+
+    def counts(self) -> Dict[str, int]:
+        return {name: self.kinds.count(kind) for kind, name in enumerate(EVENT_NAMES)}
+
+    def grids(self, num_cells: int, empty: int = 0, initial: Optional[Sequence[int]] = None,
+              into: Optional[DeltaTrace] = None) -> DeltaTrace:
+        """
+        Các khung lưới sau mỗi lần gán / quay lui (prune không đổi lưới), bắt
+        đầu từ lưới rỗng, ghi dạng delta vào `into` (hoặc một DeltaTrace mới).
+        """
+        frames = into if into is not None else DeltaTrace()
+        frames.append(list(initial) if initial is not None else [empty] * num_cells)
+        for kind, cell, payload in self:
+            if kind == ASSIGN:
+                frames.append_changes(((cell, payload),))
+            elif kind == BACKTRACK:
+                frames.append_changes(((cell, empty),))
+        return frames
+
+
+def _bits(mask: int) -> Iterator[int]:
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class _Stopped(Exception):
+    pass
+
+
+class GridCSP:
+    """
+    CSP điền lưới n x n: mỗi ô nhận một giá trị trong `values` (mặc định
+    1..n*n, mọi ô khác nhau), cộng thêm các ràng buộc hai ngôi giữa các ô.
+
+    Miền giá trị là bitmask (bit i <=> values[i]). Mỗi ràng buộc hai ngôi
+    được biên dịch thành bảng hỗ trợ: support[a] là bitmask các giá trị của ô
+    kia tương thích với giá trị thứ a, nên bước revise của AC-3 chỉ là vài
+    phép AND. Ràng buộc all-different được lan truyền riêng (xóa giá trị của
+    ô đã chốt khỏi các ô khác, và chốt giá trị chỉ còn một chỗ đặt được).
+    """
+
+    def __init__(self, size: int = 3, values: Optional[Sequence[int]] = None, all_different: bool = True):
+        self.size = size
+        self.num_cells = size * size
+        self.values = list(values) if values is not None else list(range(1, self.num_cells + 1))
+        if all_different and len(self.values) < self.num_cells:
+            raise ValueError("Not enough values for an all-different grid")
+        self.all_different = all_different
+        self.full_mask = (1 << len(self.values)) - 1
+        self.domains = [self.full_mask] * self.num_cells
+        self.arcs: List[List[Tuple[int, List[int]]]] = [[] for _ in range(self.num_cells)]
+        self.constraints: List[Tuple[str, int, int]] = []
+
+    # --- Ràng buộc ---
+    def add_given(self, cell: int, value: int) -> None:
+        self.domains[cell] &= 1 << self.values.index(value)
+        self.constraints.append(("given", cell, value))
+
+    def add_relation(self, a: int, b: int, predicate: Callable[[int, int], bool], name: str = "relation") -> None:
+        """Ràng buộc predicate(giá trị ô a, giá trị ô b)."""
+        count = len(self.values)
+        a_support = [0] * count
+        b_support = [0] * count
+        for i, x in enumerate(self.values):
+            for j, y in enumerate(self.values):
+                if predicate(x, y):
+                    a_support[i] |= 1 << j
+                    b_support[j] |= 1 << i
+        # arcs[x] chứa (y, support): giá trị của y được giữ khi có hỗ trợ trong miền của x.
+        self.arcs[a].append((b, b_support))
+        self.arcs[b].append((a, a_support))
+        self.constraints.append((name, a, b))
+
+    def add_less(self, a: int, b: int) -> None:
+        self.add_relation(a, b, lambda x, y: x < y, "<")
+
+    def add_difference(self, a: int, b: int, difference: int) -> None:
+        """|giá trị a - giá trị b| == difference (kiểu ràng buộc Kropki)."""
+        self.add_relation(a, b, lambda x, y: abs(x - y) == difference, f"|d|={difference}")
+
+    def neighbors(self, cell: int) -> List[int]:
+        row, col = divmod(cell, self.size)
+        result = []
+        for dr, dc in ((-1, 0), (1, 0), (0, -1), (0, 1)):
+            r, c = row + dr, col + dc
+            if 0 <= r < self.size and 0 <= c < self.size:
+                result.append(r * self.size + c)
+        return result
+
+    # --- Lan truyền ---
+    def _prune(self, domains: List[int], cell: int, keep: int, trace: Optional[Trace], stats: dict) -> bool:
+        removed = domains[cell] & ~keep
+        if not removed:
+            return False
+        domains[cell] &= keep
+        stats["prunes"] += 1
+        if trace is not None:
+            trace.append(PRUNE, cell, removed)
+        return True
+
+    def propagate(self, domains: List[int], changed: Sequence[int], trace: Optional[Trace] = None,
+                  stats: Optional[dict] = None) -> bool:
+        """
+        AC-3 với hàng đợi theo ô: mỗi khi miền của một ô thay đổi, xét lại
+        các cung trỏ tới nó. Trả về False nếu có miền rỗng.
+        """
+        stats = stats if stats is not None else {"prunes": 0}
+        queue = list(dict.fromkeys(changed))
+        queued = set(queue)
+        while queue:
+            x = queue.pop()
+            queued.discard(x)
+            domain_x = domains[x]
+            if domain_x == 0:
+                return False
+            touched = []
+            if self.all_different and domain_x & (domain_x - 1) == 0:
+                for y in range(self.num_cells):
+                    if y != x and domains[y] & domain_x:
+                        self._prune(domains, y, ~domain_x, trace, stats)
+                        touched.append(y)
+            for y, support in self.arcs[x]:
+                keep = 0
+                for i in _bits(domains[y]):
+                    if support[i] & domain_x:
+                        keep |= 1 << i
+                if self._prune(domains, y, keep, trace, stats):
+                    touched.append(y)
+            for y in touched:
+                if domains[y] == 0:
+                    return False
+                if y not in queued:
+                    queued.add(y)
+                    queue.append(y)
+        if self.all_different and len(self.values) == self.num_cells:
+            return self._hidden_singles(domains, trace, stats)
+        return True
+
+    def _hidden_singles(self, domains, trace, stats) -> bool:
+        # Với lưới hoán vị, giá trị chỉ còn một ô đặt được thì ô đó phải nhận nó.
+        changed = []
+        for i in range(len(self.values)):
+            bit = 1 << i
+            holders = [cell for cell in range(self.num_cells) if domains[cell] & bit]
+            if not holders:
+                return False
+            if len(holders) == 1 and domains[holders[0]] != bit:
+                self._prune(domains, holders[0], bit, trace, stats)
+                changed.append(holders[0])
+        return self.propagate(domains, changed, trace, stats) if changed else True
+
+    # --- Tìm kiếm ---
+    def _select_cell(self, domains: List[int], assigned: List[bool], mrv: bool) -> int:
+        best, best_key = -1, None
+        for cell in range(self.num_cells):
+            if assigned[cell]:
+                continue
+            if not mrv:
+                return cell
+            degree = sum(1 for other, _ in self.arcs[cell] if not assigned[other])
+            key = (bin(domains[cell]).count("1"), -degree)
+            if best_key is None or key < best_key:
+                best, best_key = cell, key
+        return best
+
+    def solve(self, max_solutions: int = 1, propagation: str = "ac3", mrv: bool = True,
+              trace: Optional[Trace] = None, stats: Optional[dict] = None,
+              should_stop: Optional[Callable[[], bool]] = None) -> List[List[int]]:
+        """
+        Quay lui tìm tối đa max_solutions lời giải.
+
+        propagation: "ac3" (duy trì cung nhất quán sau mỗi lần gán), "forward"
+        (forward checking: chỉ lọc miền các ô liên quan tới ô vừa gán) hoặc
+        "none" (chỉ kiểm tra ràng buộc khi gán). mrv=True chọn ô có miền nhỏ
+        nhất, hòa thì chọn ô ràng buộc với nhiều ô chưa gán nhất.
+
+        Returns:
+            list: Các lời giải (mỗi lời giải là list giá trị theo ô).
+        """
+        stats = stats if stats is not None else {}
+        stats.update(assignments=0, backtracks=0, prunes=0, stopped=False)
+        solutions: List[List[int]] = []
+        domains = self.domains[:]
+        if propagation == "ac3" and not self.propagate(domains, range(self.num_cells), trace, stats):
+            return solutions
+        assigned = [False] * self.num_cells
+
+        def consistent(domains, cell, bit):
+            if self.all_different:
+                for other in range(self.num_cells):
+                    if other != cell and assigned[other] and domains[other] == bit:
+                        return False
+            for other, support in self.arcs[cell]:
+                if assigned[other] and not (support[domains[other].bit_length() - 1] & bit):
+                    return False
+            return True
+
+        def forward(domains, cell):
+            changed = [cell]
+            bit = domains[cell]
+            if self.all_different:
+                for other in range(self.num_cells):
+                    if other != cell and not assigned[other] and domains[other] & bit:
+                        self._prune(domains, other, ~bit, trace, stats)
+                        changed.append(other)
+            for other, support in self.arcs[cell]:
+                if assigned[other]:
+                    continue
+                keep = 0
+                for i in _bits(domains[other]):
+                    if support[i] & bit:
+                        keep |= 1 << i
+                if self._prune(domains, other, keep, trace, stats):
+                    changed.append(other)
+            return all(domains[other] for other in changed)
+
+        def search(domains, depth):
+            if should_stop is not None and should_stop():
+                raise _Stopped
+            if depth == self.num_cells:
+                solutions.append([self.values[domains[cell].bit_length() - 1] for cell in range(self.num_cells)])
+                return len(solutions) >= max_solutions
+            cell = self._select_cell(domains, assigned, mrv)
+            assigned[cell] = True
+            for i in _bits(domains[cell]):
+                bit = 1 << i
+                value = self.values[i]
+                if propagation == "none" and not consistent(domains, cell, bit):
+                    continue
+                stats["assignments"] += 1
+                if trace is not None:
+                    trace.append(ASSIGN, cell, value)
+                child = domains[:]
+                child[cell] = bit
+                if propagation == "ac3":
+                    ok = self.propagate(child, [cell], trace, stats)
+                elif propagation == "forward":
+                    ok = forward(child, cell)
+                else:
+                    ok = True
+                if ok and search(child, depth + 1):
+                    return True
+                stats["backtracks"] += 1
+                if trace is not None:
+                    trace.append(BACKTRACK, cell, value)
+            assigned[cell] = False
+            return False
+
+        try:
+            search(domains, 0)
+        except _Stopped:
+            stats["stopped"] = True
+        stats["solutions"] = len(solutions)
+        return solutions
+
+
+def puzzle_from_target(target: Sequence[int], size: int = 3, values: Optional[Sequence[int]] = None,
+                       max_givens: Optional[int] = None,
+                       should_stop: Optional[Callable[[], bool]] = None) -> Tuple[GridCSP, int]:
+    """
+    Dựng câu đố kiểu Futoshiki có lời giải duy nhất là `target`: ràng buộc
+    lớn/nhỏ giữa mọi cặp ô kề nhau (lấy từ target), rồi thêm dần ô cho sẵn
+    (ở ô đầu tiên mà một lời giải khác lệch khỏi target) cho tới khi lời giải
+    là duy nhất. Cách thêm tham lam này không cho số ô cho sẵn ít nhất.
+
+    should_stop được chuyển cho mỗi lần giải bên trong; khi nó trả về True,
+    hàm dừng ngay và trả về câu đố đang dựng dở (có thể chưa duy nhất).
+
+    Returns:
+        (GridCSP, số ô cho sẵn)
+    """
+    csp = GridCSP(size, values)
+    for cell in range(csp.num_cells):
+        for other in csp.neighbors(cell):
+            if other > cell:
+                if target[cell] < target[other]:
+                    csp.add_less(cell, other)
+                else:
+                    csp.add_less(other, cell)
+    givens = 0
+    limit = csp.num_cells if max_givens is None else max_givens
+    while givens < limit:
+        stats: dict = {}
+        solutions = csp.solve(max_solutions=2, stats=stats, should_stop=should_stop)
+        if stats["stopped"]:
+            break
+        others = [solution for solution in solutions if list(solution) != list(target)]
+        if not others:
+            break
+        cell = next(i for i, value in enumerate(others[0]) if value != target[i])
+        csp.add_given(cell, target[cell])
+        givens += 1
+    return csp, givens
@@ -1,6 +1,8 @@
 import random
 from typing import List, Tuple, Optional, Set, Dict
 
+from .restart_pool import run_restarts
+
 State = Tuple[int, ...]
 
 def manhattan_distance(state: State, goal_state: State) -> int:
@@ -78,7 +80,65 @@ def is_solvable(state, goal_state=(1, 2, 3, 4, 5, 6, 7, 8, 9)):
     except:
         return False # Lỗi trạng thái
 
-def solve(start_state: State, goal_state: State, max_iterations=1000, max_restarts=50) -> Optional[List[State]]:
+def climb(start_state: State, goal_state: State, score, rng: random.Random, max_iterations=1000) -> List[State]:
+    """Một lần leo đồi (có di chuyển kép) từ start_state, trả về đường đi (có thể chưa tới đích)."""
+    current_state = start_state
+    current_score = score(current_state)
+    path = [current_state]
+    local_visited = {current_state} # Tránh vòng lặp trong một lần chạy hill climbing
+
+    iterations = 0
+    stuck_counter = 0 # Đếm số lần bị kẹt (không tìm được nước đi tốt hơn)
+
+    while current_state != goal_state and iterations < max_iterations:
+        iterations += 1
+        # Lấy neighbors bao gồm cả double moves
+        neighbors = get_neighbors_with_double_moves(current_state)
+        best_neighbor = None
+        best_neighbor_score = current_score # Khởi tạo bằng điểm hiện tại
+
+        # Tìm hàng xóm tốt nhất (heuristic thấp nhất) chưa thăm trong lần chạy này
+        candidates = []
+        for neighbor in neighbors:
+             if neighbor not in local_visited:
+                  neighbor_score = score(neighbor)
+                  if neighbor_score < best_neighbor_score:
+                       candidates.append((neighbor, neighbor_score)) # Thu thập các ứng viên tốt hơn
+
+        if candidates:
+             # Chọn hàng xóm tốt nhất trong số các ứng viên tốt hơn
+             candidates.sort(key=lambda x: x[1])
+             best_neighbor, best_neighbor_score = candidates[0]
+             stuck_counter = 0 # Đặt lại bộ đếm kẹt
+        else:
+             # Bị kẹt (không có hàng xóm tốt hơn)
+             stuck_counter += 1
+             if stuck_counter >= 5: # Nếu bị kẹt quá lâu, dừng lần chạy này
+                  break
+             unvisited_neighbors = [n for n in neighbors if n not in local_visited]
+             if unvisited_neighbors:
+                 # Chọn ngẫu nhiên một nước đi chưa thăm để thử thoát khỏi local optimum
+                 best_neighbor = rng.choice(unvisited_neighbors)
+                 best_neighbor_score = score(best_neighbor)
+             else:
+                 break # Không còn nước nào để đi
+
+        # Di chuyển đến trạng thái tiếp theo
+        current_state = best_neighbor
+        current_score = best_neighbor_score
+        path.append(current_state)
+        local_visited.add(current_state)
+
+    return path
+
+def solve(start_state: State, goal_state: State, max_iterations=1000, max_restarts=50,
+          workers: Optional[int] = 1) -> Optional[List[State]]:
+    """
+    Hill Climbing với di chuyển kép và khởi động lại ngẫu nhiên. Các lần khởi
+    động lại độc lập chạy qua restart_pool.run_restarts, tuần tự theo mặc định
+    và song song khi workers > 1 (None = mọi lõi CPU).
+    Chỉ trả về đường đi khi tới đích.
+    """
     start_state = tuple(start_state)
     goal_state = tuple(goal_state)
 
@@ -86,100 +146,9 @@ def solve(start_state: State, goal_state: State, max_iterations=1000, max_restar
         print("Hill Climbing (Double): Trạng thái không giải được.")
         return None
 
-    best_state_overall = start_state
-    best_score_overall = manhattan_distance(start_state, goal_state)
-    overall_path = [] # Lưu đường đi tốt nhất tìm thấy
-
-    for restart in range(max_restarts):
-        # Chọn điểm bắt đầu cho lần khởi động lại
-        if restart == 0:
-            current_state = start_state
-        else:
-            # Khởi động lại ngẫu nhiên hoặc từ trạng thái tốt nhất trước đó
-            if random.random() < 0.7 and best_score_overall < manhattan_distance(start_state, goal_state):
-                 current_state = best_state_overall # Khởi động lại từ điểm tốt nhất đã biết
-            else:
-                 # Có thể thêm khởi động lại ngẫu nhiên hoàn toàn nếu muốn, nhưng thường bắt đầu lại từ đầu
-                 current_state = start_state
-
-        current_score = manhattan_distance(current_state, goal_state)
-        path = [current_state]
-        local_visited = {current_state} # Tránh vòng lặp trong một lần chạy hill climbing
-
-        iterations = 0
-        stuck_counter = 0 # Đếm số lần bị kẹt (không tìm được nước đi tốt hơn)
-
-        while current_state != goal_state and iterations < max_iterations:
-            iterations += 1
-            # Lấy neighbors bao gồm cả double moves
-            neighbors = get_neighbors_with_double_moves(current_state)
-            best_neighbor = None
-            best_neighbor_score = current_score # Khởi tạo bằng điểm hiện tại
-
-            # Tìm hàng xóm tốt nhất (heuristic thấp nhất) chưa thăm trong lần chạy này
-            candidates = []
-            for neighbor in neighbors:
-                 if neighbor not in local_visited:
-                      score = manhattan_distance(neighbor, goal_state)
-                      if score < best_neighbor_score:
-                           candidates.append((neighbor, score)) # Thu thập các ứng viên tốt hơn
-
-            if candidates:
-                 # Chọn hàng xóm tốt nhất trong số các ứng viên tốt hơn
-                 candidates.sort(key=lambda x: x[1])
-                 best_neighbor, best_neighbor_score = candidates[0]
-                 stuck_counter = 0 # Đặt lại bộ đếm kẹt
-            else:
-                 # Bị kẹt (không có hàng xóm tốt hơn)
-                 stuck_counter += 1
-                 if stuck_counter >= 5: # Nếu bị kẹt quá lâu, dừng lần chạy này
-                      break
-                 # Có thể thực hiện bước đi ngang (sideways move) hoặc ngẫu nhiên nếu muốn
-                 # Ở đây chỉ đơn giản là dừng nếu không tìm thấy bước tốt hơn
-                 unvisited_neighbors = [n for n in neighbors if n not in local_visited]
-                 if unvisited_neighbors:
-                     # Chọn ngẫu nhiên một nước đi chưa thăm để thử thoát khỏi local optimum
-                     best_neighbor = random.choice(unvisited_neighbors)
-                     best_neighbor_score = manhattan_distance(best_neighbor, goal_state)
-                 else:
-                     break # Không còn nước nào để đi
-
-            # Di chuyển đến trạng thái tiếp theo
-            if best_neighbor is None: # Thoát nếu không tìm được nước đi nào
-                 break
-            current_state = best_neighbor
-            current_score = best_neighbor_score
-            path.append(current_state)
-            local_visited.add(current_state)
-
-            # Cập nhật trạng thái tốt nhất toàn cục nếu cần
-            if current_score < best_score_overall:
-                best_state_overall = current_state
-                best_score_overall = current_score
-                # print(f"Restart {restart+1}, Iter {iterations}: New best score {best_score_overall}")
-
-            # Kiểm tra mục tiêu
-            if current_state == goal_state:
-                # print(f"Hill Climbing (Double): Found goal in restart {restart+1} after {iterations} iterations.")
-                return path # Trả về đường đi ngay khi tìm thấy đích
-
-        # Kết thúc một lần chạy, cập nhật đường đi tốt nhất nếu cần
-        if current_state != goal_state and path: # Chỉ cập nhật nếu có đường đi và không phải là đích
-             if not overall_path or current_score < manhattan_distance(overall_path[-1], goal_state):
-                  overall_path = path
-
-    # Sau tất cả các lần khởi động lại
-    if best_score_overall == 0 and overall_path and overall_path[-1] == goal_state:
-        # Trường hợp tìm thấy đích ở lần chạy cuối cùng
-        return overall_path
-    elif best_score_overall == 0 and not overall_path:
-         # Trường hợp start_state == goal_state
-         return [start_state]
-    elif overall_path:
-        # Trả về đường đi tốt nhất tìm được, dù không phải đích
-        # print(f"Hill Climbing (Double): Did not reach goal. Returning best path found with score {best_score_overall}.")
-        # return overall_path # Quyết định xem có trả về đường đi không tối ưu không
-        return None # Hoặc trả về None nếu chỉ chấp nhận giải pháp hoàn chỉnh
-    else:
-        # print("Hill Climbing (Double): No solution found after restarts.")
-        return None
+    path = run_restarts(climb, start_state, goal_state, manhattan_distance, max_restarts,
+                        workers, max_iterations=max_iterations)
+    if path and path[-1] == goal_state:
+        return path
+    # print("Hill Climbing (Double): No solution found after restarts.")
+    return None
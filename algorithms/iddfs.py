@@ -1,3 +1,7 @@
+from array import array
+
+from .puzzle_index import rank, unrank
+
 def get_neighbors(state):
     neighbors = []
     s = list(state)
@@ -22,27 +26,112 @@ def reconstruct_path(state, parent):
     path.reverse()
     return path
 
-def depth_limited_dfs(start_state, goal_state, max_depth, visited, parent, depth):
-    stack = [(start_state, 0)]
+def depth_limited_dfs(start_state, goal_state, max_depth):
+    """
+    DLS lặp, kiểm tra chu trình theo đường đi hiện tại (không dùng visited chung),
+    nên không bỏ sót đường ngắn hơn tới một trạng thái đã gặp ở nhánh khác.
+    Trả về đường đi (list trạng thái) hoặc None.
+    """
+    path = [start_state]
+    on_path = {start_state}
+    stack = [iter(get_neighbors(start_state))]
+    if start_state == goal_state:
+        return path
     while stack:
-        current, curr_depth = stack.pop()
-        if curr_depth > max_depth:
+        next_state = next(stack[-1], None)
+        if next_state is None:
+            stack.pop()
+            on_path.discard(path.pop())
             continue
-        if current == goal_state:
-            return reconstruct_path(current, parent)
-        if current not in visited:
-            visited.add(current)
-            for next_state in get_neighbors(current):
-                if next_state not in visited:
-                    parent[next_state] = current
-                    stack.append((next_state, curr_depth + 1))
+        if next_state in on_path:
+            continue
+        if next_state == goal_state:
+            return path + [next_state]
+        if len(path) < max_depth:
+            path.append(next_state)
+            on_path.add(next_state)
+            stack.append(iter(get_neighbors(next_state)))
     return None
 
-def solve(start_state, goal_state, max_depth=20):
-    for depth in range(max_depth + 1):
-        visited = set()
-        parent = {start_state: None}
-        result = depth_limited_dfs(start_state, goal_state, depth, visited, parent, 0)
-        if result is not None:
-            return result
-    return None
\ No newline at end of file
+def _frontier_path(levels, depth, index):
+    """Dựng lại đường đi từ gốc tới phần tử `index` của tầng `depth`."""
+    path = []
+    while depth >= 0:
+        ranks, parents = levels[depth]
+        path.append(unrank(ranks[index]))
+        index = parents[index]
+        depth -= 1
+    path.reverse()
+    return path
+
+def solve(start_state, goal_state, max_depth=20, max_frontier_nodes=500000):
+    """
+    IDDFS giữ lại biên (frontier) giữa các lần lặp.
+
+    Lần lặp k lưu biên ở độ sâu k dưới dạng rank (array 'I') kèm chỉ số cha
+    trong tầng trước, và lần lặp k+1 chỉ cần mở rộng biên đó thêm một mức
+    thay vì duyệt lại từ đầu. Vì đồ thị 8-puzzle là đồ thị hai phía, con của
+    tầng k chỉ có thể nằm ở tầng k-1 hoặc k+1, nên chỉ cần loại trùng với tầng
+    k-1 và trong chính tầng mới.
+
+    Khi tổng số nút lưu vượt quá max_frontier_nodes, thuật toán quay về DLS
+    kiểm tra chu trình theo đường đi, xuất phát từ từng nút của biên cuối
+    cùng đã lưu (mọi đường đi ngắn nhất dài hơn đều đi qua biên này), nên
+    đường đi tìm được vẫn ngắn nhất.
+
+    Args:
+        start_state (tuple): Trạng thái bắt đầu.
+        goal_state (tuple): Trạng thái đích.
+        max_depth (int): Độ sâu tối đa.
+        max_frontier_nodes (int): Số nút tối đa được lưu trong các tầng biên.
+            Đặt bằng 0 để luôn dùng DLS thuần (bộ nhớ O(độ sâu)).
+
+    Returns:
+        list: Đường đi ngắn nhất (list các tuple trạng thái) hoặc None.
+    """
+    start_state = tuple(start_state)
+    goal_state = tuple(goal_state)
+    if start_state == goal_state:
+        return [start_state]
+
+    goal_rank = rank(goal_state)
+    levels = [(array('I', [rank(start_state)]), array('I', [0]))]
+    stored_nodes = 1
+    depth = 0
+
+    while depth < max_depth:
+        ranks, _ = levels[depth]
+        previous = set(levels[depth - 1][0]) if depth > 0 else set()
+        next_ranks = array('I')
+        next_parents = array('I')
+        seen = set()
+        overflow = False
+        for index, r in enumerate(ranks):
+            for next_state in get_neighbors(unrank(r)):
+                next_rank = rank(next_state)
+                if next_rank in previous or next_rank in seen:
+                    continue
+                if next_rank == goal_rank:
+                    return _frontier_path(levels, depth, index) + [next_state]
+                seen.add(next_rank)
+                next_ranks.append(next_rank)
+                next_parents.append(index)
+            if stored_nodes + len(next_ranks) > max_frontier_nodes:
+                overflow = True
+                break
+        if overflow:
+            break
+        if not next_ranks:
+            return None
+        levels.append((next_ranks, next_parents))
+        stored_nodes += len(next_ranks)
+        depth += 1
+
+    # Hết bộ nhớ cho biên: iterative deepening từ biên cuối cùng đã lưu.
+    frontier_ranks = levels[depth][0]
+    for limit in range(1, max_depth - depth + 1):
+        for index, r in enumerate(frontier_ranks):
+            suffix = depth_limited_dfs(unrank(r), goal_state, limit)
+            if suffix is not None:
+                return _frontier_path(levels, depth, index) + suffix[1:]
+    return None
@@ -0,0 +1,103 @@
+# algorithms/multi_goal.py
+from functools import lru_cache
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+
+from .puzzle_index import BLANK, NUM_STATES, rank
+from .puzzle_tables import rank_array, state_table, transition_table
+
+State = Tuple[int, ...]
+
+
+@lru_cache(maxsize=8)
+def _goal_distances(goal_ranks: Tuple[int, ...]) -> np.ndarray:
+    successors = transition_table()
+    distances = np.full(NUM_STATES, -1, dtype=np.int16)
+    frontier = np.array(goal_ranks, dtype=np.int32)
+    distances[frontier] = 0
+    depth = 0
+    while frontier.size:
+        depth += 1
+        neighbors = successors[frontier].ravel()
+        neighbors = np.unique(neighbors[neighbors >= 0])
+        frontier = neighbors[distances[neighbors] < 0]
+        distances[frontier] = depth
+    distances.setflags(write=False)
+    return distances
+
+
+@lru_cache(maxsize=8)
+def _goal_manhattan(goal_ranks: Tuple[int, ...]) -> np.ndarray:
+    states = state_table()
+    goals = [tuple(int(tile) for tile in states[r]) for r in goal_ranks]
+    table = GoalSetHeuristic(goals).batch(states)
+    table.setflags(write=False)
+    return table
+
+
+def goal_distances(goal_states: Iterable[State]) -> np.ndarray:
+    """
+    Khoảng cách chính xác (số nước đi) từ mọi rank tới đích gần nhất trong tập
+    đích: BFS đa nguồn trên bảng chuyển, xuất phát đồng thời từ mọi đích.
+    Mảng int16 (362880,), -1 với trạng thái không tới được đích nào.
+    """
+    return _goal_distances(tuple(sorted({rank(tuple(goal)) for goal in goal_states})))
+
+
+class GoalSetHeuristic:
+    """
+    Heuristic tới một tập đích: h(state) = min trên các đích.
+
+    Với mỗi đích, bảng chi phí (10, 9) cho biết khoảng cách Manhattan của ô
+    `tile` đặt tại vị trí `cell` tới vị trí của nó trong đích đó, nên không
+    cần goal_state.index cho từng ô. Với exact=True, h là khoảng cách chính
+    xác tới đích gần nhất (tra bảng BFS đa nguồn theo rank).
+
+    Đối tượng có thể gọi như heuristic(state, goal_state) của các thuật toán
+    một đích; goal_state bị bỏ qua.
+    """
+
+    def __init__(self, goal_states: Iterable[State], exact: bool = False):
+        self.goal_states = list(dict.fromkeys(tuple(goal) for goal in goal_states))
+        if not self.goal_states:
+            raise ValueError("Goal set is empty")
+        self.goal_set = set(self.goal_states)
+        self.goal_ranks = tuple(sorted(rank(goal) for goal in self.goal_states))
+        self.exact = exact
+
+        cells = np.arange(9)
+        costs = np.zeros((len(self.goal_states), 10, 9), dtype=np.uint8)
+        for g, goal in enumerate(self.goal_states):
+            for target, tile in enumerate(goal):
+                if tile != BLANK:
+                    costs[g, tile] = np.abs(cells // 3 - target // 3) + np.abs(cells % 3 - target % 3)
+        self.costs = costs
+        self._flat_costs = [costs[g].ravel().tolist() for g in range(len(self.goal_states))]
+
+    def is_goal(self, state: State) -> bool:
+        return tuple(state) in self.goal_set
+
+    def __call__(self, state: State, goal_state: Optional[State] = None) -> int:
+        if self.exact:
+            return int(self.table()[rank(tuple(state))])
+        offsets = [tile * 9 + cell for cell, tile in enumerate(state)]
+        return min(sum(flat[offset] for offset in offsets) for flat in self._flat_costs)
+
+    def batch(self, states: np.ndarray) -> np.ndarray:
+        """Heuristic cho mảng trạng thái (N, 9) trong một phép tính vector hóa."""
+        states = np.asarray(states)
+        if self.exact:
+            return self.table()[rank_array(states)]
+        per_goal = self.costs[:, states, np.arange(9)].sum(axis=2, dtype=np.int16)
+        return per_goal.min(axis=0)
+
+    def batch_ranks(self, ranks: np.ndarray) -> np.ndarray:
+        """Heuristic cho mảng rank, tra trực tiếp bảng đầy đủ."""
+        return self.table()[ranks]
+
+    def table(self) -> np.ndarray:
+        """Bảng heuristic int16 cho mọi rank (được tính một lần và dùng chung theo tập đích)."""
+        if self.exact:
+            return _goal_distances(self.goal_ranks)
+        return _goal_manhattan(self.goal_ranks)
@@ -0,0 +1,177 @@
+# algorithms/parallel_tempering.py
+import multiprocessing as mp
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .puzzle_index import NUM_STATES, rank, unrank
+from .puzzle_tables import manhattan_table, successor_table_with_double_moves, transition_table
+
+State = Tuple[int, ...]
+
+
+def _successors(double_moves: bool) -> np.ndarray:
+    return successor_table_with_double_moves() if double_moves else transition_table()
+
+
+def _trail_path(parents: np.ndarray, start_rank: int, goal_rank: int) -> List[State]:
+    """
+    Dựng đường đi từ vết cha của một chuỗi. Vì chỉ ghi cha ở lần đầu ghé thăm,
+    các con trỏ tạo thành cây gốc start_rank, nên đường đi không có chu trình.
+    """
+    path = [unrank(goal_rank)]
+    current = goal_rank
+    while current != start_rank:
+        current = int(parents[current])
+        path.append(unrank(current))
+    path.reverse()
+    return path
+
+
+def run_chains(start_state: State, goal_state: State, temperatures: np.ndarray,
+               successors: np.ndarray, max_steps: int, cooling_rate: float = 0.0,
+               swap_interval: int = 0, seed: Optional[int] = None,
+               stop_event=None) -> Tuple[Optional[List[State]], int]:
+    """
+    Chạy K chuỗi annealing cùng lúc trên rank trạng thái (mỗi bước là một phép
+    gather cho cả K chuỗi).
+
+    Mỗi chuỗi chỉ giữ vết cha: parents[k, r] là trạng thái mà chuỗi k đứng trước
+    khi lần đầu tới r. Với swap_interval > 0, các cặp mức nhiệt kề nhau được
+    hoán đổi theo tiêu chuẩn replica exchange; ta hoán đổi nhiệt độ giữa các
+    chuỗi chứ không hoán đổi trạng thái, nên vết cha của mỗi chuỗi vẫn liền mạch.
+    Với cooling_rate > 0, mọi nhiệt độ giảm theo cấp số nhân sau mỗi bước.
+
+    Returns:
+        tuple: (đường đi của chuỗi đầu tiên chạm đích hoặc None, số bước đã chạy)
+    """
+    rng = np.random.default_rng(seed)
+    heuristic = manhattan_table(tuple(goal_state)).astype(np.float64)
+    start_rank = rank(tuple(start_state))
+    goal_rank = rank(tuple(goal_state))
+    num_chains = len(temperatures)
+    num_moves = successors.shape[1]
+    chains = np.arange(num_chains)
+
+    temperatures = np.asarray(temperatures, dtype=np.float64).copy()
+    ranks = np.full(num_chains, start_rank, dtype=np.int32)
+    energy = np.full(num_chains, heuristic[start_rank])
+    parents = np.full((num_chains, NUM_STATES), -1, dtype=np.int32)
+    parents[:, start_rank] = start_rank
+    if start_rank == goal_rank:
+        return [unrank(start_rank)], 0
+
+    for step in range(1, max_steps + 1):
+        candidates = successors[ranks, rng.integers(0, num_moves, size=num_chains)]
+        valid = candidates >= 0
+        candidates = np.where(valid, candidates, ranks)
+        delta = heuristic[candidates] - energy
+        accept = valid & ((delta <= 0) | (rng.random(num_chains) < np.exp(-np.maximum(delta, 0) / temperatures)))
+
+        if accept.any():
+            moved, targets = chains[accept], candidates[accept]
+            fresh = parents[moved, targets] < 0
+            parents[moved[fresh], targets[fresh]] = ranks[accept][fresh]
+            ranks[accept] = targets
+            energy[accept] = heuristic[targets]
+            hit = np.flatnonzero(ranks == goal_rank)
+            if hit.size:
+                return _trail_path(parents[hit[0]], start_rank, goal_rank), step
+
+        if swap_interval and step % swap_interval == 0:
+            # Sắp chuỗi theo nhiệt độ, xét các cặp kề nhau (chẵn/lẻ xen kẽ).
+            order = np.argsort(temperatures)
+            offset = (step // swap_interval) % 2
+            lower = order[offset:-1:2]
+            upper = order[offset + 1::2]
+            pairs = min(lower.size, upper.size)
+            lower, upper = lower[:pairs], upper[:pairs]
+            log_ratio = (1.0 / temperatures[lower] - 1.0 / temperatures[upper]) * (energy[lower] - energy[upper])
+            swap = np.log(rng.random(pairs) + 1e-300) < log_ratio
+            swapped_lower, swapped_upper = lower[swap], upper[swap]
+            temperatures[swapped_lower], temperatures[swapped_upper] = (
+                temperatures[swapped_upper].copy(), temperatures[swapped_lower].copy())
+
+        if cooling_rate:
+            temperatures *= (1 - cooling_rate)
+
+        if stop_event is not None and step % 1024 == 0 and stop_event.is_set():
+            break
+
+    return None, max_steps
+
+
+_stop_event = None
+
+
+def _init_worker(event) -> None:
+    global _stop_event
+    _stop_event = event
+
+
+def _independent_chain(start_state: State, goal_state: State, temperature: float, cooling_rate: float,
+                       max_steps: int, double_moves: bool, seed: Optional[int]):
+    return run_chains(start_state, goal_state, np.array([temperature]), _successors(double_moves),
+                      max_steps, cooling_rate=cooling_rate, seed=seed, stop_event=_stop_event)
+
+
+def solve(start_state: State, goal_state: State,
+          num_chains: int = 8,
+          min_temperature: float = 0.3,
+          max_temperature: float = 10.0,
+          max_steps: int = 50000,
+          swap_interval: int = 10,
+          independent: bool = False,
+          cooling_rate: float = 0.0002,
+          double_moves: bool = False,
+          seed: Optional[int] = None) -> Optional[List[State]]:
+    """
+    Simulated Annealing nhiều chuỗi.
+
+    Mặc định chạy parallel tempering: num_chains chuỗi trên thang nhiệt độ cấp
+    số nhân từ min_temperature tới max_temperature, trao đổi nhiệt độ mỗi
+    swap_interval bước. Với independent=True, chạy num_chains chuỗi SA độc lập
+    (làm mát cấp số nhân từ max_temperature) trong một process pool; chuỗi đầu
+    tiên chạm đích thắng và các chuỗi còn lại được hủy.
+
+    Returns:
+        list: Đường đi (không có chu trình) tới đích, hoặc None.
+    """
+    start_state = tuple(start_state)
+    goal_state = tuple(goal_state)
+    if start_state == goal_state:
+        return [start_state]
+
+    successors = _successors(double_moves)
+    manhattan_table(goal_state)
+
+    if not independent:
+        ladder = np.geomspace(min_temperature, max_temperature, num_chains)
+        path, steps = run_chains(start_state, goal_state, ladder, successors, max_steps,
+                                 swap_interval=swap_interval, seed=seed)
+        print(f"Parallel tempering: {'found goal' if path else 'no solution'} after {steps} steps")
+        return path
+
+    ctx = mp.get_context()
+    stop_event = ctx.Event()
+    path = None
+    with ProcessPoolExecutor(max_workers=min(num_chains, os.cpu_count() or 1), mp_context=ctx,
+                             initializer=_init_worker, initargs=(stop_event,)) as pool:
+        pending = {
+            pool.submit(_independent_chain, start_state, goal_state, max_temperature, cooling_rate,
+                        max_steps, double_moves, None if seed is None else seed + i)
+            for i in range(num_chains)
+        }
+        while pending and path is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                result, steps = future.result()
+                if result is not None and (path is None or len(result) < len(path)):
+                    path = result
+        stop_event.set()
+        for future in pending:
+            future.cancel()
+    print(f"Independent SA chains: {'found goal' if path else 'no solution'}")
+    return path
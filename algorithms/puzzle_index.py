@@ -0,0 +1,71 @@
+from typing import List, Tuple
+
+State = Tuple[int, ...]
+
+# Không gian trạng thái 3x3 (ô trống là 9) có 9! = 362880 hoán vị, chia thành
+# 2 lớp theo tính chẵn lẻ của số nghịch thế (không tính ô trống). Mỗi lớp có
+# 181440 trạng thái và chỉ đi lại được trong cùng một lớp.
+NUM_STATES = 362880
+HALF_STATES = 181440
+_TILE_PERMUTATIONS_HALF = 20160 # 8! / 2
+BLANK = 9
+
+_FACTORIALS = [5040, 720, 120, 24, 6, 2, 1, 1] # 7!, 6!, ..., 0!
+
+
+def parity_of(state: State) -> int:
+    """Tính chẵn lẻ của số nghịch thế (bỏ qua ô trống) - 0 hoặc 1."""
+    tiles = [x for x in state if x != BLANK]
+    inversions = 0
+    for i in range(len(tiles)):
+        for j in range(i + 1, len(tiles)):
+            if tiles[i] > tiles[j]:
+                inversions += 1
+    return inversions % 2
+
+
+def rank(state: State) -> int:
+    """
+    Đánh số một trạng thái thành số nguyên trong [0, 362880).
+
+    Cấu trúc: parity * 181440 + blank_index * 20160 + lehmer(8 ô) // 2.
+    Hai hoán vị chỉ khác nhau ở 2 ô cuối có cùng lehmer // 2 nhưng khác
+    tính chẵn lẻ, nên trong mỗi lớp chẵn/lẻ phép đánh số là song ánh.
+    """
+    blank_index = state.index(BLANK)
+    tiles = [x for x in state if x != BLANK]
+    lehmer = 0
+    parity = 0
+    for i in range(7):
+        smaller = 0
+        tile = tiles[i]
+        for j in range(i + 1, 8):
+            if tiles[j] < tile:
+                smaller += 1
+        lehmer += smaller * _FACTORIALS[i]
+        parity += smaller
+    parity %= 2
+    return parity * HALF_STATES + blank_index * _TILE_PERMUTATIONS_HALF + lehmer // 2
+
+
+def unrank(r: int) -> State:
+    """Hàm ngược của rank()."""
+    parity, rest = divmod(r, HALF_STATES)
+    blank_index, half = divmod(rest, _TILE_PERMUTATIONS_HALF)
+    lehmer = half * 2
+    available = [1, 2, 3, 4, 5, 6, 7, 8]
+    tiles: List[int] = []
+    decoded_parity = 0
+    for i in range(8):
+        digit, lehmer = divmod(lehmer, _FACTORIALS[i])
+        decoded_parity += digit
+        tiles.append(available.pop(digit))
+    if decoded_parity % 2 != parity:
+        tiles[6], tiles[7] = tiles[7], tiles[6]
+    tiles.insert(blank_index, BLANK)
+    return tuple(tiles)
+
+
+def class_offset(state: State) -> int:
+    """Rank nhỏ nhất trong lớp chẵn/lẻ chứa state (0 hoặc 181440)."""
+    return parity_of(state) * HALF_STATES
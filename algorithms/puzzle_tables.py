@@ -0,0 +1,104 @@
+from functools import lru_cache
+from itertools import permutations
+from typing import Tuple
+
+import numpy as np
+
+from .puzzle_index import NUM_STATES, HALF_STATES, BLANK
+
+State = Tuple[int, ...]
+
+# Thứ tự nước đi của ô trống giống các module khác: Lên, Xuống, Trái, Phải.
+MOVES = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+MOVE_NAMES = ['Up', 'Down', 'Left', 'Right']
+OPPOSITE_MOVE = [1, 0, 3, 2]
+# Di chuyển kép: (bước 1, bước 2), bước 2 không được đưa ô trống về chỗ cũ.
+DOUBLE_MOVES = [(m1, m2) for m1 in range(4) for m2 in range(4) if m2 != OPPOSITE_MOVE[m1]]
+
+_FACTORIALS = [5040, 720, 120, 24, 6, 2, 1]
+
+
+def rank_array(states: np.ndarray) -> np.ndarray:
+    """Phiên bản vector hóa của puzzle_index.rank cho mảng (n, 9)."""
+    states = np.asarray(states, dtype=np.uint8)
+    n = states.shape[0]
+    is_blank = states == BLANK
+    blank_index = is_blank.argmax(axis=1)
+    tiles = states[~is_blank].reshape(n, 8)
+    lehmer = np.zeros(n, dtype=np.int64)
+    parity = np.zeros(n, dtype=np.int64)
+    for i in range(7):
+        smaller = (tiles[:, i + 1:] < tiles[:, i:i + 1]).sum(axis=1)
+        lehmer += smaller * _FACTORIALS[i]
+        parity += smaller
+    return (parity % 2) * HALF_STATES + blank_index * (HALF_STATES // 9) + lehmer // 2
+
+
+@lru_cache(maxsize=1)
+def state_table() -> np.ndarray:
+    """Mảng (362880, 9) uint8: hàng r là trạng thái có rank r."""
+    all_states = np.array(list(permutations(range(1, 10))), dtype=np.uint8)
+    table = np.empty_like(all_states)
+    table[rank_array(all_states)] = all_states
+    table.setflags(write=False)
+    return table
+
+
+@lru_cache(maxsize=1)
+def transition_table() -> np.ndarray:
+    """
+    Bảng chuyển (362880, 4) int32: transition_table()[r, m] là rank sau khi
+    ô trống đi theo MOVES[m], hoặc -1 nếu nước đi ra ngoài bảng.
+    """
+    states = state_table()
+    blank_index = (states == BLANK).argmax(axis=1)
+    table = np.full((NUM_STATES, 4), -1, dtype=np.int32)
+    for blank in range(9):
+        rows = np.flatnonzero(blank_index == blank)
+        row, col = divmod(blank, 3)
+        for m, (dr, dc) in enumerate(MOVES):
+            new_row, new_col = row + dr, col + dc
+            if 0 <= new_row < 3 and 0 <= new_col < 3:
+                new_index = new_row * 3 + new_col
+                moved = states[rows].copy()
+                moved[:, [blank, new_index]] = moved[:, [new_index, blank]]
+                table[rows, m] = rank_array(moved)
+    table.setflags(write=False)
+    return table
+
+
+@lru_cache(maxsize=1)
+def double_move_table() -> np.ndarray:
+    """Bảng chuyển (362880, 12) cho các cặp nước đi trong DOUBLE_MOVES (-1 nếu không hợp lệ)."""
+    single = transition_table()
+    table = np.full((NUM_STATES, len(DOUBLE_MOVES)), -1, dtype=np.int32)
+    for code, (m1, m2) in enumerate(DOUBLE_MOVES):
+        middle = single[:, m1]
+        valid = middle >= 0
+        table[valid, code] = single[middle[valid], m2]
+    table.setflags(write=False)
+    return table
+
+
+@lru_cache(maxsize=1)
+def successor_table_with_double_moves() -> np.ndarray:
+    """Bảng (362880, 16): 4 cột di chuyển đơn rồi 12 cột di chuyển kép."""
+    table = np.hstack([transition_table(), double_move_table()])
+    table.setflags(write=False)
+    return table
+
+
+@lru_cache(maxsize=8)
+def manhattan_table(goal_state: State) -> np.ndarray:
+    """Khoảng cách Manhattan tới goal_state của mọi rank, dạng mảng uint8 (362880,)."""
+    states = state_table()
+    goal_position = np.zeros(10, dtype=np.int64)
+    for index, tile in enumerate(goal_state):
+        goal_position[tile] = index
+    cells = np.arange(9)
+    target = goal_position[states]
+    distance = np.abs(cells // 3 - target // 3) + np.abs(cells % 3 - target % 3)
+    distance[states == BLANK] = 0
+    table = distance.sum(axis=1).astype(np.uint8)
+    table.setflags(write=False)
+    return table
@@ -1,9 +1,26 @@
+import hashlib
+import os
 import random
 import time
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+
+from .puzzle_index import HALF_STATES, class_offset, rank, unrank
+from .puzzle_tables import transition_table
 
 ALPHA = 0.1; GAMMA = 0.9; EPSILON = 0.1
 NUM_EPISODES = 1000; MAX_STEPS_PER_EPISODE = 200
 
+# Q-table đã huấn luyện được lưu ở đây (một file .npy cho mỗi goal + bộ siêu tham số).
+MODEL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".q_models")
+MODEL_FORMAT_VERSION = 1
+MAX_CACHED_AGENTS = 4
+BATCHED_ROUNDS = 10 # Số lượt train_batched tối đa (mỗi lượt 4096 môi trường x 250 bước) trong solve
+# alpha mà mỗi chế độ huấn luyện của solve thực sự dùng (train_batched/train_curriculum mặc định alpha = 1).
+MODE_ALPHAS = {"episodes": ALPHA, "batched": 1.0, "curriculum": 1.0}
+
 def get_valid_actions(state_tuple):
     """Returns list of possible actions (neighboring state_tuples)."""
     state = list(state_tuple)
@@ -24,86 +41,451 @@ def get_reward(state_tuple, goal_state_tuple):
     if state_tuple == goal_state_tuple: return 100
     else: return -1
 
+@lru_cache(maxsize=2)
+def class_transitions(offset):
+    """
+    Bảng chuyển (181440, 4) int32 trong một lớp chẵn lẻ: hàng i là trạng thái có
+    rank offset + i, cột là hướng đi của ô trống (Lên, Xuống, Trái, Phải), giá trị
+    là chỉ số trạng thái kế tiếp trong cùng lớp hoặc -1 nếu không hợp lệ.
+    Bảng được lưu cạnh các model trong MODEL_DIR và nạp bằng memory-map ở lần sau.
+    """
+    path = os.path.join(MODEL_DIR, f"transitions_{MODEL_FORMAT_VERSION}_{offset}.npy")
+    try:
+        local = np.load(path, mmap_mode="r")
+        if local.shape == (HALF_STATES, 4) and local.dtype == np.int32: return local
+    except (OSError, ValueError): pass
+    table = transition_table()[offset:offset + HALF_STATES]
+    local = np.where(table >= 0, table - offset, -1).astype(np.int32)
+    try:
+        os.makedirs(MODEL_DIR, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f: np.save(f, local)
+        os.replace(tmp_path, path)
+    except OSError: pass
+    local.setflags(write=False)
+    return local
+
+class ReplayBuffer:
+    """
+    Vòng đệm kinh nghiệm kích thước cố định lưu (rank, action, reward, next_rank)
+    trong các mảng NumPy song song; lấy mẫu với xác suất tỉ lệ |TD|^priority_exponent.
+    """
+    def __init__(self, capacity=1 << 17, priority_exponent=0.6):
+        self.capacity = capacity; self.priority_exponent = priority_exponent
+        self.states = np.zeros(capacity, dtype=np.int32); self.actions = np.zeros(capacity, dtype=np.uint8)
+        self.rewards = np.zeros(capacity, dtype=np.float32); self.next_states = np.zeros(capacity, dtype=np.int32)
+        self.priorities = np.zeros(capacity, dtype=np.float32)
+        self.position = 0; self.size = 0
+    def add(self, states, actions, rewards, next_states, priorities):
+        index = (self.position + np.arange(len(states))) % self.capacity
+        self.states[index] = states; self.actions[index] = actions; self.rewards[index] = rewards
+        self.next_states[index] = next_states; self.priorities[index] = priorities + 1e-3
+        self.position = int((self.position + len(states)) % self.capacity); self.size = min(self.size + len(states), self.capacity)
+    def sample(self, batch_size, rng):
+        weights = self.priorities[:self.size].astype(np.float64) ** self.priority_exponent
+        index = rng.choice(self.size, size=batch_size, p=weights / weights.sum())
+        return (index, self.states[index].astype(np.int64), self.actions[index].astype(np.int64),
+                self.rewards[index].astype(np.float64), self.next_states[index].astype(np.int64))
+    def update_priorities(self, index, td_errors):
+        self.priorities[index] = np.abs(td_errors) + 1e-3
+
 class QLearningAgent:
+    """
+    Q-table là mảng float32 (181440, 4) chỉ số theo (rank - class_offset, hướng đi):
+    chỉ lớp chẵn lẻ chứa goal_state mới tới được đích nên chỉ cần một nửa không
+    gian trạng thái. Ô của hướng đi không hợp lệ giữ giá trị -inf để phép max
+    trên một hàng tự bỏ qua chúng. Vòng huấn luyện đọc/ghi qua memoryview phẳng
+    (q[4 * state + action]) nên mỗi cập nhật chỉ là phép tính chỉ số.
+    """
     def __init__(self, goal_state, alpha=ALPHA, gamma=GAMMA, epsilon=EPSILON):
-        self.q_table = {} # state_tuple -> {action_state_tuple: q_value}
-        self.goal_state = goal_state; self.alpha = alpha; self.gamma = gamma; self.epsilon = epsilon
+        self.goal_state = tuple(goal_state); self.alpha = alpha; self.gamma = gamma; self.epsilon = epsilon
+        self.offset = class_offset(self.goal_state)
+        self.goal_index = rank(self.goal_state) - self.offset
+        self.next_index = class_transitions(self.offset)
+        self.valid = self.next_index >= 0
+        self.set_q_table(np.where(self.valid, 0.0, -np.inf).astype(np.float32))
+        self.values = None; self.policy = None # Có sau plan()/load_plan(): V (float32) và hành động tốt nhất (uint8, 255 = không có)
         self.training_episodes = 0; self.nodes_expanded_during_training = 0
-    def get_q_value(self, state_tuple, action_state_tuple):
-        return self.q_table.get(state_tuple, {}).get(action_state_tuple, 0.0)
-    def choose_action(self, state_tuple):
-        possible_actions = get_valid_actions(state_tuple)
-        if not possible_actions: return None
-        if random.random() < self.epsilon: return random.choice(possible_actions)
-        else:
-            q_values = {action: self.get_q_value(state_tuple, action) for action in possible_actions}
-            max_q = -float('inf'); best_actions = []
-            for action, q_val in q_values.items(): # Renamed q to q_val
-                if q_val > max_q: max_q = q_val; best_actions = [action]
-                elif q_val == max_q: best_actions.append(action)
-            return random.choice(best_actions) if best_actions else None
-    def learn(self, state_tuple, action_state_tuple, reward, next_state_tuple):
+    def set_q_table(self, q_table):
+        self.q_table = q_table
+        self._q = memoryview(q_table.reshape(-1)); self._next = memoryview(self.next_index.reshape(-1))
+    def index_of(self, state_tuple):
+        """Chỉ số của trạng thái trong Q-table, hoặc None nếu nó thuộc lớp chẵn lẻ khác."""
+        state_tuple = tuple(state_tuple)
+        if class_offset(state_tuple) != self.offset: return None
+        return rank(state_tuple) - self.offset
+    def get_q_value(self, state_index, action):
+        return self._q[4 * state_index + action]
+    def choose_action(self, state_index):
+        """Epsilon-greedy; trả về mã hướng đi (0-3)."""
+        base = 4 * state_index; q = self._q
+        if random.random() < self.epsilon:
+            return random.choice([a for a in range(4) if self._next[base + a] >= 0])
+        values = (q[base], q[base + 1], q[base + 2], q[base + 3]); max_q = max(values)
+        return random.choice([a for a in range(4) if values[a] == max_q])
+    def learn(self, state_index, action, reward, next_index):
         self.nodes_expanded_during_training +=1
-        old_q_value = self.get_q_value(state_tuple, action_state_tuple)
-        next_possible_actions = get_valid_actions(next_state_tuple)
-        max_future_q = 0.0
-        if next_possible_actions:
-            max_future_q = max([self.get_q_value(next_state_tuple, future_action) for future_action in next_possible_actions], default=0.0)
-        new_q_value = old_q_value + self.alpha * (reward + self.gamma * max_future_q - old_q_value)
-        if state_tuple not in self.q_table: self.q_table[state_tuple] = {}
-        self.q_table[state_tuple][action_state_tuple] = new_q_value
-    def train(self, start_state_initial, num_episodes=NUM_EPISODES, max_steps_per_episode=MAX_STEPS_PER_EPISODE):
-        print(f"Q-Learning: Training for {num_episodes} episodes...")
+        q = self._q; slot = 4 * state_index + action; base = 4 * next_index
+        max_future_q = max(q[base], q[base + 1], q[base + 2], q[base + 3])
+        q[slot] += self.alpha * (reward + self.gamma * max_future_q - q[slot])
+    def save(self, path):
+        """
+        Ghi Q-table ra file .npy (ghi file tạm rồi đổi tên để không để lại file hỏng).
+        Nếu Q-table đang memory-map chính file đó (sau load()), chép nó vào bộ nhớ
+        và nhả memory-map trước: Windows không cho đổi tên đè lên file đang map.
+        """
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if isinstance(self.q_table, np.memmap): self.set_q_table(np.array(self.q_table))
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f: np.save(f, self.q_table)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path): os.remove(tmp_path)
+            raise
+    def load(self, path):
+        """
+        Nạp Q-table bằng memory-map ở chế độ copy-on-write: chỉ các trang được đọc
+        mới vào bộ nhớ, và việc huấn luyện thêm không sửa file cho tới khi save().
+        """
+        q_table = np.load(path, mmap_mode="c")
+        if q_table.shape != self.q_table.shape or q_table.dtype != self.q_table.dtype:
+            raise ValueError(f"Unexpected Q-table layout in {path}")
+        self.set_q_table(q_table)
+    def plan(self, method="prioritized"):
+        """
+        Lập kế hoạch trên mô hình đã biết thay vì lấy mẫu episode: value
+        iteration với cùng phần thưởng như khi học (-1 mỗi bước, +100 khi vào
+        đích). V khởi tạo bằng cận dưới -1/(1-gamma) ("không bao giờ tới đích"),
+        nên sau k lượt backup mọi trạng thái cách đích <= k bước đã đúng giá trị.
+        method="sweep": backup toàn bộ bảng mỗi lượt tới khi không đổi.
+        method="prioritized": chỉ backup hàng xóm của các trạng thái vừa thay đổi
+        (frontier lan ra từ đích), mỗi trạng thái được cập nhật đúng một lần.
+        Điền bảng giá trị và bảng chính sách (Q-table học được giữ nguyên, để
+        các chế độ học không dùng nhầm kết quả lập kế hoạch); trả về số backup.
+        """
+        next_table = np.asarray(self.next_index); valid = np.asarray(self.valid)
+        safe_next = np.where(valid, next_table, 0)
+        rewards = np.where(next_table == self.goal_index, 100.0, -1.0)
+        floor = -1.0 / (1.0 - self.gamma)
+        values = np.full(HALF_STATES, floor); values[self.goal_index] = 0.0
+        backups = 0
+        if method == "sweep":
+            while True:
+                q = np.where(valid, rewards + self.gamma * values[safe_next], -np.inf)
+                new_values = q.max(axis=1); new_values[self.goal_index] = 0.0
+                backups += HALF_STATES
+                if np.array_equal(new_values, values): break
+                values = new_values
+        else:
+            changed = np.array([self.goal_index])
+            while changed.size:
+                # Di chuyển là thuận nghịch nên tiền nhiệm của một trạng thái chính là hàng xóm của nó.
+                candidates = next_table[changed].ravel()
+                candidates = np.unique(candidates[candidates >= 0])
+                candidates = candidates[candidates != self.goal_index]
+                q = np.where(valid[candidates], rewards[candidates] + self.gamma * values[safe_next[candidates]], -np.inf)
+                new_values = q.max(axis=1)
+                improved = new_values > values[candidates] + 1e-9
+                changed = candidates[improved]; values[changed] = new_values[improved]
+                backups += candidates.size
+        q_table = np.where(valid, rewards + self.gamma * values[safe_next], -np.inf).astype(np.float32)
+        q_table[self.goal_index] = np.where(valid[self.goal_index], 0.0, -np.inf)
+        policy = np.argmax(q_table, axis=1).astype(np.uint8); policy[self.goal_index] = 255
+        self.values = values.astype(np.float32); self.policy = policy
+        return backups
+    def save_plan(self, path):
+        """Ghi bảng chính sách (uint8) và bảng giá trị (float32) ra hai file .npy."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        for suffix, array in (("policy", self.policy), ("values", self.values)):
+            target = f"{path}.{suffix}.npy"; tmp_path = f"{target}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f: np.save(f, np.asarray(array))
+            os.replace(tmp_path, target)
+    def load_plan(self, path):
+        """Nạp bảng chính sách/giá trị bằng memory-map (chỉ đọc)."""
+        policy = np.load(f"{path}.policy.npy", mmap_mode="r"); values = np.load(f"{path}.values.npy", mmap_mode="r")
+        if policy.shape != (HALF_STATES,) or policy.dtype != np.uint8 or values.shape != (HALF_STATES,):
+            raise ValueError(f"Unexpected plan layout in {path}")
+        self.policy = policy; self.values = values
+    def train(self, start_state_initial, num_episodes=NUM_EPISODES, max_steps_per_episode=MAX_STEPS_PER_EPISODE, verbose=True):
+        start_index = self.index_of(start_state_initial)
+        if start_index is None: return
+        if verbose: print(f"Q-Learning: Training for {num_episodes} episodes...")
         start_time = time.time() # Renamed start_train_time
+        # Vòng lặp nóng viết gọn trên biến cục bộ (cùng logic với choose_action + learn).
+        q = self._q; next_table = self._next; goal_index = self.goal_index
+        alpha = self.alpha; gamma = self.gamma; epsilon = self.epsilon; rand = random.random
+        updates = 0
         for episode in range(num_episodes):
-            current_state = start_state_initial
+            current_index = start_index
             for _ in range(max_steps_per_episode): # Renamed step to _
-                action_taken = self.choose_action(current_state)
-                if action_taken is None: break
-                next_state = action_taken; reward = get_reward(next_state, self.goal_state)
-                self.learn(current_state, action_taken, reward, next_state)
-                current_state = next_state
-                if current_state == self.goal_state: break
+                base = 4 * current_index
+                if rand() < epsilon:
+                    action = int(rand() * 4)
+                    while next_table[base + action] < 0: action = int(rand() * 4)
+                else:
+                    values = q[base:base + 4].tolist(); max_q = max(values)
+                    action = values.index(max_q)
+                    if values.count(max_q) > 1:
+                        action = random.choice([a for a in range(4) if values[a] == max_q])
+                next_index = next_table[base + action]
+                reward = 100 if next_index == goal_index else -1
+                nb = 4 * next_index; slot = base + action
+                q[slot] += alpha * (reward + gamma * max(q[nb], q[nb + 1], q[nb + 2], q[nb + 3]) - q[slot])
+                updates += 1
+                current_index = next_index
+                if current_index == goal_index: break
             self.training_episodes +=1
-            if episode > 0 and episode % (num_episodes // 10 if num_episodes >=10 else 1) == 0: # Progress print
-                 print(f"Ep {episode}, Q-table size: {len(self.q_table)}")
-        print(f"Training finished in {time.time() - start_time:.2f}s. Nodes expanded: {self.nodes_expanded_during_training}")
-    def get_policy_path(self, start_state_tuple, max_path_length=50):
-        path = [start_state_tuple]; current_state = start_state_tuple; visited_in_path = {start_state_tuple}
+            if verbose and episode > 0 and episode % (num_episodes // 10 if num_episodes >=10 else 1) == 0: # Progress print
+                 print(f"Ep {episode}, Q updates: {updates}")
+        self.nodes_expanded_during_training += updates
+        if verbose: print(f"Training finished in {time.time() - start_time:.2f}s. Nodes expanded: {self.nodes_expanded_during_training}")
+    def select_actions(self, states, rng):
+        """Epsilon-greedy cho cả vector trạng thái; hòa được phá ngẫu nhiên đều."""
+        q_rows = self.q_table[states]
+        greedy = q_rows == q_rows.max(axis=1, keepdims=True)
+        explore = rng.random(states.size) < self.epsilon
+        candidates = np.where(explore[:, None], self.valid[states], greedy)
+        return np.argmax(candidates * rng.random((states.size, 4)), axis=1)
+    def apply_updates(self, states, actions, rewards, next_states, alpha):
+        """
+        Cập nhật Q cho một lô chuyển trạng thái bằng các phép toán mảng. Các
+        target trùng (trạng thái, hành động) được lấy trung bình (np.bincount),
+        nên kết quả tất định. Trả về sai số TD của từng chuyển trước khi cập nhật.
+        """
+        targets = rewards + self.gamma * self.q_table[next_states].max(axis=1)
+        slots = states * 4 + actions
+        flat = self.q_table.reshape(-1)
+        td_errors = targets - flat[slots]
+        unique_slots, inverse = np.unique(slots, return_inverse=True)
+        mean_targets = np.bincount(inverse, weights=targets) / np.bincount(inverse)
+        flat[unique_slots] += alpha * (mean_targets - flat[unique_slots])
+        return td_errors
+    def depth_layers(self):
+        """Các tầng BFS từ đích trong lớp chẵn lẻ: depth_layers()[d] là mảng chỉ số cách đích d bước."""
+        if getattr(self, "_depth_layers", None) is None:
+            next_table = np.asarray(self.next_index)
+            seen = np.zeros(HALF_STATES, dtype=bool); seen[self.goal_index] = True
+            layers = [np.array([self.goal_index])]
+            while layers[-1].size:
+                frontier = next_table[layers[-1]].ravel()
+                frontier = np.unique(frontier[frontier >= 0])
+                frontier = frontier[~seen[frontier]]; seen[frontier] = True
+                layers.append(frontier)
+            self._depth_layers = layers[:-1]
+        return self._depth_layers
+    def greedy_success_rate(self, states, max_steps):
+        """Tỉ lệ trạng thái (vector) mà chính sách tham lam theo Q đưa tới đích trong max_steps bước."""
+        current = np.asarray(states).copy(); reached = current == self.goal_index
+        for _ in range(max_steps):
+            q_rows = self.q_table[current]
+            current = np.where(reached, current, self.next_index[current, np.argmax(q_rows, axis=1)])
+            reached |= current == self.goal_index
+        return float(reached.mean())
+    def train_curriculum(self, start_state=None, num_envs=1024, rounds_per_level=20, replay_batches=4,
+                         replay_batch_size=4096, success_threshold=0.95, alpha=1.0, seed=None, verbose=True):
+        """
+        Reverse curriculum: huấn luyện lần lượt từ các trạng thái cách đích 1, 2, ...
+        bước (tầng BFS từ đích) tới độ sâu của start_state (hoặc toàn bộ không
+        gian). Ở mỗi tầng, num_envs môi trường chạy lockstep các episode dài
+        2 * độ sâu từ trạng thái ngẫu nhiên trong tầng; chuyển trạng thái được
+        học trực tiếp và đưa vào ReplayBuffer, rồi học lại replay_batches lô lấy
+        mẫu theo độ ưu tiên |TD|. Chuyển sang tầng tiếp theo khi chính sách tham
+        lam đưa >= success_threshold mẫu của tầng hiện tại tới đích.
+        Trả về số episode đã chạy.
+        """
+        rng = np.random.default_rng(seed)
+        layers = self.depth_layers()
+        target_depth = len(layers) - 1
+        start_index = None if start_state is None else self.index_of(start_state)
+        if start_state is not None:
+            if start_index is None: return 0
+            target_depth = next(d for d, layer in enumerate(layers) if np.any(layer == start_index))
+        replay = ReplayBuffer()
+        next_table = np.asarray(self.next_index)
+        episodes_before = self.training_episodes
+        for depth in range(1, target_depth + 1):
+            pool = layers[depth]
+            episode_length = 2 * depth
+            for _ in range(rounds_per_level):
+                current = pool[rng.integers(0, pool.size, size=num_envs)]
+                if start_index is not None and depth == target_depth: current[0] = start_index
+                for _ in range(episode_length):
+                    actions = self.select_actions(current, rng)
+                    next_states = next_table[current, actions]
+                    rewards = np.where(next_states == self.goal_index, 100.0, -1.0)
+                    td_errors = self.apply_updates(current, actions, rewards, next_states, alpha)
+                    replay.add(current, actions, rewards, next_states, np.abs(td_errors))
+                    self.nodes_expanded_during_training += current.size
+                    # Episode kết thúc ở đích: bắt đầu lại từ một trạng thái khác của tầng.
+                    finished = next_states == self.goal_index
+                    self.training_episodes += int(finished.sum())
+                    current = np.where(finished, pool[rng.integers(0, pool.size, size=num_envs)], next_states)
+                self.training_episodes += num_envs
+                for _ in range(replay_batches):
+                    index, states, actions, rewards, next_states = replay.sample(replay_batch_size, rng)
+                    replay.update_priorities(index, self.apply_updates(states, actions, rewards, next_states, alpha))
+                probe = pool[rng.integers(0, pool.size, size=min(256, pool.size))]
+                if self.greedy_success_rate(probe, episode_length) >= success_threshold: break
+            if verbose: print(f"Curriculum depth {depth}/{target_depth}, episodes: {self.training_episodes - episodes_before}")
+        return self.training_episodes - episodes_before
+    def train_batched(self, start_states, num_envs=4096, num_steps=250, max_steps_per_episode=MAX_STEPS_PER_EPISODE,
+                      alpha=1.0, seed=None, verbose=True):
+        """
+        Huấn luyện num_envs môi trường chạy song song theo từng bước (lockstep).
+        Chỉ số trạng thái của mọi môi trường nằm trong một vector NumPy; chọn hành
+        động epsilon-greedy, tra bảng chuyển và phần thưởng, rồi cập nhật Q bằng
+        các phép toán mảng. Khi nhiều môi trường cùng cập nhật một cặp (trạng
+        thái, hành động) trong một bước, ta lấy trung bình các target của chúng
+        (np.bincount), nên kết quả không phụ thuộc thứ tự ghi.
+        Môi trường chạm đích hoặc hết max_steps_per_episode được đặt lại về một
+        trạng thái bắt đầu ngẫu nhiên trong start_states.
+        Mặc định alpha = 1: chuyển trạng thái và phần thưởng là tất định, và các
+        target trùng nhau đã được lấy trung bình, nên mỗi cập nhật là một phép
+        Bellman backup đầy đủ; alpha nhỏ (như self.alpha) làm giá trị lan ngược
+        từ đích rất chậm trên các trạng thái bắt đầu sâu.
+        Trả về số chuyển trạng thái đã học.
+        """
+        starts = [self.index_of(state) for state in start_states]
+        starts = np.array([index for index in starts if index is not None], dtype=np.int64)
+        if starts.size == 0: return 0
+        rng = np.random.default_rng(seed)
+        next_table = np.asarray(self.next_index)
+        current = starts[rng.integers(0, starts.size, size=num_envs)]
+        episode_steps = np.zeros(num_envs, dtype=np.int64)
+        if verbose: print(f"Q-Learning (batched): {num_envs} envs x {num_steps} steps...")
+        start_time = time.time()
+        for step in range(num_steps):
+            actions = self.select_actions(current, rng)
+            next_states = next_table[current, actions]
+            reached = next_states == self.goal_index
+            rewards = np.where(reached, 100.0, -1.0)
+            self.apply_updates(current, actions, rewards, next_states, alpha)
+
+            episode_steps += 1
+            done = reached | (episode_steps >= max_steps_per_episode)
+            current = next_states
+            if done.any():
+                current[done] = starts[rng.integers(0, starts.size, size=int(done.sum()))]
+                episode_steps[done] = 0
+                self.training_episodes += int(done.sum())
+            if verbose and step > 0 and step % max(1, num_steps // 10) == 0:
+                print(f"Step {step}, episodes finished: {self.training_episodes}")
+        transitions = num_envs * num_steps
+        self.nodes_expanded_during_training += transitions
+        if verbose:
+            elapsed = time.time() - start_time
+            print(f"Batched training finished in {elapsed:.2f}s ({transitions / max(elapsed, 1e-9):,.0f} transitions/s)")
+        return transitions
+    def get_policy_path(self, start_state_tuple, max_path_length=50, use_plan=False):
+        """Đường đi tham lam theo Q-table; use_plan=True đi theo bảng chính sách của plan() thay vào đó."""
+        current_index = self.index_of(start_state_tuple)
+        if current_index is None: return None
+        if use_plan: return self.walk_policy_table(current_index) if self.policy is not None else None
+        indices = [current_index]; visited_in_path = {current_index}
         for _ in range(max_path_length):
-            if current_state == self.goal_state: break
-            possible_actions = get_valid_actions(current_state)
-            if not possible_actions: return None
-            q_values = {action: self.get_q_value(current_state, action) for action in possible_actions}
-            best_action = None; max_q_val = -float('inf'); candidate_actions = [] # Renamed max_q
-            for action, q_val_policy in q_values.items(): # Renamed q to q_val_policy
-                if action not in visited_in_path:
-                    if q_val_policy > max_q_val: max_q_val = q_val_policy; candidate_actions = [action]
-                    elif q_val_policy == max_q_val: candidate_actions.append(action)
-            if not candidate_actions:
-                non_cycle_actions = [act for act in possible_actions if act not in visited_in_path]
-                if non_cycle_actions: best_action = random.choice(non_cycle_actions)
-                else: return None
-            else: best_action = random.choice(candidate_actions)
-            if best_action is None: return None
-            current_state = best_action; path.append(current_state); visited_in_path.add(current_state)
-        return path if path[-1] == self.goal_state else None
-
-q_agent = None; is_trained = False
-
-def solve(start_state, goal_state):
-    """Solves 8-puzzle using Q-Learning."""
-    global q_agent, is_trained
-    if q_agent is None or q_agent.goal_state != goal_state:
-        q_agent = QLearningAgent(goal_state=goal_state); is_trained = False
-    if not is_trained:
-        q_agent.train(start_state_initial=start_state); is_trained = True
-    path = q_agent.get_policy_path(start_state)
-    nodes_exp = q_agent.nodes_expanded_during_training if q_agent else 0 # Ensure agent exists
+            if current_index == self.goal_index: break
+            base = 4 * current_index
+            candidates = [(self._q[base + a], self._next[base + a]) for a in range(4) if self._next[base + a] >= 0]
+            candidates = [(q, nxt) for q, nxt in candidates if nxt not in visited_in_path]
+            if not candidates: return None
+            max_q_val = max(q for q, _ in candidates)
+            current_index = random.choice([nxt for q, nxt in candidates if q == max_q_val])
+            indices.append(current_index); visited_in_path.add(current_index)
+        if indices[-1] != self.goal_index: return None
+        return [unrank(index + self.offset) for index in indices]
+
+    def walk_policy_table(self, current_index):
+        """
+        Đi theo bảng chính sách đã lập kế hoạch: mỗi bước tới hàng xóm gần đích
+        hơn một bước, nên luôn tới đích (tối đa 31 bước trên 8-puzzle).
+        """
+        policy = self.policy; next_table = self._next; indices = [current_index]
+        while current_index != self.goal_index:
+            current_index = next_table[4 * current_index + int(policy[current_index])]
+            indices.append(current_index)
+            if len(indices) > HALF_STATES: return None # Bảng hỏng: tránh lặp vô hạn
+        return [unrank(index + self.offset) for index in indices]
+
+def model_path(goal_state, mode="episodes", alpha=None, gamma=GAMMA, epsilon=EPSILON):
+    """
+    Đường dẫn file model; tên chứa băm của chế độ huấn luyện và siêu tham số nên
+    đổi chế độ/tham số sẽ không nạp nhầm model cũ. alpha mặc định là alpha mà
+    chế độ đó dùng (MODE_ALPHAS).
+    """
+    if alpha is None: alpha = MODE_ALPHAS.get(mode, ALPHA)
+    key = repr((MODEL_FORMAT_VERSION, mode, tuple(goal_state), alpha, gamma, epsilon, NUM_EPISODES, MAX_STEPS_PER_EPISODE))
+    digest = hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+    return os.path.join(MODEL_DIR, f"q_{''.join(map(str, goal_state))}_{digest}.npy")
+
+def plan_path(goal_state, gamma=GAMMA):
+    """Tiền tố đường dẫn của bảng chính sách/giá trị (chỉ phụ thuộc goal và gamma)."""
+    key = repr((MODEL_FORMAT_VERSION, "plan", tuple(goal_state), gamma))
+    digest = hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+    return os.path.join(MODEL_DIR, f"plan_{''.join(map(str, goal_state))}_{digest}")
+
+_agents = OrderedDict() # (goal_state, mode) -> QLearningAgent, theo thứ tự dùng gần nhất
+
+def get_agent(goal_state, mode="episodes"):
+    """
+    Lấy agent cho goal_state và chế độ huấn luyện từ LRU; nạp lười Q-table của
+    chế độ đó từ đĩa (nếu có model) ở lần đầu. Bảng chính sách chỉ được nạp khi
+    solve chạy mode="value_iteration".
+    """
+    goal_state = tuple(goal_state); cache_key = (goal_state, mode)
+    agent = _agents.get(cache_key)
+    if agent is not None:
+        _agents.move_to_end(cache_key)
+        return agent
+    agent = QLearningAgent(goal_state=goal_state)
+    path = model_path(goal_state, mode)
+    if os.path.exists(path):
+        try: agent.load(path)
+        except (OSError, ValueError): pass # File hỏng/khác định dạng: huấn luyện lại
+    _agents[cache_key] = agent
+    if len(_agents) > MAX_CACHED_AGENTS: _agents.popitem(last=False)
+    return agent
+
+def solve(start_state, goal_state, verbose=False, mode="episodes"):
+    """
+    Solves 8-puzzle using Q-Learning.
+    Dùng model đã lưu nếu chính sách của nó đã dẫn tới đích; nếu chưa, huấn luyện
+    thêm từ start_state rồi lưu lại model. Trả về (path, số cập nhật Q trong lần gọi này).
+    mode: "episodes" (từng episode một), "batched" (train_batched), "curriculum"
+    (train_curriculum: từ gần đích ra xa, kèm replay ưu tiên) hoặc
+    "value_iteration" (lập kế hoạch toàn bộ không gian bằng plan(), lưu bảng
+    chính sách ra đĩa; lời giải luôn tồn tại nếu start cùng lớp chẵn lẻ với goal).
+    """
+    goal_state = tuple(goal_state); start_state = tuple(start_state)
+    agent = get_agent(goal_state, mode)
+    if mode == "value_iteration":
+        backups = 0
+        if agent.policy is None and os.path.exists(f"{plan_path(goal_state)}.policy.npy"):
+            try: agent.load_plan(plan_path(goal_state))
+            except (OSError, ValueError): agent.policy = agent.values = None
+        if agent.policy is None:
+            backups = agent.plan()
+            try: agent.save_plan(plan_path(goal_state))
+            except OSError as e: print(f"Q-Learning: could not save plan: {e}")
+        path = agent.get_policy_path(start_state, use_plan=True)
+        return (path, backups) if path else (None, backups)
+    path = agent.get_policy_path(start_state)
+    nodes_before = agent.nodes_expanded_during_training
+    if path is None and agent.index_of(start_state) is not None:
+        if mode == "curriculum": agent.train_curriculum(start_state, alpha=MODE_ALPHAS[mode], verbose=verbose)
+        elif mode == "batched":
+            for _ in range(BATCHED_ROUNDS):
+                agent.train_batched([start_state], alpha=MODE_ALPHAS[mode], verbose=verbose)
+                if agent.get_policy_path(start_state) is not None: break
+        else: agent.train(start_state_initial=start_state, verbose=verbose)
+        try: agent.save(model_path(goal_state, mode))
+        except OSError as e: print(f"Q-Learning: could not save model: {e}")
+        path = agent.get_policy_path(start_state)
+    nodes_exp = agent.nodes_expanded_during_training - nodes_before
     return (path, nodes_exp) if path else (None, nodes_exp)
 
 if __name__ == '__main__':
     test_start = (1, 8, 2, 9, 4, 3, 7, 6, 5); test_goal = (1, 2, 3, 4, 5, 6, 7, 8, 9)
-    solution, nodes = solve(test_start, test_goal)
+    solution, nodes = solve(test_start, test_goal, verbose=True)
     if solution: print("Path:", solution, "Nodes (training):", nodes)
     else: print("No solution. Nodes (training):", nodes)
\ No newline at end of file
@@ -0,0 +1,105 @@
+# algorithms/restart_pool.py
+import multiprocessing as mp
+import os
+import random
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+
+class ScoreCache:
+    """
+    Bộ nhớ đệm điểm heuristic của một tiến trình: dict khóa là chính tuple
+    trạng thái. Tra dict chỉ cần băm tuple, nhanh hơn nhiều so với tính lại
+    Manhattan (hay tính rank) bằng Python thuần. Bộ đệm không dùng chung giữa
+    các tiến trình: mỗi worker của pool tự dựng một ScoreCache rỗng.
+    """
+
+    def __init__(self, heuristic, goal_state):
+        self.heuristic = heuristic
+        self.goal_state = goal_state
+        self.values = {}
+
+    def __call__(self, state):
+        value = self.values.get(state)
+        if value is None:
+            value = self.heuristic(state, self.goal_state)
+            self.values[state] = value
+        return value
+
+
+_score = None
+_stop_event = None
+
+
+def _init_worker(heuristic, goal_state, stop_event):
+    global _score, _stop_event
+    _score = ScoreCache(heuristic, goal_state)
+    _stop_event = stop_event
+
+
+def _run_restart(climb, start_state, goal_state, seed, kwargs):
+    if _stop_event.is_set():
+        return None
+    return climb(start_state, goal_state, _score, random.Random(seed), **kwargs)
+
+
+def _better(best, path, score):
+    if best is None or score(path[-1]) < score(best[-1]):
+        return path
+    return best
+
+
+def run_restarts(climb, start_state, goal_state, heuristic, max_restarts, workers=1, seed=None, **kwargs):
+    """
+    Chạy max_restarts lần leo đồi độc lập từ start_state.
+
+    climb(start_state, goal_state, score, rng, **kwargs) thực hiện một lần leo
+    và trả về đường đi; score là ScoreCache, rng là random.Random riêng của lần
+    chạy đó. Mặc định chạy tuần tự trong tiến trình hiện tại: mỗi lần leo của
+    8-Puzzle chỉ mất vài mili giây, rẻ hơn chi phí dựng tiến trình. Với
+    workers > 1 (None = số lõi CPU), các lần chạy được phân cho một
+    ProcessPoolExecutor dùng ngữ cảnh "spawn" (an toàn khi được gọi từ luồng
+    nền của giao diện pygame); khi một lần chạy tới đích, các lần chưa bắt đầu
+    bị hủy.
+
+    Lưu ý: các solver leo đồi và giao diện (main.py gọi solve với tham số mặc
+    định) vì vậy chỉ dùng một lõi; chạy nhiều lõi phải bật rõ bằng workers.
+
+    Returns:
+        list: Đường đi tới đích nếu có, ngược lại là đường đi kết thúc ở
+              trạng thái có heuristic nhỏ nhất (None nếu max_restarts = 0).
+    """
+    start_state = tuple(start_state)
+    goal_state = tuple(goal_state)
+    workers = min(workers or os.cpu_count() or 1, max_restarts)
+    base_seed = random.randrange(2**32) if seed is None else seed
+    best = None
+
+    if workers <= 1:
+        score = ScoreCache(heuristic, goal_state)
+        for restart in range(max_restarts):
+            path = climb(start_state, goal_state, score, random.Random(base_seed + restart), **kwargs)
+            if path[-1] == goal_state:
+                return path
+            best = _better(best, path, score)
+        return best
+
+    ctx = mp.get_context("spawn")
+    stop_event = ctx.Event()
+    score = ScoreCache(heuristic, goal_state)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                             initializer=_init_worker, initargs=(heuristic, goal_state, stop_event)) as pool:
+        pending = {pool.submit(_run_restart, climb, start_state, goal_state, base_seed + restart, kwargs)
+                   for restart in range(max_restarts)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                path = future.result()
+                if path is None:
+                    continue
+                if path[-1] == goal_state:
+                    stop_event.set()
+                    for other in pending:
+                        other.cancel()
+                    return path
+                best = _better(best, path, score)
+    return best
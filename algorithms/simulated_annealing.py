@@ -2,7 +2,10 @@
 import random
 import math
 
-def solve(start, goal, initial_temperature=100, cooling_rate=0.003):
+from .annealing_schedules import GeometricSchedule, calibrate_initial_temperature, make_schedule
+
+def solve(start, goal, initial_temperature=100, cooling_rate=0.003, num_chains=0,
+          schedule=None, max_iterations=20000, stats=None):
     """
     Giải 8-Puzzle bằng thuật toán Simulated Annealing.
 
@@ -11,11 +14,21 @@ def solve(start, goal, initial_temperature=100, cooling_rate=0.003):
         goal (tuple): Trạng thái đích của puzzle.
         initial_temperature (float): Nhiệt độ ban đầu.
         cooling_rate (float): Tốc độ làm mát (giảm nhiệt độ).
+        num_chains (int): Nếu > 0, chạy parallel tempering với số chuỗi này
+            (xem parallel_tempering.solve).
+        schedule (str | Schedule): Lịch làm mát ('geometric', 'lam', 'reheat',
+            'lam_reheat' hoặc đối tượng Schedule). None giữ lịch cấp số nhân với
+            initial_temperature và cooling_rate; các lịch theo tên tự ước lượng T0.
+        max_iterations (int): Số lần lặp cho các lịch theo ngân sách (Lam).
+        stats (dict): Nếu truyền vào, được điền số lần lặp, tỉ lệ chấp nhận, ...
 
     Returns:
         list: Danh sách các trạng thái từ trạng thái ban đầu đến trạng thái đích (nếu tìm thấy),
               hoặc None nếu không tìm thấy giải pháp.
     """
+    if num_chains > 0:
+        from .parallel_tempering import solve as solve_parallel
+        return solve_parallel(start, goal, num_chains=num_chains)
 
     def get_neighbors(state):
         """Tìm các trạng thái kế cận của một trạng thái."""
@@ -44,13 +57,20 @@ def solve(start, goal, initial_temperature=100, cooling_rate=0.003):
                 distance += abs(row1 - row2) + abs(col1 - col2)
         return distance
 
+    if schedule is None:
+        schedule = GeometricSchedule(initial_temperature, cooling_rate)
+    else:
+        schedule = make_schedule(schedule, max_iterations)
+    schedule.start(schedule.initial_temperature or calibrate_initial_temperature(start, get_neighbors, heuristic))
+
     current_state = start
     path = [current_state]
     current_heuristic = heuristic(current_state)
-    temperature = initial_temperature
 
     while current_state != goal:
-        if temperature <= 0.0001:  # Dừng khi nhiệt độ quá thấp
+        if schedule.finished():  # Dừng khi nhiệt độ quá thấp hoặc hết ngân sách
+            if stats is not None:
+                stats.update(schedule.stats())
             return None
 
         neighbors = get_neighbors(current_state)
@@ -62,12 +82,15 @@ def solve(start, goal, initial_temperature=100, cooling_rate=0.003):
         delta_e = next_heuristic - current_heuristic
 
         # Chấp nhận trạng thái tốt hơn hoặc trạng thái xấu hơn với xác suất nhất định
-        if delta_e < 0 or random.random() < math.exp(-delta_e / temperature):
+        accepted = delta_e < 0 or random.random() < math.exp(-delta_e / schedule.temperature)
+        if accepted:
             current_state = next_state
             path.append(current_state)
             current_heuristic = next_heuristic
 
         # Làm mát hệ thống
-        temperature *= (1 - cooling_rate)
+        schedule.update(accepted, current_heuristic)
 
-    return path
\ No newline at end of file
+    if stats is not None:
+        stats.update(schedule.stats())
+    return path
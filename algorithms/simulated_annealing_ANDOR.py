@@ -2,6 +2,8 @@ import random
 import math
 from typing import List, Tuple, Optional, Set, Dict
 
+from .annealing_schedules import GeometricSchedule, calibrate_initial_temperature, make_schedule
+
 State = Tuple[int, ...]
 
 def manhattan_distance(state: State, goal_state: State) -> int:
@@ -51,7 +53,8 @@ def get_neighbors_with_double_moves(state: State) -> List[State]:
     return list(neighbors)
 # --- Kết thúc hàm get_neighbors_with_double_moves ---
 
-def solve(start_state: State, goal_state: State, initial_temperature=100.0, cooling_rate=0.005, min_temperature=0.1, max_iterations=50000) -> Optional[List[State]]:
+def solve(start_state: State, goal_state: State, initial_temperature=100.0, cooling_rate=0.005, min_temperature=0.1, max_iterations=50000, num_chains=0,
+          schedule=None, stats: Optional[dict] = None) -> Optional[List[State]]:
     """
     Giải 8-Puzzle bằng Simulated Annealing với di chuyển kép.
 
@@ -62,6 +65,11 @@ def solve(start_state: State, goal_state: State, initial_temperature=100.0, cool
         cooling_rate (float): Tốc độ làm mát (giảm nhiệt độ).
         min_temperature (float): Nhiệt độ dừng tối thiểu.
         max_iterations (int): Số lần lặp tối đa.
+        num_chains (int): Nếu > 0, chạy parallel tempering với số chuỗi này
+            (xem parallel_tempering.solve).
+        schedule (str | Schedule): Lịch làm mát ('geometric', 'lam', 'reheat',
+            'lam_reheat' hoặc đối tượng Schedule). None giữ lịch cấp số nhân cũ.
+        stats (dict): Nếu truyền vào, được điền số lần lặp, tỉ lệ chấp nhận, ...
 
     Returns:
         list: Danh sách các trạng thái trên đường đi (có thể không tối ưu) nếu tìm thấy đích,
@@ -70,6 +78,10 @@ def solve(start_state: State, goal_state: State, initial_temperature=100.0, cool
     start_state = tuple(start_state)
     goal_state = tuple(goal_state)
 
+    if num_chains > 0:
+        from .parallel_tempering import solve as solve_parallel
+        return solve_parallel(start_state, goal_state, num_chains=num_chains, double_moves=True)
+
     current_state = start_state
     current_heuristic = manhattan_distance(current_state, goal_state)
 
@@ -83,17 +95,23 @@ def solve(start_state: State, goal_state: State, initial_temperature=100.0, cool
     best_heuristic = current_heuristic
     path = [current_state] # Lưu trữ đường đi dẫn đến trạng thái *hiện tại*
 
-    temperature = initial_temperature
+    if schedule is None:
+        schedule = GeometricSchedule(initial_temperature, cooling_rate, min_temperature)
+    else:
+        schedule = make_schedule(schedule, max_iterations)
+    energy = lambda state: manhattan_distance(state, goal_state)
+    schedule.start(schedule.initial_temperature
+                   or calibrate_initial_temperature(start_state, get_neighbors_with_double_moves, energy))
     iterations = 0
 
-    while temperature > min_temperature and iterations < max_iterations:
+    while not schedule.finished() and iterations < max_iterations:
         iterations += 1
 
         if current_state == goal_state:
             # print(f"SA (Double): Found goal after {iterations} iterations.")
             # Cần xây dựng lại đường đi dẫn đến đích nếu chỉ lưu best_state
             # Nếu path lưu đường đi hiện tại thì trả về path là hợp lý
-            return path
+            break
 
         # Lấy hàng xóm (bao gồm di chuyển kép)
         neighbors = get_neighbors_with_double_moves(current_state)
@@ -113,7 +131,8 @@ def solve(start_state: State, goal_state: State, initial_temperature=100.0, cool
 
         # Quyết định chấp nhận trạng thái mới
         # Chấp nhận nếu tốt hơn (delta_e < 0) hoặc theo xác suất Boltzmann
-        if delta_e < 0 or random.random() < math.exp(-delta_e / temperature):
+        accepted = delta_e < 0 or random.random() < math.exp(-delta_e / schedule.temperature)
+        if accepted:
             current_state = next_state
             current_heuristic = next_heuristic
             path.append(current_state) # Thêm trạng thái mới vào đường đi hiện tại
@@ -125,10 +144,13 @@ def solve(start_state: State, goal_state: State, initial_temperature=100.0, cool
                 # print(f"SA Iter {iterations}, Temp {temperature:.2f}: New best score {best_heuristic}")
 
         # Giảm nhiệt độ
-        temperature *= (1 - cooling_rate)
+        schedule.update(accepted, current_heuristic)
+
+    if stats is not None:
+        stats.update(schedule.stats())
 
     # Kết thúc vòng lặp (nhiệt độ quá thấp hoặc đạt max_iterations)
-    # print(f"SA (Double): Finished after {iterations} iterations. Temp: {temperature:.4f}")
+    # print(f"SA (Double): Finished after {iterations} iterations. Temp: {schedule.temperature:.4f}")
     if best_state == goal_state:
          # Nếu trạng thái tốt nhất là đích, cần xây dựng lại đường đi tới nó
          # Việc lưu `path` theo `current_state` có thể không dẫn đến `best_state`
@@ -0,0 +1,142 @@
+# algorithms/state_sampler.py
+import random
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .multi_goal import goal_distances
+from .puzzle_index import BLANK, HALF_STATES, parity_of, rank, unrank
+from .puzzle_tables import state_table
+
+State = Tuple[int, ...]
+Predicate = Callable[[State], bool]
+
+# Số tập ứng viên (theo khoảng độ sâu + fixed_cells) mỗi sampler giữ lại.
+MAX_CACHED_CANDIDATES = 16
+
+
+@lru_cache(maxsize=8)
+def _depth_index(goal_ranks: Tuple[int, ...]) -> Tuple[np.ndarray, np.ndarray]:
+    distances = goal_distances(unrank(r) for r in goal_ranks)
+    reachable = np.flatnonzero(distances >= 0).astype(np.int32)
+    order = reachable[np.argsort(distances[reachable], kind="stable")]
+    starts = np.searchsorted(distances[order], np.arange(int(distances.max()) + 2))
+    return order, starts
+
+
+class StateSampler:
+    """
+    Sinh trạng thái giải được (tới được ít nhất một đích trong goal_states).
+
+    - uniform(): unrank một rank ngẫu nhiên trong lớp chẵn lẻ giải được; với
+      fixed_cells, xếp ngẫu nhiên các ô còn tự do rồi sửa tính chẵn lẻ bằng
+      cách đổi chỗ hai ô tự do nếu cần. Phân phối đều, O(1) mỗi trạng thái
+      (không lấy mẫu loại bỏ).
+    - at_depth(d) / in_depths(lo, hi): lấy đều trong các trạng thái có khoảng
+      cách tối ưu tới đích gần nhất đúng bằng d, nhờ chỉ mục độ sâu (rank sắp
+      theo độ sâu, tính một lần bằng BFS đa nguồn và dùng chung theo tập đích).
+
+    fixed_cells là dict {vị trí: giá trị ô}; predicate là ràng buộc tùy ý, được
+    kiểm tra bằng lấy mẫu loại bỏ (tối đa max_attempts lần mỗi trạng thái).
+    """
+
+    def __init__(self, goal_states: Iterable[State], seed: Optional[int] = None, max_attempts: int = 1000):
+        self.goal_states = [tuple(goal) for goal in goal_states]
+        if not self.goal_states:
+            raise ValueError("Goal set is empty")
+        self.goal_ranks = tuple(sorted({rank(goal) for goal in self.goal_states}))
+        self.parities = {parity_of(goal) for goal in self.goal_states}
+        self.rng = random.Random(seed)
+        self.max_attempts = max_attempts
+        self._candidates = OrderedDict()  # (min_depth, max_depth, fixed_cells) -> mảng rank, LRU
+
+    def depth_index(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(order, starts): order[starts[d]:starts[d + 1]] là các rank có độ sâu d."""
+        return _depth_index(self.goal_ranks)
+
+    @property
+    def max_depth(self) -> int:
+        return len(self.depth_index()[1]) - 2
+
+    def uniform(self, count: int = 1, fixed_cells: Optional[Dict[int, int]] = None,
+                predicate: Optional[Predicate] = None) -> List[State]:
+        if not fixed_cells:
+            return self._draw(lambda: unrank(self.uniform_rank()), count, predicate)
+        free_cells = [cell for cell in range(9) if cell not in fixed_cells]
+        free_tiles = [tile for tile in range(1, 10) if tile not in fixed_cells.values()]
+        if len(free_cells) != len(free_tiles):
+            raise ValueError(f"Invalid fixed cells: {fixed_cells}")
+        if len(self.parities) == 1 and sum(1 for tile in free_tiles if tile != BLANK) < 2:
+            raise ValueError("Fixed cells leave no two tiles to fix the parity")
+
+        def draw():
+            tiles = free_tiles[:]
+            self.rng.shuffle(tiles)
+            state = [0] * 9
+            for cell, tile in fixed_cells.items():
+                state[cell] = tile
+            for cell, tile in zip(free_cells, tiles):
+                state[cell] = tile
+            if parity_of(state) not in self.parities:
+                # Đổi chỗ hai ô tự do khác ô trống: song ánh giữa hai lớp chẵn lẻ,
+                # nên phân phối vẫn đều.
+                first, second = [cell for cell in free_cells if state[cell] != BLANK][:2]
+                state[first], state[second] = state[second], state[first]
+            return tuple(state)
+
+        return self._draw(draw, count, predicate)
+
+    def at_depth(self, depth: int, count: int = 1, fixed_cells: Optional[Dict[int, int]] = None,
+                 predicate: Optional[Predicate] = None) -> List[State]:
+        return self.in_depths(depth, depth, count, fixed_cells, predicate)
+
+    def in_depths(self, min_depth: int, max_depth: int, count: int = 1,
+                  fixed_cells: Optional[Dict[int, int]] = None,
+                  predicate: Optional[Predicate] = None) -> List[State]:
+        """Lấy đều trong các trạng thái có độ sâu tối ưu thuộc [min_depth, max_depth]."""
+        order, starts = self.depth_index()
+        min_depth = max(0, min_depth)
+        max_depth = min(max_depth, len(starts) - 2)
+        if min_depth > max_depth:
+            return []
+        candidates = order[starts[min_depth]:starts[max_depth + 1]]
+        if fixed_cells:
+            candidates = self._filtered(candidates, min_depth, max_depth, fixed_cells)
+        if candidates.size == 0:
+            return []
+        return self._draw(lambda: unrank(int(candidates[self.rng.randrange(candidates.size)])), count, predicate)
+
+    def _filtered(self, candidates: np.ndarray, min_depth: int, max_depth: int,
+                  fixed_cells: Dict[int, int]) -> np.ndarray:
+        """Các rank trong candidates khớp fixed_cells; lọc một lần rồi giữ trong LRU."""
+        key = (min_depth, max_depth, frozenset(fixed_cells.items()))
+        filtered = self._candidates.get(key)
+        if filtered is not None:
+            self._candidates.move_to_end(key)
+            return filtered
+        states = state_table()
+        mask = np.ones(candidates.size, dtype=bool)
+        for cell, tile in fixed_cells.items():
+            mask &= states[candidates, cell] == tile
+        filtered = candidates[mask]
+        self._candidates[key] = filtered
+        if len(self._candidates) > MAX_CACHED_CANDIDATES:
+            self._candidates.popitem(last=False)
+        return filtered
+
+    def _draw(self, draw: Callable[[], State], count: int, predicate: Optional[Predicate]) -> List[State]:
+        samples = []
+        for _ in range(count):
+            for _ in range(self.max_attempts):
+                state = draw()
+                if predicate is None or predicate(state):
+                    samples.append(state)
+                    break
+        return samples
+
+    def uniform_rank(self) -> int:
+        """Rank ngẫu nhiên đều trong các lớp chẵn lẻ giải được (không ràng buộc)."""
+        parity = self.rng.choice(sorted(self.parities))
+        return parity * HALF_STATES + self.rng.randrange(HALF_STATES)
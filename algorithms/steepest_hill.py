@@ -1,4 +1,4 @@
-import random
+from .restart_pool import run_restarts
 
 def manhattan_distance(state, goal_state):
     total = 0
@@ -39,80 +39,59 @@ def is_solvable(state, goal_state=(1, 2, 3, 4, 5, 6, 7, 8, 9)):
     parity_blank = (blank_row_state - blank_row_goal) % 2
     return parity_state == parity_blank
 
-def solve(start_state, goal_state, max_iterations=1000, max_restarts=50):
-    if not is_solvable(start_state, goal_state):
-        return None
+def climb(start_state, goal_state, score, rng, max_iterations=1000):
+    """Một lần leo dốc nhất từ start_state, trả về đường đi (có thể chưa tới đích)."""
+    current_state = start_state
+    current_score = score(current_state)
+    path = [current_state]
+    visited = set([current_state])
     
-    best_state_overall = start_state
-    best_score_overall = manhattan_distance(start_state, goal_state)
-    overall_path = []
+    iterations = 0
+    stuck_count = 0
     
-    for restart in range(max_restarts):
-        if restart == 0:
-            current_state = start_state
-        else:
-            if random.random() < 0.7 and best_score_overall < manhattan_distance(start_state, goal_state):
-                current_state = best_state_overall
-            else:
-                current_state = start_state
+    while current_state != goal_state and iterations < max_iterations:
+        iterations += 1
+        neighbors = get_neighbors(current_state)
+        neighbor_scores = [(neighbor, score(neighbor)) for neighbor in neighbors if neighbor not in visited]
         
-        current_score = manhattan_distance(current_state, goal_state)
-        path = [current_state]
-        visited = set([current_state])
-        
-        iterations = 0
-        stuck_count = 0
-        
-        while current_state != goal_state and iterations < max_iterations:
-            iterations += 1
-            neighbors = get_neighbors(current_state)
+        neighbor_scores.sort(key=lambda x: x[1])
+        if neighbor_scores:
+            best_neighbor, best_neighbor_score = neighbor_scores[0]
+        else:
             best_neighbor = None
             best_neighbor_score = float('inf')
-            neighbor_scores = []
-            
-            for neighbor in neighbors:
-                if neighbor not in visited:
-                    score = manhattan_distance(neighbor, goal_state)
-                    neighbor_scores.append((neighbor, score))
-            
-            neighbor_scores.sort(key=lambda x: x[1])
-            if neighbor_scores:
-                best_neighbor, best_neighbor_score = neighbor_scores[0]
-            else:
-                best_neighbor = None
-                best_neighbor_score = float('inf')
-            
-            if best_neighbor is None or best_neighbor_score >= current_score:
-                stuck_count += 1
-                if stuck_count >= 3:
-                    break
-                unvisited_neighbors = [n for n in neighbors if n not in visited]
-                if unvisited_neighbors:
-                    best_neighbor = random.choice(unvisited_neighbors)
-                    best_neighbor_score = manhattan_distance(best_neighbor, goal_state)
-                else:
-                    break
+        
+        if best_neighbor is None or best_neighbor_score >= current_score:
+            stuck_count += 1
+            if stuck_count >= 3:
+                break
+            unvisited_neighbors = [n for n in neighbors if n not in visited]
+            if unvisited_neighbors:
+                best_neighbor = rng.choice(unvisited_neighbors)
+                best_neighbor_score = score(best_neighbor)
             else:
-                stuck_count = 0
-            
-            current_state = best_neighbor
-            current_score = best_neighbor_score
-            path.append(current_state)
-            visited.add(current_state)
-            
-            if current_score < best_score_overall:
-                best_state_overall = current_state
-                best_score_overall = current_score
-            
-            if current_state == goal_state:
-                return path
+                break
+        else:
+            stuck_count = 0
         
-        if path[-1] != path[0]:
-            if not overall_path:
-                overall_path = path
-            elif manhattan_distance(path[-1], goal_state) < manhattan_distance(overall_path[-1], goal_state):
-                overall_path = path
+        current_state = best_neighbor
+        current_score = best_neighbor_score
+        path.append(current_state)
+        visited.add(current_state)
+    
+    return path
+
+def solve(start_state, goal_state, max_iterations=1000, max_restarts=50, workers=1):
+    """
+    Steepest-ascent hill climbing với khởi động lại ngẫu nhiên qua
+    restart_pool.run_restarts: tuần tự theo mặc định (workers=1), song song
+    khi workers > 1 hoặc workers=None (mọi lõi CPU).
+    """
+    if not is_solvable(start_state, goal_state):
+        return None
     
-    if overall_path and len(overall_path) > 1:
-        return overall_path
-    return None
\ No newline at end of file
+    path = run_restarts(climb, start_state, goal_state, manhattan_distance, max_restarts,
+                        workers, max_iterations=max_iterations)
+    if path and (path[-1] == tuple(goal_state) or len(path) > 1):
+        return path
+    return None
@@ -1,6 +1,8 @@
 import random
 from typing import List, Tuple, Optional, Set, Dict
 
+from .restart_pool import run_restarts
+
 State = Tuple[int, ...]
 
 def manhattan_distance(state: State, goal_state: State) -> int:
@@ -66,10 +68,50 @@ def is_solvable(state, goal_state=(1, 2, 3, 4, 5, 6, 7, 8, 9)):
         return (inversions % 2) == (goal_inversions % 2)
     except: return False
 
-def solve(start_state: State, goal_state: State, max_iterations=1000, max_restarts=50) -> Optional[List[State]]:
+def climb(start_state: State, goal_state: State, score, rng: random.Random, max_iterations=1000) -> List[State]:
+    """
+    Một lần Steepest Ascent Hill Climbing (có di chuyển kép) từ start_state.
+    Luôn chọn nước đi có cải thiện heuristic lớn nhất; dừng khi bị kẹt.
+    """
+    current_state = start_state
+    current_score = score(current_state)
+    path = [current_state]
+    local_visited = {current_state} # Tránh vòng lặp cục bộ
+
+    iterations = 0
+    while current_state != goal_state and iterations < max_iterations:
+        iterations += 1
+        # Lấy hàng xóm (bao gồm di chuyển kép)
+        neighbors = get_neighbors_with_double_moves(current_state)
+        # Khởi tạo điểm tốt nhất bằng điểm hiện tại để chỉ chấp nhận cải thiện
+        best_neighbor = None
+        best_neighbor_score = current_score
+
+        # Tìm hàng xóm có điểm heuristic thấp nhất (cải thiện nhiều nhất)
+        for neighbor in neighbors:
+             if neighbor not in local_visited:
+                  neighbor_score = score(neighbor)
+                  if neighbor_score < best_neighbor_score:
+                       best_neighbor, best_neighbor_score = neighbor, neighbor_score
+
+        if best_neighbor is None:
+             # Không tìm thấy hàng xóm nào tốt hơn -> Bị kẹt ở local optimum/plateau
+             break # Dừng lần chạy này
+
+        # Di chuyển đến trạng thái tốt nhất tìm được
+        current_state = best_neighbor
+        current_score = best_neighbor_score
+        path.append(current_state)
+        local_visited.add(current_state)
+
+    return path
+
+def solve(start_state: State, goal_state: State, max_iterations=1000, max_restarts=50,
+          workers: Optional[int] = 1) -> Optional[List[State]]:
     """
     Giải 8-Puzzle bằng Steepest Ascent Hill Climbing với di chuyển kép.
-    Luôn chọn nước đi có cải thiện heuristic lớn nhất.
+    Các lần khởi động lại chạy qua restart_pool.run_restarts: tuần tự theo
+    mặc định, song song khi workers > 1 (None = mọi lõi CPU).
     """
     start_state = tuple(start_state)
     goal_state = tuple(goal_state)
@@ -78,76 +120,9 @@ def solve(start_state: State, goal_state: State, max_iterations=1000, max_restar
         print("Steepest Hill (Double): Trạng thái không giải được.")
         return None
 
-    best_state_overall = start_state
-    best_score_overall = manhattan_distance(start_state, goal_state)
-    overall_path = []
-
-    for restart in range(max_restarts):
-        if restart == 0:
-            current_state = start_state
-        else:
-            if random.random() < 0.7 and best_score_overall < manhattan_distance(start_state, goal_state):
-                 current_state = best_state_overall
-            else:
-                 current_state = start_state
-
-        current_score = manhattan_distance(current_state, goal_state)
-        path = [current_state]
-        local_visited = {current_state} # Tránh vòng lặp cục bộ
-
-        iterations = 0
-        while current_state != goal_state and iterations < max_iterations:
-            iterations += 1
-            # Lấy hàng xóm (bao gồm di chuyển kép)
-            neighbors = get_neighbors_with_double_moves(current_state)
-            best_neighbor = None
-            # Khởi tạo điểm tốt nhất bằng điểm hiện tại để chỉ chấp nhận cải thiện
-            best_neighbor_score = current_score
-
-            # Tìm hàng xóm có điểm heuristic thấp nhất (cải thiện nhiều nhất)
-            candidates = []
-            for neighbor in neighbors:
-                 if neighbor not in local_visited:
-                      score = manhattan_distance(neighbor, goal_state)
-                      # Chỉ xem xét những hàng xóm thực sự tốt hơn
-                      if score < best_neighbor_score:
-                           candidates.append((neighbor, score))
-
-            if candidates:
-                 # Sắp xếp các ứng viên tốt hơn và chọn cái tốt nhất (steepest ascent)
-                 candidates.sort(key=lambda x: x[1])
-                 best_neighbor, best_neighbor_score = candidates[0]
-            else:
-                 # Không tìm thấy hàng xóm nào tốt hơn -> Bị kẹt ở local optimum/plateau
-                 break # Dừng lần chạy này
-
-            # Di chuyển đến trạng thái tốt nhất tìm được
-            current_state = best_neighbor
-            current_score = best_neighbor_score
-            path.append(current_state)
-            local_visited.add(current_state)
-
-            # Cập nhật trạng thái/điểm tốt nhất toàn cục
-            if current_score < best_score_overall:
-                best_state_overall = current_state
-                best_score_overall = current_score
-
-            # Kiểm tra mục tiêu
-            if current_state == goal_state:
-                # print(f"Steepest Hill (Double): Found goal in restart {restart+1}.")
-                return path
-
-        # Cập nhật đường đi tổng thể nếu lần chạy này tốt hơn
-        if current_state != goal_state and path:
-             if not overall_path or current_score < manhattan_distance(overall_path[-1], goal_state):
-                  overall_path = path
-
-    # Sau tất cả các lần khởi động lại
-    if best_score_overall == 0 and overall_path and overall_path[-1] == goal_state:
-        return overall_path
-    elif best_score_overall == 0 and not overall_path:
-        return [start_state] # start == goal
-    else:
-        # print(f"Steepest Hill (Double): Did not reach goal. Best score: {best_score_overall}")
-        # return overall_path # Có thể trả về đường đi tốt nhất dù không phải đích
-        return None # Hoặc chỉ trả về None nếu không đạt đích
+    path = run_restarts(climb, start_state, goal_state, manhattan_distance, max_restarts,
+                        workers, max_iterations=max_iterations)
+    if path and path[-1] == goal_state:
+        return path
+    # print(f"Steepest Hill (Double): Did not reach goal.")
+    return None
@@ -1,6 +1,7 @@
-import random
 import math
 
+from .restart_pool import run_restarts
+
 def manhattan_distance(state, goal_state):
     total = 0
     for i in range(9):
@@ -27,11 +28,11 @@ def get_neighbors(state):
             neighbors.append(tuple(new_s))
     return neighbors
 
-def solve(start_state, goal_state, max_iterations=10000, temperature=10.0, cooling_rate=0.995):
+def climb(start_state, goal_state, score, rng, max_iterations=10000, temperature=10.0, cooling_rate=0.995):
+    """Một lần leo đồi ngẫu nhiên từ start_state, trả về đường đi (có thể chưa tới đích)."""
     current_state = start_state
-    current_score = manhattan_distance(current_state, goal_state)
+    current_score = score(current_state)
     path = [current_state]
-    visited = set([current_state])
     iterations = 0
     current_temp = temperature
     
@@ -44,14 +45,13 @@ def solve(start_state, goal_state, max_iterations=10000, temperature=10.0, cooli
         neighbors = get_neighbors(current_state)
         if not neighbors:
             break
-        next_state = random.choice(neighbors)
-        next_score = manhattan_distance(next_state, goal_state)
+        next_state = rng.choice(neighbors)
+        next_score = score(next_state)
         delta = current_score - next_score
-        if delta > 0 or random.random() < math.exp(delta / current_temp):
+        if delta > 0 or rng.random() < math.exp(delta / current_temp):
             current_state = next_state
             current_score = next_score
             path.append(current_state)
-            visited.add(current_state)
             if current_score < best_score:
                 best_state = current_state
                 best_score = current_score
@@ -65,8 +65,18 @@ def solve(start_state, goal_state, max_iterations=10000, temperature=10.0, cooli
             current_score = best_score
             current_temp = temperature * 0.5
             no_improvement_count = 0
-        
-        if current_state == goal_state:
-            return path
     
-    return None
\ No newline at end of file
+    return path
+
+def solve(start_state, goal_state, max_iterations=10000, temperature=10.0, cooling_rate=0.995,
+          max_restarts=1, workers=1):
+    """
+    Leo đồi ngẫu nhiên. Với max_restarts > 1, các lần chạy độc lập được phân cho
+    restart_pool.run_restarts (tuần tự theo mặc định, song song khi workers > 1)
+    và lần đầu tiên tới đích thắng.
+    """
+    path = run_restarts(climb, start_state, goal_state, manhattan_distance, max_restarts, workers,
+                        max_iterations=max_iterations, temperature=temperature, cooling_rate=cooling_rate)
+    if path and path[-1] == tuple(goal_state):
+        return path
+    return None
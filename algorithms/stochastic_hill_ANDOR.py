@@ -2,6 +2,8 @@ import random
 import math # Không cần math cho stochastic hill climbing đơn giản
 from typing import List, Tuple, Optional, Set, Dict
 
+from .restart_pool import run_restarts
+
 State = Tuple[int, ...]
 
 def manhattan_distance(state: State, goal_state: State) -> int:
@@ -67,10 +69,55 @@ def is_solvable(state, goal_state=(1, 2, 3, 4, 5, 6, 7, 8, 9)):
         return (inversions % 2) == (goal_inversions % 2)
     except: return False
 
-def solve(start_state: State, goal_state: State, max_iterations=10000, max_restarts=20) -> Optional[List[State]]:
+def climb(start_state: State, goal_state: State, score, rng: random.Random, max_iterations=10000) -> List[State]:
+    """
+    Một lần Stochastic Hill Climbing (có di chuyển kép) từ start_state:
+    chọn ngẫu nhiên trong số các hàng xóm tốt hơn.
+    """
+    current_state = start_state
+    current_score = score(current_state)
+    path = [current_state]
+    local_visited = {current_state} # Tránh vòng lặp
+
+    iterations = 0
+    stuck_counter = 0
+    while current_state != goal_state and iterations < max_iterations:
+        iterations += 1
+        # Lấy hàng xóm (bao gồm di chuyển kép)
+        neighbors = get_neighbors_with_double_moves(current_state)
+
+        # Tìm tất cả các hàng xóm tốt hơn chưa thăm
+        uphill_neighbors = [n for n in neighbors if n not in local_visited and score(n) < current_score]
+
+        if uphill_neighbors:
+             # Chọn ngẫu nhiên một trong số các hàng xóm tốt hơn
+             next_state = rng.choice(uphill_neighbors)
+             stuck_counter = 0
+        else:
+             # Bị kẹt, không có hàng xóm nào tốt hơn
+             stuck_counter += 1
+             if stuck_counter > 10 : # Thoát nếu bị kẹt quá lâu
+                  break
+             # Thực hiện bước đi ngẫu nhiên để thoát kẹt
+             unvisited = [n for n in neighbors if n not in local_visited]
+             if not unvisited:
+                 break # Không còn nước đi
+             next_state = rng.choice(unvisited)
+
+        # Di chuyển đến trạng thái đã chọn
+        current_state = next_state
+        current_score = score(current_state)
+        path.append(current_state)
+        local_visited.add(current_state)
+
+    return path
+
+def solve(start_state: State, goal_state: State, max_iterations=10000, max_restarts=20,
+          workers: Optional[int] = 1) -> Optional[List[State]]:
     """
     Giải 8-Puzzle bằng Stochastic Hill Climbing với di chuyển kép.
-    Chọn ngẫu nhiên trong số các hàng xóm tốt hơn.
+    Các lần khởi động lại chạy qua restart_pool.run_restarts, tuần tự theo mặc
+    định; truyền workers > 1 (hoặc None = mọi lõi CPU) để chạy song song.
     """
     start_state = tuple(start_state)
     goal_state = tuple(goal_state)
@@ -79,86 +126,9 @@ def solve(start_state: State, goal_state: State, max_iterations=10000, max_resta
         print("Stochastic Hill (Double): Trạng thái không giải được.")
         return None
 
-    best_state_overall = start_state
-    best_score_overall = manhattan_distance(start_state, goal_state)
-    overall_path = []
-
-    for restart in range(max_restarts):
-        if restart == 0:
-            current_state = start_state
-        else:
-             # Khởi động lại ngẫu nhiên hoặc từ điểm tốt nhất
-             if random.random() < 0.6 and best_score_overall < manhattan_distance(start_state, goal_state):
-                 current_state = best_state_overall
-             else:
-                 current_state = start_state # Luôn có thể quay lại trạng thái ban đầu
-
-        current_score = manhattan_distance(current_state, goal_state)
-        path = [current_state]
-        local_visited = {current_state} # Tránh vòng lặp
-
-        iterations = 0
-        stuck_counter = 0
-        while current_state != goal_state and iterations < max_iterations:
-            iterations += 1
-            # Lấy hàng xóm (bao gồm di chuyển kép)
-            neighbors = get_neighbors_with_double_moves(current_state)
-            uphill_neighbors = [] # Danh sách các hàng xóm tốt hơn (heuristic thấp hơn)
-
-            # Tìm tất cả các hàng xóm tốt hơn chưa thăm
-            for neighbor in neighbors:
-                 if neighbor not in local_visited:
-                      neighbor_score = manhattan_distance(neighbor, goal_state)
-                      if neighbor_score < current_score:
-                           uphill_neighbors.append(neighbor)
-
-            next_state = None
-            if uphill_neighbors:
-                 # Chọn ngẫu nhiên một trong số các hàng xóm tốt hơn
-                 next_state = random.choice(uphill_neighbors)
-                 stuck_counter = 0
-            else:
-                 # Bị kẹt, không có hàng xóm nào tốt hơn
-                 stuck_counter += 1
-                 if stuck_counter > 10 : # Thoát nếu bị kẹt quá lâu
-                      break
-                 # Tùy chọn: thực hiện bước đi ngẫu nhiên để thoát kẹt
-                 unvisited = [n for n in neighbors if n not in local_visited]
-                 if unvisited:
-                     next_state = random.choice(unvisited)
-                 else:
-                     break # Không còn nước đi
-
-            if next_state is None:
-                 break
-
-            # Di chuyển đến trạng thái đã chọn
-            current_state = next_state
-            current_score = manhattan_distance(current_state, goal_state)
-            path.append(current_state)
-            local_visited.add(current_state)
-
-            # Cập nhật trạng thái/điểm tốt nhất toàn cục
-            if current_score < best_score_overall:
-                best_state_overall = current_state
-                best_score_overall = current_score
-
-            # Kiểm tra mục tiêu
-            if current_state == goal_state:
-                # print(f"Stochastic Hill (Double): Found goal in restart {restart+1}.")
-                return path
-
-        # Cập nhật đường đi tổng thể nếu lần chạy này tốt hơn
-        if current_state != goal_state and path:
-             if not overall_path or current_score < manhattan_distance(overall_path[-1], goal_state):
-                  overall_path = path
-
-    # Sau tất cả các lần khởi động lại
-    if best_score_overall == 0 and overall_path and overall_path[-1] == goal_state:
-        return overall_path
-    elif best_score_overall == 0 and not overall_path:
-        return [start_state] # start == goal
-    else:
-        # print(f"Stochastic Hill (Double): Did not reach goal. Best score: {best_score_overall}")
-        # return overall_path # Tùy chọn trả về đường đi tốt nhất
-        return None
+    path = run_restarts(climb, start_state, goal_state, manhattan_distance, max_restarts,
+                        workers, max_iterations=max_iterations)
+    if path and path[-1] == goal_state:
+        return path
+    # print(f"Stochastic Hill (Double): Did not reach goal.")
+    return None
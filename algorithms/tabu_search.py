@@ -0,0 +1,122 @@
+# algorithms/tabu_search.py
+from array import array
+
+from .hill_climbing import get_neighbors, manhattan_distance
+from .puzzle_index import rank, unrank
+
+
+class TabuList:
+    """
+    Danh sách tabu kích thước cố định: vòng đệm (ring buffer) các rank trạng
+    thái kèm dict đếm số lần mỗi rank đang nằm trong vòng đệm, nên kiểm tra
+    thành viên là O(1) và bộ nhớ không tăng theo số bước.
+    """
+
+    def __init__(self, tenure):
+        self.ring = array('i', [-1] * tenure)
+        self.counts = {}
+        self.position = 0
+
+    def __contains__(self, state_rank):
+        return state_rank in self.counts
+
+    def push(self, state_rank):
+        evicted = self.ring[self.position]
+        if evicted >= 0:
+            remaining = self.counts[evicted] - 1
+            if remaining:
+                self.counts[evicted] = remaining
+            else:
+                del self.counts[evicted]
+        self.ring[self.position] = state_rank
+        self.counts[state_rank] = self.counts.get(state_rank, 0) + 1
+        self.position = (self.position + 1) % len(self.ring)
+
+
+def strip_cycles(walk):
+    """Bỏ các vòng lặp khỏi dãy rank: khi gặp lại một trạng thái, cắt về lần xuất hiện trước."""
+    path = []
+    index_of = {}
+    for state_rank in walk:
+        seen = index_of.get(state_rank)
+        if seen is not None:
+            for dropped in path[seen + 1:]:
+                del index_of[dropped]
+            del path[seen + 1:]
+        else:
+            index_of[state_rank] = len(path)
+            path.append(state_rank)
+    return path
+
+
+def tabu_search(start_state, goal_state, neighbors, heuristic, tenure=7, max_iterations=5000,
+                frequency_size=0, frequency_weight=0.5):
+    """
+    Tabu search tổng quát trên hàm neighbors/heuristic của họ leo đồi.
+
+    Mỗi bước đi tới hàng xóm có điểm nhỏ nhất không nằm trong danh sách tabu
+    (kể cả khi điểm xấu hơn hiện tại, nên thoát được vùng bằng phẳng). Tiêu
+    chuẩn aspiration: hàng xóm tabu vẫn được chọn nếu tốt hơn điểm tốt nhất
+    từng gặp. Với frequency_size > 0, một mảng đếm băm theo rank (bộ nhớ dài
+    hạn) cộng thêm frequency_weight * số lần ghé vào điểm để đa dạng hóa.
+
+    Returns:
+        list: Đường đi (đã bỏ chu trình) từ start_state tới goal_state, hoặc None.
+    """
+    start_state = tuple(start_state)
+    goal_state = tuple(goal_state)
+    tabu = TabuList(tenure)
+    frequency = bytearray(frequency_size) if frequency_size else None
+
+    current_state = start_state
+    current_rank = rank(current_state)
+    best_score = heuristic(current_state, goal_state)
+    walk = array('I', [current_rank])
+
+    for _ in range(max_iterations):
+        if current_state == goal_state:
+            return [unrank(r) for r in strip_cycles(walk)]
+
+        chosen = None
+        chosen_key = float('inf')
+        fallback = None
+        fallback_score = float('inf')
+        for neighbor in neighbors(current_state):
+            neighbor_rank = rank(neighbor)
+            score = heuristic(neighbor, goal_state)
+            if neighbor_rank in tabu and score >= best_score:
+                if score < fallback_score:
+                    fallback, fallback_score = (neighbor, neighbor_rank, score), score
+                continue
+            key = score
+            if frequency is not None:
+                key += frequency_weight * frequency[neighbor_rank % frequency_size]
+            if key < chosen_key:
+                chosen, chosen_key = (neighbor, neighbor_rank, score), key
+        if chosen is None:
+            # Mọi hàng xóm đều tabu: đi tới hàng xóm tốt nhất trong số đó.
+            chosen = fallback
+        if chosen is None:
+            return None
+
+        tabu.push(current_rank)
+        current_state, current_rank, score = chosen
+        walk.append(current_rank)
+        if frequency is not None:
+            slot = current_rank % frequency_size
+            if frequency[slot] < 255:
+                frequency[slot] += 1
+        best_score = min(best_score, score)
+
+    if current_state == goal_state:
+        return [unrank(r) for r in strip_cycles(walk)]
+    return None
+
+
+def solve(start_state, goal_state, tenure=7, max_iterations=5000, frequency_size=4096):
+    """
+    Giải 8-Puzzle bằng tabu search với di chuyển đơn (dùng get_neighbors và
+    manhattan_distance của hill_climbing).
+    """
+    return tabu_search(start_state, goal_state, get_neighbors, manhattan_distance,
+                       tenure=tenure, max_iterations=max_iterations, frequency_size=frequency_size)
@@ -0,0 +1,16 @@
+# algorithms/tabu_search_ANDOR.py
+from typing import List, Optional, Tuple
+
+from .hill_climbing_ANDOR import get_neighbors_with_double_moves, manhattan_distance
+from .tabu_search import tabu_search
+
+State = Tuple[int, ...]
+
+def solve(start_state: State, goal_state: State, tenure: int = 10, max_iterations: int = 5000,
+          frequency_size: int = 4096) -> Optional[List[State]]:
+    """
+    Giải 8-Puzzle bằng tabu search với di chuyển kép (xem tabu_search.tabu_search).
+    Tenure lớn hơn bản di chuyển đơn vì mỗi trạng thái có nhiều hàng xóm hơn.
+    """
+    return tabu_search(start_state, goal_state, get_neighbors_with_double_moves, manhattan_distance,
+                       tenure=tenure, max_iterations=max_iterations, frequency_size=frequency_size)
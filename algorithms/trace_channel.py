@@ -0,0 +1,129 @@
+# algorithms/trace_channel.py
+import threading
+from collections import deque
+from typing import Any, Callable, List, Optional
+
+
+class ChannelCancelled(Exception):
+    """Bên đọc đã hủy kênh; bên ghi nên dừng công việc."""
+
+
+class TraceChannel:
+    """
+    Kênh một chiều giữa luồng giải (bên ghi) và vòng lặp pygame (bên đọc).
+
+    - put() chặn khi hàng đợi đầy (backpressure, tối đa maxsize phần tử), nên
+      bộ giải không chạy xa hơn giao diện quá nhiều; trả về False nếu kênh đã
+      bị hủy hoặc đóng.
+    - close(result, error) do bên ghi gọi khi xong; bên đọc vẫn lấy hết phần
+      còn lại, `done` chỉ True khi đã đóng VÀ đã rút cạn.
+    - cancel() do bên đọc gọi (thoát / quay lại): xóa hàng đợi, đánh thức bên
+      ghi đang chờ; should_stop() dùng làm điều kiện dừng cho bộ giải.
+    - drain() không chặn, gọi mỗi khung hình để lấy các phần tử đã có.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        if maxsize < 1:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self._items = deque()
+        self._lock = threading.Lock()
+        self._not_full = threading.Condition(self._lock)
+        self._not_empty = threading.Condition(self._lock)
+        self._closed = False
+        self._cancelled = False
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+    # --- Bên ghi ---
+    def put(self, item: Any, timeout: Optional[float] = None) -> bool:
+        with self._not_full:
+            if not self._not_full.wait_for(
+                    lambda: self._cancelled or self._closed or len(self._items) < self.maxsize, timeout):
+                return False
+            if self._cancelled or self._closed:
+                return False
+            self._items.append(item)
+            self._not_empty.notify()
+            return True
+
+    def put_or_raise(self, item: Any) -> None:
+        """Như put(), nhưng ném ChannelCancelled khi kênh bị hủy (để thoát khỏi đệ quy sâu)."""
+        if not self.put(item):
+            raise ChannelCancelled
+
+    def close(self, result: Any = None, error: Optional[BaseException] = None) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self.result = result
+            self.error = error
+            self._not_full.notify_all()
+            self._not_empty.notify_all()
+
+    def should_stop(self) -> bool:
+        return self._cancelled
+
+    # --- Bên đọc ---
+    def drain(self, max_items: Optional[int] = None) -> List[Any]:
+        with self._lock:
+            count = len(self._items) if max_items is None else min(max_items, len(self._items))
+            items = [self._items.popleft() for _ in range(count)]
+            if items:
+                self._not_full.notify_all()
+            return items
+
+    def get(self, timeout: Optional[float] = None) -> Any:
+        """Lấy một phần tử, chờ tối đa timeout giây; None nếu kênh đã xong hoặc hết giờ."""
+        with self._not_empty:
+            self._not_empty.wait_for(lambda: self._items or self._closed or self._cancelled, timeout)
+            if not self._items:
+                return None
+            item = self._items.popleft()
+            self._not_full.notify()
+            return item
+
+    def cancel(self) -> None:
+        with self._lock:
+            self._cancelled = True
+            self._items.clear()
+            self._not_full.notify_all()
+            self._not_empty.notify_all()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    @property
+    def done(self) -> bool:
+        with self._lock:
+            return self._closed and not self._items
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items)
+
+
+def start_producer(channel: TraceChannel, target: Callable[..., Any], *args) -> threading.Thread:
+    """
+    Chạy target(channel, *args) trong một luồng nền. Giá trị trả về của target
+    thành channel.result, ngoại lệ thành channel.error; kênh luôn được đóng.
+    """
+    def run():
+        try:
+            result = target(channel, *args)
+        except ChannelCancelled:
+            channel.close()
+        except Exception as e:
+            channel.close(error=e)
+        else:
+            channel.close(result=result)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
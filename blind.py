@@ -5,6 +5,11 @@ from collections import deque
 import time
 import copy
 
+from algorithms.conformant_planner import ConformantPlanner, apply_move, is_solvable
+from algorithms.state_sampler import StateSampler
+from algorithms.trace_channel import TraceChannel, start_producer
+from render_cache import render_text, render_tile
+
 # --- Grayscale Palette ---
 GS_WHITE = (255, 255, 255)
 GS_OFF_WHITE = (245, 245, 245)          # General background
@@ -44,68 +49,31 @@ try:
 except pygame.error: WIDTH, HEIGHT = 1280, 720 # Fallback
 
 # --- Helper Functions ---
-# (get_inversions, is_solvable, apply_move - unchanged)
-def get_inversions(state):
-    state_without_blank = [x for x in state if x != 9]
-    inversions = 0
-    for i in range(len(state_without_blank)):
-        for j in range(i + 1, len(state_without_blank)):
-            if state_without_blank[i] > state_without_blank[j]:
-                inversions += 1
-    return inversions
-
-def is_solvable(state):
-    if 9 not in state or len(state) != 9: return False
-    return get_inversions(state) % 2 == 0
-
-def apply_move(state, move_direction):
-    s = list(state)
-    try: blank_index = s.index(9)
-    except ValueError: return None
-    row, col = divmod(blank_index, 3)
-    dr, dc = 0, 0
-    if move_direction == 'Up': dr = -1
-    elif move_direction == 'Down': dr = 1
-    elif move_direction == 'Left': dc = -1
-    elif move_direction == 'Right': dc = 1
-    else: return None
-    new_row, new_col = row + dr, col + dc
-    if 0 <= new_row < 3 and 0 <= new_col < 3:
-        new_index = new_row * 3 + new_col
-        s[blank_index], s[new_index] = s[new_index], s[blank_index]
-        return tuple(s)
-    else:
-        return None
+# apply_move / is_solvable dùng chung với algorithms/blind_search.py (algorithms/conformant_planner.py)
+_state_sampler = None
 
 def generate_specific_solvable_states(num_states, max_reverse_depth=15, required_start_value=1):
-    # (unchanged)
-    generated_states = set()
+    # Lấy mẫu trực tiếp các trạng thái có độ sâu tối ưu trong [max_reverse_depth // 2,
+    # max_reverse_depth] với ô đầu tiên cố định (algorithms/state_sampler.py), thay cho
+    # đi ngẫu nhiên ngược từ đích rồi loại bỏ. Chỉ dùng các đích cùng lớp với is_solvable.
+    global _state_sampler
+    if _state_sampler is None:
+        _state_sampler = StateSampler([goal for goal in TARGET_GOAL_LIST if is_solvable(goal)])
+    generated_states = []
     attempts = 0
-    max_attempts = num_states * 100
+    max_attempts = num_states * 10
     while len(generated_states) < num_states and attempts < max_attempts:
         attempts += 1
-        current_state = random.choice(TARGET_GOAL_LIST)
-        depth = random.randint(max(1, max_reverse_depth // 2), max_reverse_depth)
-        temp_state = current_state
-        move_list = ['Up', 'Down', 'Left', 'Right']
-        valid_sequence = True
-        for _ in range(depth):
-            possible_next_states = {}
-            for m in move_list:
-                next_s = apply_move(temp_state, m)
-                if next_s is not None: possible_next_states[m] = next_s
-            if not possible_next_states: valid_sequence = False; break
-            chosen_move = random.choice(list(possible_next_states.keys()))
-            temp_state = possible_next_states[chosen_move]
-        if not valid_sequence: continue
-        if temp_state[0] == required_start_value and is_solvable(temp_state):
-            generated_states.add(temp_state)
+        for state in _state_sampler.in_depths(max(1, max_reverse_depth // 2), max_reverse_depth,
+                                              fixed_cells={0: required_start_value}):
+            if state not in generated_states:
+                generated_states.append(state)
     if len(generated_states) < num_states:
         print(f"Warning: Only generated {len(generated_states)} states after {max_attempts} attempts.")
         if not generated_states:
              print("Error: Failed to generate any states. Using default.")
              return [(1, 2, 3, 4, 5, 9, 7, 8, 6)]
-    return list(generated_states)[:num_states]
+    return generated_states
 
 # --- Classes ---
 class AnimatedTile:
@@ -149,13 +117,12 @@ class AnimatedTile:
     def draw(self, screen, font, is_in_final_goal_pos=False):
         if self.value == 9: # Blank tile
             # Draw a subtle background for the blank tile's spot if needed, or just its border when shaking
-            pygame.draw.rect(screen, GRAY, self.inner_rect, border_radius=10) # GRAY is GS_LIGHT_GRAY2
+            screen.blit(render_tile(self.inner_rect.size, GRAY), self.inner_rect) # GRAY is GS_LIGHT_GRAY2
             if self.is_shaking:
                  shake_rect = self.rect.inflate(2,2)
                  pygame.draw.rect(screen, PRIMARY_DARK, shake_rect, border_radius=10, width=2) # Use PRIMARY_DARK for shake border
             return
         bg_color = TILE_SOLVED if is_in_final_goal_pos else TILE_BG
-        pygame.draw.rect(screen, bg_color, self.inner_rect, border_radius=10)
         text_color = SECONDARY # GS_BLACK for text
         if bg_color == PRIMARY or bg_color == PRIMARY_DARK or bg_color == RED : # If BG is dark gray
             text_color = GS_WHITE # Use white text on dark gray button-like backgrounds
@@ -164,8 +131,7 @@ class AnimatedTile:
         # TILE_SOLVED = GS_LIGHT_GRAY2 (210), TILE_BG = GS_MEDIUM_GRAY (180)
         # Text is SECONDARY = GS_BLACK (10). This is fine.
 
-        text = font.render(str(self.value), True, text_color)
-        screen.blit(text, text.get_rect(center=self.inner_rect.center))
+        screen.blit(render_tile(self.inner_rect.size, bg_color, str(self.value), font, text_color), self.inner_rect)
 
     def is_at_target(self):
         if self.is_shaking: return False
@@ -181,38 +147,65 @@ class Button:
          # PRIMARY = GS_MEDIUM_DARK_GRAY (120), PRIMARY_DARK = GS_DARK_GRAY2 (50)
          # Text color should be light on these dark backgrounds
          text_color_on_button = GS_WHITE
-         text_surface = font.render(self.text, True, text_color_on_button)
+         text_surface = render_text(font, self.text, True, text_color_on_button)
          screen.blit(text_surface, text_surface.get_rect(center=self.rect.center))
      def check_hover(self, mouse_pos): self.is_hovered = self.rect.collidepoint(mouse_pos); return self.is_hovered
      def is_clicked(self, mouse_pos, mouse_click): return self.rect.collidepoint(mouse_pos) and mouse_click
 
 # --- Blind Search Algorithm (Relaxed Version) ---
-def find_common_path(initial_belief_states, target_goals_set):
-    # (unchanged from previous relaxed version)
+_planner = None
+
+def get_planner():
+    global _planner
+    if _planner is None:
+        _planner = ConformantPlanner(TARGET_GOAL_STATES, invalid="stay", max_expansions=300000)
+    return _planner
+
+def find_common_path(initial_belief_states, target_goals_set, max_expansions=300000):
+    # Nước đi không hợp lệ với một trạng thái thì trạng thái đó đứng yên ("stay").
+    # A* trên không gian belief, h = max khoảng cách chính xác tới đích gần nhất;
+    # belief ngõ cụt và belief bị trội bị loại sớm (xem algorithms/conformant_planner.py),
+    # nên cấu hình vô nghiệm thường bị phát hiện ngay thay vì chạy hết ngân sách.
     if not initial_belief_states: return None
-    initial_belief_tuple = tuple(sorted(initial_belief_states))
-    if all(state in target_goals_set for state in initial_belief_tuple): return []
-    queue = deque([(initial_belief_tuple, [])])
-    visited = {initial_belief_tuple}
-    move_directions = ['Up', 'Down', 'Left', 'Right']
-    max_iterations = 300000; iterations = 0; start_time = time.time()
-    while queue:
-        iterations += 1
-        if iterations > max_iterations: return None
-        current_belief_tuple, current_path = queue.popleft()
-        # if iterations % 50000 == 0: print(f"Iter {iterations}...") # Less verbose
-        for move in move_directions:
-            next_belief_list = []
-            for state in current_belief_tuple:
-                next_state = apply_move(state, move)
-                next_belief_list.append(next_state if next_state is not None else state)
-            next_belief_tuple = tuple(sorted(next_belief_list))
-            if next_belief_tuple not in visited:
-                 if all(state in target_goals_set for state in next_belief_tuple):
-                     return current_path + [move]
-                 visited.add(next_belief_tuple)
-                 queue.append((next_belief_tuple, current_path + [move]))
-    return None
+    planner = get_planner()
+    if set(planner.goal_states) != set(target_goals_set) or planner.max_expansions != max_expansions:
+        planner = ConformantPlanner(target_goals_set, invalid="stay", max_expansions=max_expansions)
+    result = planner.plan(initial_belief_states)
+    print(f"Belief search: {result.stats.get('result')}, expanded {result.stats.get('expanded')}, "
+          f"{result.stats.get('elapsed', 0):.2f}s")
+    return result.plan
+
+def search_blind_instance(channel, num_states, max_depth, max_retries):
+    # Chạy trong luồng nền: sinh cấu hình rồi tìm kế hoạch chung, thử lại tối đa
+    # max_retries lần. Sự kiện đẩy vào kênh: ("attempt", k), ("states", các trạng
+    # thái ban đầu), ("move", tên nước đi). Trả về "found", "not_found" hoặc
+    # "generation_failed".
+    for attempt in range(1, max_retries + 1):
+        print(f"\n--- Attempt {attempt}/{max_retries} ---")
+        channel.put_or_raise(("attempt", attempt))
+        print(f"Generating {num_states} states...")
+        start_gen_time = time.time()
+        # Sinh ngược từ tập đích nên cấu hình luôn có kế hoạch chung; chỉ khi không đủ
+        # trạng thái khác nhau mới quay về lấy mẫu độc lập theo độ sâu.
+        plan_length = random.randint(max(1, max_depth // 2), max_depth)
+        initial_states = get_planner().sample_instance(num_states, plan_length, fixed_cells={0: 1})
+        if initial_states is None:
+            initial_states = generate_specific_solvable_states(num_states, max_depth, 1)
+        print(f"Generated {len(initial_states)} states in {time.time() - start_gen_time:.2f}s.")
+        if not initial_states:
+            print("Fatal: Failed to generate initial states."); return "generation_failed"
+        for i, s in enumerate(initial_states): print(f"  State {i+1}: {s}")
+        channel.put_or_raise(("states", initial_states))
+
+        print(f"Finding common path..."); start_path_time = time.time()
+        plan = find_common_path(initial_states, TARGET_GOAL_STATES)
+        print(f"Path finding attempt took {time.time() - start_path_time:.2f}s.")
+        if plan is not None:
+            print("Common path FOUND!")
+            for move in plan: channel.put_or_raise(("move", move))
+            return "found"
+        print(f"Attempt {attempt}/{max_retries} failed. Retrying..." if attempt < max_retries else "Max retries reached.")
+    return "not_found"
 
 # --- GUI Function ---
 def run_blind_search():
@@ -257,97 +250,18 @@ def run_blind_search():
     current_move_index = 0
     time_per_move = 0.4; last_anim_update = 0
     message = "Searching for solvable configuration..."
-    num_initial_states_to_gen = 2; generation_max_depth = 12
-    max_retries = 10; retry_count = 0
+    num_initial_states_to_gen = 4; generation_max_depth = 12
+    max_retries = 10
     back_button = Button(local_WIDTH - 130, local_HEIGHT - 60, 110, 40, "Back to Menu")
 
-    # --- Generation and Path Finding with Auto-Retry ---
+    # --- Generation and Path Finding (background thread) ---
+    # Sinh cấu hình và tìm kế hoạch chạy trong luồng nền; vòng lặp giao diện rút
+    # sự kiện từ kênh mỗi khung hình nên cửa sổ vẫn phản hồi và thoát được ngay.
     total_start_time = time.time()
     generation_successful = False
-
-    while common_path is None and retry_count < max_retries:
-        print(f"\n--- Attempt {retry_count + 1}/{max_retries} ---")
-        screen.fill(DARK_BG)
-        title_surf = title_font.render("Blind Search", True, SECONDARY) # SECONDARY is GS_BLACK
-        screen.blit(title_surf, title_surf.get_rect(centerx=local_WIDTH // 2, y=HEIGHT // 3))
-        search_msg = f"Searching for solvable configuration... (Attempt {retry_count + 1})"
-        msg_surf = font.render(search_msg, True, LIGHT_GRAY) # LIGHT_GRAY is GS_DARK_GRAY1
-        screen.blit(msg_surf, msg_surf.get_rect(centerx=local_WIDTH // 2, y=HEIGHT // 3 + 60))
-        pygame.display.flip(); pygame.time.delay(50)
-        for _ in pygame.event.get(): pass
-
-        print(f"Generating {num_initial_states_to_gen} states...")
-        start_gen_time = time.time()
-        initial_states = generate_specific_solvable_states(num_initial_states_to_gen, generation_max_depth, 1)
-        print(f"Generated {len(initial_states)} states in {time.time() - start_gen_time:.2f}s.")
-
-        if not initial_states:
-             print("Fatal: Failed to generate initial states."); message = "Error: Generation Failed."; state = "no_path"; generation_successful = False; break
-        generation_successful = True
-        for i, s in enumerate(initial_states): print(f"  State {i+1}: {s}")
-
-        print(f"Finding common path..."); start_path_time = time.time()
-        current_attempt_path = find_common_path(initial_states, TARGET_GOAL_STATES)
-        print(f"Path finding attempt took {time.time() - start_path_time:.2f}s.")
-
-        if current_attempt_path is not None:
-            common_path = current_attempt_path; print("Common path FOUND!")
-        else:
-            retry_count += 1; print(f"Attempt {retry_count}/{max_retries} failed. Retrying..." if retry_count < max_retries else "Max retries reached.")
-
-    # --- Post-Loop Processing & Animation Setup ---
-    total_duration = time.time() - total_start_time
-    print(f"\n--- Search Finished (Total Time: {total_duration:.2f}s) ---")
-
-    if common_path is not None:
-        state = "animating" # Go directly to animating
-        message = f"Animating common path ({len(common_path)} moves)..." if common_path else "Already at goal states. Animating..."
-        print(f"Final Path: {' -> '.join(common_path)}")
-
-        # --- Initialize ALL puzzles for animation ---
-        all_animating_puzzles = []
-        current_animated_state_tuples = list(initial_states) # Make a mutable list copy
-
-        num_puzzles = len(initial_states)
-        # Calculate layout for multiple puzzles
-        # Try to fit them horizontally, with some spacing
-        total_padding = 100 # Total horizontal padding/spacing
-        available_width = local_WIDTH - total_padding
-        puzzle_area_width = available_width / num_puzzles
-        puzzle_area_height = local_HEIGHT * 0.6 # Max height for animation area
-
-        # Ensure tile size isn't too large or small
-        max_tile_size = 150
-        min_tile_size = 30
-        anim_tile_size = max(min_tile_size, min(puzzle_area_width / 3, puzzle_area_height / 3, max_tile_size)) * 0.9
-        anim_puzzle_size = anim_tile_size * 3 # Actual grid size
-        puzzle_spacing = (available_width - anim_puzzle_size * num_puzzles) / max(1, num_puzzles + 1) # Distribute remaining space
-
-        overall_start_x = puzzle_spacing # Start with initial spacing
-
-        for i, init_state in enumerate(initial_states):
-            # Calculate top-left for this puzzle
-            anim_start_x = overall_start_x + i * (anim_puzzle_size + puzzle_spacing)
-            anim_start_y = (local_HEIGHT - anim_puzzle_size) / 2 - 60 # Vertically center slightly up
-
-            puzzle_tiles = []
-            for idx, val in enumerate(init_state):
-                r, c = divmod(idx, 3)
-                x = anim_start_x + c * anim_tile_size
-                y = anim_start_y + r * anim_tile_size
-                tile = AnimatedTile(val, x, y, anim_tile_size)
-                puzzle_tiles.append(tile)
-            all_animating_puzzles.append(puzzle_tiles)
-
-        last_anim_update = pygame.time.get_ticks() # Start animation timer
-
-    elif not generation_successful:
-         state = "no_path" # Message already set
-         print("Exiting due to generation failure.")
-    else:
-         message = f"Could not find common path after {max_retries} attempts."
-         state = "no_path"
-         print("Exiting: Max retries reached.")
+    pending_moves = []
+    search_channel = TraceChannel(256)
+    start_producer(search_channel, search_blind_instance, num_initial_states_to_gen, generation_max_depth, max_retries)
 
     # --- Main GUI Loop ---
     running = True
@@ -368,12 +282,80 @@ def run_blind_search():
             # Only back button is active here
             if back_button.is_clicked(mouse_pos, mouse_click): running = False
 
+        # --- Drain search events ---
+        if state == "generating":
+            for kind, value in search_channel.drain():
+                if kind == "attempt": message = f"Searching for solvable configuration... (Attempt {value})"
+                elif kind == "states": initial_states = value; generation_successful = True
+                elif kind == "move": pending_moves.append(value)
+            if search_channel.done:
+                if search_channel.error is not None:
+                    print(f"Error in blind search thread: {search_channel.error}")
+                    message = "Error: Generation Failed."; generation_successful = False
+                elif search_channel.result == "generation_failed":
+                    message = "Error: Generation Failed."; generation_successful = False
+                elif search_channel.result == "found":
+                    common_path = pending_moves
+
+                total_duration = time.time() - total_start_time
+                print(f"\n--- Search Finished (Total Time: {total_duration:.2f}s) ---")
+
+                if common_path is not None:
+                    state = "animating" # Go directly to animating
+                    message = f"Animating common path ({len(common_path)} moves)..." if common_path else "Already at goal states. Animating..."
+                    print(f"Final Path: {' -> '.join(common_path)}")
+
+                    # --- Initialize ALL puzzles for animation ---
+                    all_animating_puzzles = []
+                    current_animated_state_tuples = list(initial_states) # Make a mutable list copy
+
+                    num_puzzles = len(initial_states)
+                    # Calculate layout for multiple puzzles
+                    # Try to fit them horizontally, with some spacing
+                    total_padding = 100 # Total horizontal padding/spacing
+                    available_width = local_WIDTH - total_padding
+                    puzzle_area_width = available_width / num_puzzles
+                    puzzle_area_height = local_HEIGHT * 0.6 # Max height for animation area
+
+                    # Ensure tile size isn't too large or small
+                    max_tile_size = 150
+                    min_tile_size = 30
+                    anim_tile_size = max(min_tile_size, min(puzzle_area_width / 3, puzzle_area_height / 3, max_tile_size)) * 0.9
+                    anim_puzzle_size = anim_tile_size * 3 # Actual grid size
+                    puzzle_spacing = (available_width - anim_puzzle_size * num_puzzles) / max(1, num_puzzles + 1) # Distribute remaining space
+
+                    overall_start_x = puzzle_spacing # Start with initial spacing
+
+                    for i, init_state in enumerate(initial_states):
+                        # Calculate top-left for this puzzle
+                        anim_start_x = overall_start_x + i * (anim_puzzle_size + puzzle_spacing)
+                        anim_start_y = (local_HEIGHT - anim_puzzle_size) / 2 - 60 # Vertically center slightly up
+
+                        puzzle_tiles = []
+                        for idx, val in enumerate(init_state):
+                            r, c = divmod(idx, 3)
+                            x = anim_start_x + c * anim_tile_size
+                            y = anim_start_y + r * anim_tile_size
+                            tile = AnimatedTile(val, x, y, anim_tile_size)
+                            puzzle_tiles.append(tile)
+                        all_animating_puzzles.append(puzzle_tiles)
+
+                    last_anim_update = pygame.time.get_ticks() # Start animation timer
+
+                elif not generation_successful:
+                     state = "no_path" # Message already set
+                     print("Exiting due to generation failure.")
+                else:
+                     message = f"Could not find common path after {max_retries} attempts."
+                     state = "no_path"
+                     print("Exiting: Max retries reached.")
+
         # --- Drawing ---
         screen.fill(DARK_BG) # DARK_BG is GS_OFF_WHITE
         final_title = "Blind Search Results" if state != "generating" else "Blind Search"
-        title_surf = title_font.render(final_title, True, SECONDARY) # SECONDARY is GS_BLACK
+        title_surf = render_text(title_font, final_title, True, SECONDARY) # SECONDARY is GS_BLACK
         screen.blit(title_surf, title_surf.get_rect(centerx=local_WIDTH // 2, y=30))
-        msg_surf = font.render(message, True, LIGHT_GRAY) # LIGHT_GRAY is GS_DARK_GRAY1
+        msg_surf = render_text(font, message, True, LIGHT_GRAY) # LIGHT_GRAY is GS_DARK_GRAY1
         screen.blit(msg_surf, msg_surf.get_rect(centerx=local_WIDTH // 2, y=80))
         back_button.check_hover(mouse_pos); back_button.draw(screen, font)
 
@@ -398,14 +380,12 @@ def run_blind_search():
                         tile_rect = pygame.Rect(x + 1, y + 1, tile_size - 2, tile_size - 2)
                         # GRAY is GS_LIGHT_GRAY2, TILE_BG is GS_MEDIUM_GRAY
                         bg_color = TILE_BG if val != 9 else GRAY 
-                        pygame.draw.rect(screen, bg_color, tile_rect, border_radius=3)
-                        if val != 9:
-                            # SECONDARY is GS_BLACK
-                            text = puzzle_font_small.render(str(val), True, SECONDARY)
-                            screen.blit(text, text.get_rect(center=tile_rect.center))
+                        # SECONDARY is GS_BLACK
+                        label = str(val) if val != 9 else None
+                        screen.blit(render_tile(tile_rect.size, bg_color, label, puzzle_font_small, SECONDARY, 3), tile_rect)
             # Display error message below states or centered if no states
             error_y = start_y + total_grid_h + 40 if generation_successful and initial_states else local_HEIGHT // 2
-            error_surf = font.render(message, True, RED) # RED is GS_DARK_GRAY2
+            error_surf = render_text(font, message, True, RED) # RED is GS_DARK_GRAY2
             screen.blit(error_surf, error_surf.get_rect(center=(local_WIDTH // 2, error_y)))
 
         elif state == "animating" or state == "finished":
@@ -523,7 +503,7 @@ def run_blind_search():
                     # RED is GS_DARK_GRAY2, PRIMARY is GS_MEDIUM_DARK_GRAY, SECONDARY is GS_BLACK
                     color = RED if "Shake" in move_text or "Error" in move_text else \
                             (PRIMARY if (is_final_step_completed and all_logically_goal) else SECONDARY)
-                    move_surf = move_font.render(move_text, True, color)
+                    move_surf = render_text(move_font, move_text, True, color)
                     screen.blit(move_surf, move_surf.get_rect(center=(local_WIDTH // 2, local_HEIGHT - 100)))
 
 
@@ -547,6 +527,7 @@ def run_blind_search():
         clock.tick(60)
 
     # --- End of loop ---
+    search_channel.cancel()
     print("Exiting blind search view.")
 
 
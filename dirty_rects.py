@@ -0,0 +1,53 @@
+# dirty_rects.py
+import pygame
+
+
+class DirtyTracker:
+    """
+    Lớp giữ lại (retained) tối giản cho các vòng lặp vẽ lại mọi thứ mỗi khung:
+    mỗi widget gọi mark(key, rect, signature) khi vẽ, với signature là mọi thứ
+    quyết định hình dạng của nó (giá trị, trạng thái hover, dòng chữ...).
+    present() so với khung trước và chỉ đẩy lên màn hình các vùng có widget
+    mới, đổi nội dung, đổi vị trí hoặc biến mất (pygame.display.update), thay
+    vì flip toàn bộ màn hình.
+    """
+    def __init__(self):
+        self._previous = {}
+        self._current = {}
+        self._full = True
+
+    def invalidate(self):
+        """Khung kế tiếp flip toàn màn hình (đổi màn hình, cửa sổ bị che / hiện lại...)."""
+        self._full = True
+
+    @property
+    def needs_full(self):
+        return self._full
+
+    def mark(self, key, rect, signature=None):
+        self._current[key] = (pygame.Rect(rect), signature)
+
+    def dirty_rects(self):
+        dirty = []
+        for key, (rect, signature) in self._current.items():
+            old = self._previous.get(key)
+            if old is None:
+                dirty.append(rect)
+            elif old[0] != rect or old[1] != signature:
+                dirty.append(old[0]); dirty.append(rect)
+        for key, (rect, _) in self._previous.items():
+            if key not in self._current:
+                dirty.append(rect)
+        self._previous, self._current = self._current, {}
+        return dirty
+
+    def present(self, full=False):
+        """Đưa khung vừa vẽ lên màn hình; trả về False nếu không có gì thay đổi."""
+        dirty = self.dirty_rects()
+        if full or self._full:
+            self._full = False
+            pygame.display.flip()
+            return True
+        if dirty:
+            pygame.display.update(dirty)
+        return bool(dirty)
@@ -2,12 +2,16 @@
 # fill.py
 import pygame
 import sys
-import threading
 import time
 import math
 import random
 from collections import deque # Cần cho is_solvable nếu bạn muốn giữ nó
 
+from algorithms.anim_trace import DeltaTrace
+from algorithms.grid_csp import ASSIGN, PRUNE, puzzle_from_target
+from algorithms.trace_channel import TraceChannel, start_producer
+from render_cache import get_render_cache, render_text, render_tile
+
 # --- Grayscale Palette ---
 GS_WHITE = (255, 255, 255)
 GS_OFF_WHITE = (245, 245, 245)          # General background
@@ -60,7 +64,7 @@ class Button:
          pygame.draw.rect(screen, current_bg_color, self.rect, border_radius=self.border_radius)
          # Buttons have dark BG (PRIMARY/PRIMARY_DARK), so text should be light
          text_color_on_button = GS_WHITE
-         text_surface = font.render(self.text, True, text_color_on_button); text_rect = text_surface.get_rect(center=self.rect.center); screen.blit(text_surface, text_rect)
+         text_surface = render_text(font, self.text, True, text_color_on_button); text_rect = text_surface.get_rect(center=self.rect.center); screen.blit(text_surface, text_rect)
      def check_hover(self, mouse_pos): self.is_hovered = self.rect.collidepoint(mouse_pos); return self.is_hovered
      def is_clicked(self, mouse_pos, mouse_click): return self.is_hovered and mouse_click
 
@@ -83,11 +87,11 @@ class MessageBox:
         pygame.draw.rect(screen, DARK_BG, self.rect.inflate(-4, -4), border_radius=self.border_radius)
         
         # Title Text: SECONDARY (GS_BLACK)
-        title_surface = title_font.render(self.title, True, SECONDARY); title_rect = title_surface.get_rect(centerx=self.rect.centerx, y=self.rect.y + 20); screen.blit(title_surface, title_rect)
+        title_surface = render_text(title_font, self.title, True, SECONDARY); title_rect = title_surface.get_rect(centerx=self.rect.centerx, y=self.rect.y + 20); screen.blit(title_surface, title_rect)
         
         # Message Text: LIGHT_GRAY (GS_DARK_GRAY1)
         lines = self.message.split('\n'); start_y = self.rect.y + 70
-        for i, line in enumerate(lines): msg_surf = font.render(line, True, LIGHT_GRAY); msg_rect = msg_surf.get_rect(centerx=self.rect.centerx, y=start_y + i * 30); screen.blit(msg_surf, msg_rect)
+        for i, line in enumerate(lines): msg_surf = render_text(font, line, True, LIGHT_GRAY); msg_rect = msg_surf.get_rect(centerx=self.rect.centerx, y=start_y + i * 30); screen.blit(msg_surf, msg_rect)
         self.ok_button.draw(screen, button_font)
     def check_hover(self, mouse_pos):
         if not self.active: return False
@@ -161,73 +165,98 @@ class AnimatedNumberTile:
         if self.highlight and not self.is_appearing: 
              bg_color = YELLOW # YELLOW is GS_MEDIUM_DARK_GRAY
              text_color = GS_WHITE # White text on dark highlight BG
-        pygame.draw.rect(screen, bg_color, draw_rect, border_radius=int(10 * self.current_scale))
-
+        # Nền, số và viền được vẽ sẵn một lần cho mỗi (giá trị, cỡ, màu) trong render_cache;
+        # font theo cỡ phóng to cũng được giữ lại thay vì tạo SysFont mỗi khung hình.
+        label = scaled_font = None
         if self.value != EMPTY_SLOT:
             scaled_font_size = int(font.get_height() * self.current_scale * 1.1) 
-            try:
-                scaled_font = pygame.font.SysFont(font.get_name(), scaled_font_size, bold=True)
-            except: 
-                scaled_font = pygame.font.Font(None, scaled_font_size)
-
-            text = scaled_font.render(str(self.value), True, text_color)
-            text_rect = text.get_rect(center=draw_rect.center)
-            screen.blit(text, text_rect)
-
-        if self.highlight and self.is_appearing:
-             # YELLOW is GS_MEDIUM_DARK_GRAY for border
-             pygame.draw.rect(screen, YELLOW, draw_rect, border_radius=int(10 * self.current_scale), width=3)
+            scaled_font = get_render_cache().scaled_font(font, scaled_font_size)
+            label = str(self.value)
+        # YELLOW is GS_MEDIUM_DARK_GRAY for border
+        border_color = YELLOW if self.highlight and self.is_appearing else None
+        screen.blit(render_tile(draw_rect.size, bg_color, label, scaled_font, text_color, int(10 * self.current_scale),
+                                border_color, 3), draw_rect)
 
 # --- Backtracking Logic ---
-animation_path = [] 
+# Luồng giải chỉ đẩy sự kiện vào backtrack_channel; mọi biến dưới đây chỉ do
+# vòng lặp pygame đọc / ghi (poll_backtracking), nên không cần khóa.
+animation_path = DeltaTrace()  # Khung hoạt ảnh lưu dạng delta + keyframe
 backtrack_target_state = []
 backtrack_thread = None
-backtrack_running = False
+backtrack_channel = None
 backtrack_finished = False
 backtrack_success = False
-
-def backtrack_fill_recursive(index, current_grid_state, used_numbers):
-    global animation_path, backtrack_target_state, backtrack_running
-    if not backtrack_running: return False 
-    if index == 9:
-        return list(current_grid_state) == list(backtrack_target_state)
-    correct_num = backtrack_target_state[index]
-    if correct_num in used_numbers:
-        print(f"Lỗi logic hoặc target state không hợp lệ: Số {correct_num} đã dùng tại index {index}")
-        return False 
-    current_grid_state[index] = correct_num
-    used_numbers.add(correct_num)
-    animation_path.append(list(current_grid_state)) 
-    found = backtrack_fill_recursive(index + 1, current_grid_state, used_numbers)
-    if found:
-        return True 
-    if backtrack_running: 
-        used_numbers.remove(correct_num)
-        current_grid_state[index] = EMPTY_SLOT 
-        animation_path.append(list(current_grid_state)) 
-    return False
-
-def run_backtracking_thread(target_state):
-    global animation_path, backtrack_target_state, backtrack_running, backtrack_finished, backtrack_success
+backtrack_stats = {}
+BACKTRACK_CHANNEL_SIZE = 4096
+# Thời gian tối đa (giây) chờ luồng quay lui dừng sau khi hủy.
+STOP_JOIN_TIMEOUT = 1.0
+
+class GridEventStream:
+    """Nhận sự kiện của bộ giải (như Trace) và đẩy thay đổi ô (ô, giá trị) vào kênh."""
+    def __init__(self, channel):
+        self.channel = channel
+
+    def append(self, kind, cell, payload):
+        if kind != PRUNE:  # prune không đổi lưới
+            self.channel.put((cell, payload if kind == ASSIGN else EMPTY_SLOT))
+
+def run_backtracking_thread(channel, target_state):
+    # Đích được chuyển thành câu đố kiểu Futoshiki (ràng buộc lớn/nhỏ giữa các ô kề
+    # nhau + thêm dần ô cho sẵn tới khi lời giải duy nhất), rồi giải bằng quay lui
+    # thật với AC-3 và MRV (algorithms/grid_csp.py). Mỗi lần gán / quay lui được
+    # đẩy ngay vào kênh, nên hoạt ảnh chạy song song với bộ giải. Cả bước dựng câu
+    # đố lẫn bước giải đều kiểm tra channel.should_stop để dừng ngay khi bị hủy.
+    stats = {}
+    csp, givens = puzzle_from_target(target_state, should_stop=channel.should_stop)
+    solutions = csp.solve(trace=GridEventStream(channel), stats=stats, should_stop=channel.should_stop)
+    stats["givens"] = givens
+    success = bool(solutions) and list(solutions[0]) == list(target_state)
+    return success, stats
+
+def start_backtracking(target_state):
+    global backtrack_thread, backtrack_channel, backtrack_target_state, backtrack_finished, backtrack_success
+    stop_backtracking()
     backtrack_target_state = target_state
-    backtrack_running = True
     backtrack_finished = False
     backtrack_success = False
+    backtrack_stats.clear()
     animation_path.clear()
-    initial_grid = [EMPTY_SLOT] * 9
-    used = set()
-    animation_path.append(list(initial_grid)) 
-    try:
-        backtrack_success = backtrack_fill_recursive(0, initial_grid, used)
-    except Exception as e:
-        print(f"Lỗi trong thread backtracking: {e}")
-        backtrack_success = False
-    finally:
-        backtrack_running = False
+    animation_path.append([EMPTY_SLOT] * 9)
+    backtrack_channel = TraceChannel(BACKTRACK_CHANNEL_SIZE)
+    backtrack_thread = start_producer(backtrack_channel, run_backtracking_thread, target_state)
+
+def poll_backtracking():
+    """Gọi mỗi khung hình: chuyển các thay đổi đã có sang animation_path, nhận kết quả khi luồng xong."""
+    global backtrack_thread, backtrack_channel, backtrack_finished, backtrack_success
+    if backtrack_channel is None:
+        return
+    for change in backtrack_channel.drain():
+        animation_path.append_changes((change,))
+    if backtrack_channel.done:
+        if backtrack_channel.error is not None:
+            print(f"Lỗi trong thread backtracking: {backtrack_channel.error}")
+        elif backtrack_channel.result is not None:
+            backtrack_success, stats = backtrack_channel.result
+            backtrack_stats.update(stats)
         backtrack_finished = True
-        print(f"Backtracking finished. Success: {backtrack_success}")
-        if not backtrack_success and not animation_path:
-             animation_path.append([EMPTY_SLOT] * 9)
+        backtrack_thread = backtrack_channel = None
+        print(f"Backtracking finished. Success: {backtrack_success}, stats: {backtrack_stats}")
+
+def stop_backtracking():
+    """
+    Hủy kênh (bộ giải dừng ở nút tìm kiếm kế tiếp) rồi chờ luồng kết thúc,
+    tối đa STOP_JOIN_TIMEOUT giây để giao diện không bao giờ treo; luồng là
+    daemon nên nếu còn chạy cũng không giữ chương trình lại.
+    """
+    global backtrack_thread, backtrack_channel, backtrack_finished
+    if backtrack_channel is not None:
+        backtrack_channel.cancel()
+    if backtrack_thread is not None:
+        backtrack_thread.join(timeout=STOP_JOIN_TIMEOUT)
+        if backtrack_thread.is_alive():
+            print("Backtracking thread did not stop in time; leaving it to finish in the background.")
+    backtrack_thread = backtrack_channel = None
+    backtrack_finished = True
 
 # --- Drawing Functions ---
 def draw_grid(screen, tiles, puzzle_font):
@@ -237,7 +266,7 @@ def draw_grid(screen, tiles, puzzle_font):
 def draw_target_editor(screen, editor_tiles, editor_state, selected_idx, title_font, font, info_font, puzzle_font, button_font, start_btn, back_btn):
     screen.fill(DARK_BG) # GS_OFF_WHITE
     # Title: SECONDARY (GS_BLACK)
-    title = title_font.render("Chọn Trạng Thái Đích", True, SECONDARY)
+    title = render_text(title_font, "Chọn Trạng Thái Đích", True, SECONDARY)
     screen.blit(title, title.get_rect(centerx=WIDTH // 2, y=70))
     instructions = ["Click ô để chọn, nhập số (1-9) để thay đổi.",
                    "Số nhập sẽ đổi chỗ với số hiện tại.",
@@ -245,7 +274,7 @@ def draw_target_editor(screen, editor_tiles, editor_state, selected_idx, title_f
                    "Nhấn 'Bắt đầu hoạt ảnh' để xem.",]
     line_y = 120
     # Instruction text: LIGHT_GRAY (GS_DARK_GRAY1)
-    for text in instructions: line = info_font.render(text, True, LIGHT_GRAY); screen.blit(line, line.get_rect(centerx=WIDTH // 2, y=line_y)); line_y += 30
+    for text in instructions: line = render_text(info_font, text, True, LIGHT_GRAY); screen.blit(line, line.get_rect(centerx=WIDTH // 2, y=line_y)); line_y += 30
 
     if not editor_tiles: return
     tile_size = editor_tiles[0].size
@@ -265,7 +294,7 @@ def draw_target_editor(screen, editor_tiles, editor_state, selected_idx, title_f
     status_text = "Trạng thái hợp lệ (1-9)" if is_valid else "Trạng thái không hợp lệ (thiếu/trùng số 1-9)"
     # TILE_SOLVED (success text) is GS_BLACK, RED (error text) is GS_DARK_GRAY2
     status_color = TILE_SOLVED if is_valid else RED
-    status_surf = font.render(status_text, True, status_color)
+    status_surf = render_text(font, status_text, True, status_color)
     status_rect = status_surf.get_rect(center=(WIDTH // 2, start_y + puzzle_height + 40))
     screen.blit(status_surf, status_rect)
 
@@ -281,7 +310,7 @@ def draw_target_editor(screen, editor_tiles, editor_state, selected_idx, title_f
 def draw_filling_animation(screen, anim_tiles, current_step, total_steps, target_state, auto_mode, puzzle_font, font, info_font, button_font, auto_btn, next_btn, reset_btn, back_btn):
     screen.fill(DARK_BG) # GS_OFF_WHITE
     # Title: SECONDARY (GS_BLACK)
-    title = title_font.render("Hoạt ảnh điền số Backtracking", True, SECONDARY)
+    title = render_text(title_font, "Hoạt ảnh điền số Backtracking", True, SECONDARY)
     screen.blit(title, title.get_rect(centerx=WIDTH // 2, y=50))
 
     if anim_tiles:
@@ -302,10 +331,12 @@ def draw_filling_animation(screen, anim_tiles, current_step, total_steps, target
     info_text_content = [
         f"Trạng thái đích: ({target_str})",
         f"Bước: {current_step} / {total_steps}",
+        f"Ô cho sẵn: {backtrack_stats.get('givens', 0)} | Gán: {backtrack_stats.get('assignments', 0)} | "
+        f"Loại giá trị: {backtrack_stats.get('prunes', 0)} | Quay lui: {backtrack_stats.get('backtracks', 0)}",
         f"Trạng thái: {'Đang chạy...' if not backtrack_finished else ('Hoàn thành!' if backtrack_success else 'Không thành công/Lỗi')}"
     ]
     for i, text_content in enumerate(info_text_content): # Renamed text to avoid conflict
-        line = info_font.render(text_content, True, LIGHT_GRAY)
+        line = render_text(info_font, text_content, True, LIGHT_GRAY)
         screen.blit(line, line.get_rect(centerx=WIDTH // 2, y=info_y + i * 30))
 
     button_y = info_y + len(info_text_content) * 30 + 30
@@ -346,7 +377,6 @@ def update_animation_tiles(anim_tiles, prev_state, current_state):
 # --- Main Function for fill.py ---
 def fill_main():
     global screen, clock, font, title_font, puzzle_font, button_font, info_font
-    global backtrack_thread, backtrack_running, backtrack_finished, backtrack_success, animation_path
 
     current_view = "target_editor" 
     target_state_val = tuple(range(1, 10)) # Renamed to avoid conflict
@@ -387,9 +417,7 @@ def fill_main():
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
-                if backtrack_thread and backtrack_thread.is_alive():
-                    backtrack_running = False 
-                    backtrack_thread.join(timeout=0.5) 
+                stop_backtracking()
 
             if message_box.active:
                 if message_box.handle_event(event): continue
@@ -418,17 +446,12 @@ def fill_main():
                     if start_anim_btn.is_clicked(mouse_pos, True):
                         if is_valid_puzzle_state(editable_target_state):
                             target_state_val = tuple(editable_target_state) # Update the main target_state
-                            if backtrack_thread is None or not backtrack_thread.is_alive():
-                                print("Bắt đầu backtracking thread...")
-                                animation_path.clear()
-                                current_animation_step = 0
-                                backtrack_finished = False
-                                backtrack_thread = threading.Thread(target=run_backtracking_thread, args=(target_state_val,), daemon=True)
-                                backtrack_thread.start()
-                                current_view = "filling_animation"
-                                animation_tiles = init_number_tiles([EMPTY_SLOT] * 9, anim_start_x, anim_start_y, anim_tile_size)
-                            else:
-                                print("Thread backtracking đang chạy!")
+                            print("Bắt đầu backtracking thread...")
+                            start_backtracking(target_state_val)
+                            current_animation_step = 0
+                            last_switch = time.time() * 1000
+                            current_view = "filling_animation"
+                            animation_tiles = init_number_tiles([EMPTY_SLOT] * 9, anim_start_x, anim_start_y, anim_tile_size)
                         else:
                             message_box.message = "Trạng thái đích không hợp lệ (1-9)."; message_box.active = True
                     elif back_main_btn_editor.is_clicked(mouse_pos, True):
@@ -443,17 +466,13 @@ def fill_main():
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_ESCAPE:
                         current_view = "target_editor" 
-                        if backtrack_thread and backtrack_thread.is_alive():
-                            backtrack_running = False
-                            backtrack_thread.join(timeout=0.5)
-                        backtrack_thread = None 
-                        backtrack_finished = True 
+                        stop_backtracking()
                 if mouse_click:
                     if auto_btn.is_clicked(mouse_pos, True):
                         auto_mode = not auto_mode
                         if auto_mode: last_switch = time.time() * 1000
                     elif next_btn.is_clicked(mouse_pos, True) and not auto_mode:
-                        if backtrack_finished and current_animation_step < len(animation_path) - 1:
+                        if current_animation_step < len(animation_path) - 1:
                             current_animation_step += 1
                             prev_st = animation_path[current_animation_step - 1]
                             curr_st = animation_path[current_animation_step]
@@ -467,17 +486,14 @@ def fill_main():
                              update_animation_tiles(animation_tiles, [EMPTY_SLOT]*9, [EMPTY_SLOT]*9)
                     elif back_editor_btn.is_clicked(mouse_pos, True):
                         current_view = "target_editor"
-                        if backtrack_thread and backtrack_thread.is_alive():
-                            backtrack_running = False
-                            backtrack_thread.join(timeout=0.5)
-                        backtrack_thread = None
-                        backtrack_finished = True
+                        stop_backtracking()
 
         if current_view == "filling_animation":
+            poll_backtracking()
             for tile in animation_tiles:
                 tile.update()
             now_ms = time.time() * 1000
-            if auto_mode and backtrack_finished and current_animation_step < len(animation_path) - 1:
+            if auto_mode and current_animation_step < len(animation_path) - 1:
                 if now_ms - last_switch >= switch_time:
                     current_animation_step += 1
                     prev_st = animation_path[current_animation_step - 1]
@@ -491,10 +507,10 @@ def fill_main():
                                title_font, font, info_font, puzzle_font, button_font,
                                start_anim_btn, back_main_btn_editor)
         elif current_view == "filling_animation":
-            if backtrack_thread and backtrack_thread.is_alive():
+            if not backtrack_finished and len(animation_path) <= 1:
                  # Loading text: YELLOW (GS_MEDIUM_DARK_GRAY) text on DARK_BG (GS_OFF_WHITE)
                  loading_text_color = YELLOW if YELLOW != DARK_BG else SECONDARY
-                 loading_text = title_font.render("Đang tạo hoạt ảnh...", True, loading_text_color)
+                 loading_text = render_text(title_font, "Đang tạo hoạt ảnh...", True, loading_text_color)
                  screen.blit(loading_text, loading_text.get_rect(center=(WIDTH // 2, HEIGHT // 2)))
             else:
                  total_steps = max(0, len(animation_path) - 1) if animation_path else 0
@@ -506,10 +522,9 @@ def fill_main():
         pygame.display.flip()
         clock.tick(60)
 
-    if backtrack_thread and backtrack_thread.is_alive():
+    if backtrack_thread is not None:
         print("Stopping backtracking thread on exit...")
-        backtrack_running = False
-        backtrack_thread.join(timeout=0.5)
+    stop_backtracking()
     pygame.quit()
     sys.exit()
 
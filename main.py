@@ -8,6 +8,11 @@ import traceback
 import subprocess
 import sys
 
+from algorithms.anim_trace import DeltaTrace
+from algorithms.trace_channel import TraceChannel, start_producer
+from render_cache import get_render_cache, render_text, render_tile
+from dirty_rects import DirtyTracker
+
 # --- Algorithm Import ---
 try:
     from algorithms import ALGORITHM_LIST
@@ -101,6 +106,12 @@ def get_neighbors(state):
     return neighbors
 
 # --- Class Definitions ---
+# --- Dirty Rect Tracking ---
+# Màn hình giải chỉ cập nhật các vùng có widget thay đổi; khi không có gì chuyển
+# động, vòng lặp bỏ qua việc vẽ và chỉ chạy IDLE_FPS khung/giây.
+screen_tracker = DirtyTracker()
+ACTIVE_FPS = 60; IDLE_FPS = 10
+
 class MessageBox:
     def __init__(self, width, height, title, message, button_text="OK"):
         self.rect = pygame.Rect((WIDTH - width) // 2, (HEIGHT - height) // 2, width, height)
@@ -115,9 +126,9 @@ class MessageBox:
         overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA); overlay.fill(overlay_color); screen.blit(overlay, (0, 0))
         pygame.draw.rect(screen, GRAY, self.rect, border_radius=self.border_radius)
         pygame.draw.rect(screen, DARK_BG, self.rect.inflate(-4, -4), border_radius=self.border_radius)
-        title_surface = title_font.render(self.title, True, SECONDARY); title_rect = title_surface.get_rect(centerx=self.rect.centerx, y=self.rect.y + 20); screen.blit(title_surface, title_rect)
+        title_surface = render_text(title_font, self.title, True, SECONDARY); title_rect = title_surface.get_rect(centerx=self.rect.centerx, y=self.rect.y + 20); screen.blit(title_surface, title_rect)
         lines = self.message.split('\n'); start_y = self.rect.y + 70
-        for i, line_text in enumerate(lines): msg_surf = font.render(line_text, True, LIGHT_GRAY); msg_rect = msg_surf.get_rect(centerx=self.rect.centerx, y=start_y + i * 30); screen.blit(msg_surf, msg_rect)
+        for i, line_text in enumerate(lines): msg_surf = render_text(font, line_text, True, LIGHT_GRAY); msg_rect = msg_surf.get_rect(centerx=self.rect.centerx, y=start_y + i * 30); screen.blit(msg_surf, msg_rect)
         self.ok_button.draw(screen, button_font)
     def check_hover(self, mouse_pos):
         if not self.active: return False
@@ -142,11 +153,12 @@ class AnimatedTile:
         self.rect.topleft = (int(self.current_x), int(self.current_y)); self.inner_rect.center = self.rect.center
     def draw(self, screen, font):
         if self.value == 9:
-            pygame.draw.rect(screen, GRAY, self.inner_rect, border_radius=10)
+            screen.blit(render_tile(self.inner_rect.size, GRAY), self.inner_rect)
+            screen_tracker.mark(("tile", id(self)), self.inner_rect, 9)
             return
         bg_color = TILE_SOLVED if self.is_solved_position else TILE_BG
-        pygame.draw.rect(screen, bg_color, self.inner_rect, border_radius=10)
-        text = font.render(str(self.value), True, SECONDARY); text_rect = text.get_rect(center=self.inner_rect.center); screen.blit(text, text_rect)
+        screen.blit(render_tile(self.inner_rect.size, bg_color, str(self.value), font, SECONDARY), self.inner_rect)
+        screen_tracker.mark(("tile", id(self)), self.inner_rect, (self.value, self.is_solved_position))
     def is_at_target(self): return abs(self.current_x - self.target_x) < 1 and abs(self.current_y - self.target_y) < 1
 
 class Button:
@@ -157,9 +169,10 @@ class Button:
          current_bg_color = self.hover_color if self.is_hovered else self.color
          pygame.draw.rect(screen, current_bg_color, self.rect, border_radius=self.border_radius)
          text_color_on_button = GS_WHITE
-         text_surface = font.render(self.text, True, text_color_on_button); text_rect = text_surface.get_rect(center=self.rect.center); screen.blit(text_surface, text_rect)
+         text_surface = render_text(font, self.text, True, text_color_on_button); text_rect = text_surface.get_rect(center=self.rect.center); screen.blit(text_surface, text_rect)
+         screen_tracker.mark(("button", id(self)), self.rect, (self.text, self.is_hovered))
      def check_hover(self, mouse_pos): self.is_hovered = self.rect.collidepoint(mouse_pos); return self.is_hovered
-     def is_clicked(self, mouse_pos, mouse_click): return self.is_hovered and mouse_click
+     def is_clicked(self, mouse_pos, mouse_click): return self.check_hover(mouse_pos) and mouse_click  # Khung rảnh không vẽ nên hover có thể cũ
 
 # --- GUI Drawing Functions ---
 def draw_menu(screen, title_font, font, button_font,
@@ -173,7 +186,7 @@ def draw_menu(screen, title_font, font, button_font,
 
     current_y = CONTENT_TOP_MARGIN
 
-    title_surf_main = title_font.render("8-Puzzle Solver", True, SECONDARY)
+    title_surf_main = render_text(title_font, "8-Puzzle Solver", True, SECONDARY)
     title_rect_menu = title_surf_main.get_rect(centerx=WIDTH // 2, top=current_y)
     screen.blit(title_surf_main, title_rect_menu)
     current_y += title_rect_menu.height + ELEMENT_SPACING * 2
@@ -184,7 +197,7 @@ def draw_menu(screen, title_font, font, button_font,
     instr_block_height = len(explanation) * instr_line_height + (len(explanation) - 1) * 5
     instr_y_start = current_y
     for i, text_content in enumerate(explanation):
-        line = font.render(text_content, True, LIGHT_GRAY)
+        line = render_text(font, text_content, True, LIGHT_GRAY)
         line_rect = line.get_rect(centerx=WIDTH // 2, top=instr_y_start + i * (instr_line_height + 5))
         screen.blit(line, line_rect)
     current_y += instr_block_height + ELEMENT_SPACING * 1.5
@@ -205,7 +218,7 @@ def draw_menu(screen, title_font, font, button_font,
     exit_btn.draw(screen, button_font)
     current_y = exit_btn.rect.bottom + ELEMENT_SPACING * 2
 
-    label = font.render("Trạng thái ban đầu hiện tại:", True, SECONDARY)
+    label = render_text(font, "Trạng thái ban đầu hiện tại:", True, SECONDARY)
     label_rect = label.get_rect(centerx=WIDTH // 2, top=current_y)
     screen.blit(label, label_rect)
     current_y += label_rect.height + ELEMENT_SPACING / 2
@@ -222,7 +235,7 @@ def draw_menu(screen, title_font, font, button_font,
         bg_color = TILE_BG if val != 9 else GRAY
         pygame.draw.rect(screen, bg_color, tile_rect, border_radius=5)
         if val != 9:
-            text_surf = button_font.render(str(val), True, SECONDARY)
+            text_surf = render_text(button_font, str(val), True, SECONDARY)
             text_rect = text_surf.get_rect(center=tile_rect.center); screen.blit(text_surf, text_rect)
 
     # --- Algorithm Dropdown Control (Positioned in top-right corner via algo_display_box_rect_param) ---
@@ -231,13 +244,13 @@ def draw_menu(screen, title_font, font, button_font,
     pygame.draw.rect(screen, GS_MEDIUM_DARK_GRAY, algo_display_box_rect_param, border_radius=5, width=1)
 
     selected_algo_name = ALGORITHM_LIST[selected_algorithm_index][0]
-    text_surf_selected = font.render(selected_algo_name, True, SECONDARY)
+    text_surf_selected = render_text(font, selected_algo_name, True, SECONDARY)
     available_text_width_display = algo_display_box_rect_param.width - 30 - 15 
     if text_surf_selected.get_width() > available_text_width_display:
         original_text_selected = selected_algo_name
         while text_surf_selected.get_width() > available_text_width_display and len(original_text_selected) > 3:
             original_text_selected = original_text_selected[:-1]
-            text_surf_selected = font.render(original_text_selected + "...", True, SECONDARY)
+            text_surf_selected = render_text(font, original_text_selected + "...", True, SECONDARY)
     text_rect_selected = text_surf_selected.get_rect(midleft=(algo_display_box_rect_param.x + 15, algo_display_box_rect_param.centery))
     screen.blit(text_surf_selected, text_rect_selected)
 
@@ -271,12 +284,12 @@ def draw_menu(screen, title_font, font, button_font,
                     if i != selected_algorithm_index: text_color = SECONDARY 
                 pygame.draw.rect(screen, bg_color, item_rect, border_radius=3)
                 
-                algo_name = ALGORITHM_LIST[i][0]; text_surf = font.render(algo_name, True, text_color)
+                algo_name = ALGORITHM_LIST[i][0]; text_surf = render_text(font, algo_name, True, text_color)
                 available_text_width_item = item_rect.width - 30
                 if text_surf.get_width() > available_text_width_item:
                     original_text_item = algo_name
                     while text_surf.get_width() > available_text_width_item and len(original_text_item) > 3:
-                        original_text_item = original_text_item[:-1]; text_surf = font.render(original_text_item + "...", True, text_color)
+                        original_text_item = original_text_item[:-1]; text_surf = render_text(font, original_text_item + "...", True, text_color)
                 text_draw_rect = text_surf.get_rect(midleft=(item_rect.x + 15, item_rect.centery)); screen.blit(text_surf, text_draw_rect)
 
 
@@ -320,15 +333,16 @@ def draw_info_box(screen, font, info_font, steps_found, path_length, current_ste
     
     info_box_rect = pygame.Rect(box_x, box_y, box_width, box_height)
     pygame.draw.rect(screen, GRAY, info_box_rect, border_radius=10); pygame.draw.rect(screen, DARK_BG, info_box_rect.inflate(-4, -4), border_radius=10)
-    title_surf_info = font.render("Thông tin giải", True, SECONDARY)
+    title_surf_info = render_text(font, "Thông tin giải", True, SECONDARY)
     screen.blit(title_surf_info, title_surf_info.get_rect(centerx=info_box_rect.centerx, y=info_box_rect.y + 20))
     info_lines_content = [f"Thuật toán: {algorithm_name}", f"Node đã duyệt: {steps_found if steps_found is not None else 'N/A'}",
                   f"Độ dài đường đi: {path_length if path_length is not None else 'N/A'}",
                   f"Bước hiện tại: {current_step}/{total_steps if total_steps is not None else 'N/A'}"]
     if elapsed_time is not None: info_lines_content.append(f"Thời gian tìm kiếm: {elapsed_time:.3f} s")
+    screen_tracker.mark("info_box", info_box_rect, tuple(info_lines_content))
     line_y_pos = info_box_rect.y + 60
     for text_content in info_lines_content:
-        line_surf = info_font.render(text_content, True, LIGHT_GRAY); screen.blit(line_surf, (info_box_rect.x + 20, line_y_pos)); line_y_pos += 30
+        line_surf = render_text(info_font, text_content, True, LIGHT_GRAY); screen.blit(line_surf, (info_box_rect.x + 20, line_y_pos)); line_y_pos += 30
     if total_steps is not None and total_steps > 0:
         progress_rect_bg = pygame.Rect(info_box_rect.x + 20, info_box_rect.bottom - 60, info_box_rect.width - 40, 20)
         pygame.draw.rect(screen, GRAY, progress_rect_bg, border_radius=10)
@@ -347,13 +361,13 @@ def init_editor_tiles(state, offset_x_param, offset_y_param, tile_size):
 
 def draw_editor(screen, editor_tiles, editor_state, selected_idx, title_font, font, info_font, puzzle_font, button_font):
     screen.fill(DARK_BG)
-    title_surf_editor = title_font.render("Chỉnh sửa trạng thái ban đầu", True, SECONDARY)
+    title_surf_editor = render_text(title_font, "Chỉnh sửa trạng thái ban đầu", True, SECONDARY)
     screen.blit(title_surf_editor, title_surf_editor.get_rect(centerx=WIDTH // 2, y=70))
     instructions = ["Click vào ô để chọn, nhập số (1-9) để thay đổi.", "Số nhập vào sẽ đổi chỗ với số hiện tại trong ô.",
                    "Phải chứa đủ 1-9 và có thể giải được.", "Nhấn ENTER để lưu, ESC để hủy."]
     line_y_pos = 120
     for text_content in instructions:
-        line = info_font.render(text_content, True, LIGHT_GRAY); screen.blit(line, line.get_rect(centerx=WIDTH // 2, y=line_y_pos)); line_y_pos += 30
+        line = render_text(info_font, text_content, True, LIGHT_GRAY); screen.blit(line, line.get_rect(centerx=WIDTH // 2, y=line_y_pos)); line_y_pos += 30
     if not editor_tiles: return None, None
     
     tile_size = editor_tiles[0].size; puzzle_width = tile_size * 3; puzzle_height = tile_size * 3
@@ -362,12 +376,9 @@ def draw_editor(screen, editor_tiles, editor_state, selected_idx, title_font, fo
     for i, tile_obj in enumerate(editor_tiles):
          row, col = divmod(i, 3); tile_obj.rect.topleft = (start_x + col * tile_size, start_y_pos + row * tile_size); tile_obj.inner_rect.center = tile_obj.rect.center
          if tile_obj.value != 9:
-              bg_color = TILE_BG
-              pygame.draw.rect(screen, bg_color, tile_obj.inner_rect, border_radius=10)
-              text_surf_tile = puzzle_font.render(str(tile_obj.value), True, SECONDARY)
-              text_rect = text_surf_tile.get_rect(center=tile_obj.inner_rect.center); screen.blit(text_surf_tile, text_rect)
+              screen.blit(render_tile(tile_obj.inner_rect.size, TILE_BG, str(tile_obj.value), puzzle_font, SECONDARY), tile_obj.inner_rect)
          else:
-              pygame.draw.rect(screen, GRAY, tile_obj.inner_rect, border_radius=10)
+              screen.blit(render_tile(tile_obj.inner_rect.size, GRAY), tile_obj.inner_rect)
          if i == selected_idx:
              highlight_rect = tile_obj.rect.inflate(6, 6)
              pygame.draw.rect(screen, PRIMARY, highlight_rect, border_radius=12, width=3)
@@ -377,7 +388,7 @@ def draw_editor(screen, editor_tiles, editor_state, selected_idx, title_font, fo
     status_text = "Trạng thái không hợp lệ (thiếu/trùng số 1-9)" if not is_valid else \
                   f"Trạng thái {'CÓ THỂ' if solvable else 'KHÔNG THỂ'} giải được"
     status_color = RED if not is_valid or not solvable else GS_BLACK
-    status_surf = font.render(status_text, True, status_color); status_rect = status_surf.get_rect(center=(WIDTH // 2, start_y_pos + puzzle_height + 40)); screen.blit(status_surf, status_rect)
+    status_surf = render_text(font, status_text, True, status_color); status_rect = status_surf.get_rect(center=(WIDTH // 2, start_y_pos + puzzle_height + 40)); screen.blit(status_surf, status_rect)
     
     button_width_val = 150; button_height_val = 40; button_y_pos_editor = status_rect.bottom + 30
     save_btn = Button(WIDTH // 2 - button_width_val - 10, button_y_pos_editor, button_width_val, button_height_val, "Lưu (Enter)")
@@ -391,32 +402,60 @@ def draw_single_puzzle(screen, state, x_pos, y_pos, tile_size, font_to_use):
     for i, val in enumerate(state):
         row, col = divmod(i, 3); tile_x = x_pos + col * tile_size + padding; tile_y = y_pos + row * tile_size + padding
         tile_rect = pygame.Rect(tile_x, tile_y, inner_tile_size, inner_tile_size)
-        bg_color = TILE_BG if val != 9 else GRAY; pygame.draw.rect(screen, bg_color, tile_rect, border_radius=5)
-        if val != 9:
-            text_surf = font_to_use.render(str(val), True, SECONDARY); text_rect = text_surf.get_rect(center=tile_rect.center); screen.blit(text_surf, text_rect)
+        if val != 9: screen.blit(render_tile(tile_rect.size, TILE_BG, str(val), font_to_use, SECONDARY, 5), tile_rect)
+        else: screen.blit(render_tile(tile_rect.size, GRAY, border_radius=5), tile_rect)
 
 def draw_blind_preview(screen, title_font, font, info_font, puzzle_font_to_use, button_font, state1, state2, start_btn, back_btn):
     screen.fill(DARK_BG);
-    title_surf_blind = title_font.render("Xem trước Tìm kiếm Mù", True, SECONDARY);
+    title_surf_blind = render_text(title_font, "Xem trước Tìm kiếm Mù", True, SECONDARY);
     screen.blit(title_surf_blind, title_surf_blind.get_rect(centerx=WIDTH // 2, y=50))
     explanation = ["Đây là 2 ví dụ về trạng thái ban đầu có thể được sử dụng.", "(Tìm kiếm thực tế sẽ tạo ngẫu nhiên 10 trạng thái tương tự).", "Nhấn 'Bắt đầu' để chạy tìm kiếm mù thực sự."]
     line_y_pos = 110
     for text_content in explanation:
-        line = info_font.render(text_content, True, LIGHT_GRAY); screen.blit(line, line.get_rect(centerx=WIDTH // 2, y=line_y_pos)); line_y_pos += 30
+        line = render_text(info_font, text_content, True, LIGHT_GRAY); screen.blit(line, line.get_rect(centerx=WIDTH // 2, y=line_y_pos)); line_y_pos += 30
     max_tile_size = 150; preview_tile_size = min(WIDTH * 0.15, HEIGHT * 0.20, max_tile_size); puzzle_size = preview_tile_size * 3
     total_width_needed = puzzle_size * 2 + 100; start_puzzles_x = (WIDTH - total_width_needed) // 2
     puzzle1_x = start_puzzles_x; puzzle2_x = start_puzzles_x + puzzle_size + 100; puzzles_y = line_y_pos + 40
     draw_single_puzzle(screen, state1, puzzle1_x, puzzles_y, preview_tile_size, puzzle_font_to_use)
     draw_single_puzzle(screen, state2, puzzle2_x, puzzles_y, preview_tile_size, puzzle_font_to_use)
-    label1_surf = font.render("Trạng thái ví dụ 1", True, SECONDARY); label2_surf = font.render("Trạng thái ví dụ 2", True, SECONDARY)
+    label1_surf = render_text(font, "Trạng thái ví dụ 1", True, SECONDARY); label2_surf = render_text(font, "Trạng thái ví dụ 2", True, SECONDARY)
     screen.blit(label1_surf, label1_surf.get_rect(centerx=puzzle1_x + puzzle_size // 2, bottom=puzzles_y - 10)); screen.blit(label2_surf, label2_surf.get_rect(centerx=puzzle2_x + puzzle_size // 2, bottom=puzzles_y - 10))
     button_y_pos = puzzles_y + puzzle_size + 50
     start_btn.rect.centerx = WIDTH // 2 - start_btn.rect.width // 2 - 10; start_btn.rect.y = button_y_pos
     back_btn.rect.centerx = WIDTH // 2 + back_btn.rect.width // 2 + 10; back_btn.rect.y = button_y_pos
     start_btn.check_hover(pygame.mouse.get_pos()); back_btn.check_hover(pygame.mouse.get_pos()); start_btn.draw(screen, button_font); back_btn.draw(screen, button_font)
 
+# --- Solver Thread ---
+# module.solve chạy trong luồng nền và đẩy từng trạng thái của đường đi vào
+# solve_channel; vòng lặp chính rút kênh mỗi khung hình (poll_solver) nên giao
+# diện không bị treo khi giải và hoạt ảnh bắt đầu ngay khi có bước đầu tiên.
+solve_channel = None
+solve_thread = None
+SOLVE_CHANNEL_SIZE = 4096
+
+def run_solver_thread(channel, module, start_state, goal_state):
+    start_time_solve = time.time(); solve_result = module.solve(start_state, goal_state); elapsed = time.time() - start_time_solve
+    result_path, steps = None, None
+    if isinstance(solve_result, tuple) and len(solve_result) > 0:
+        result_path = solve_result[0]; steps = solve_result[1] if len(solve_result) > 1 and isinstance(solve_result[1], int) else None
+    elif isinstance(solve_result, list): result_path = solve_result
+    if not (result_path and isinstance(result_path, list)): return False, None, elapsed
+    for state in result_path:
+        if not channel.put(state): break
+    return True, steps, elapsed
+
+def stop_solver():
+    # module.solve không kiểm tra điều kiện dừng: hủy kênh để bỏ kết quả, luồng nền
+    # (daemon) tự kết thúc ngay khi solve trả về vì put() không còn chặn. Trong lúc
+    # đó solve_thread vẫn sống và start_solving từ chối lần giải mới (xem bên dưới).
+    global solve_channel
+    if solve_channel is not None: solve_channel.cancel(); solve_channel = None
+
 def start_solving(selected_algorithm_index, start_state, goal_state, message_box):
-    global current_view, path, steps_found, elapsed_time, tiles, current_step, last_switch
+    global current_view, path, steps_found, elapsed_time, tiles, current_step, last_switch, solve_channel, solve_thread
+    if solve_thread is not None and solve_thread.is_alive():
+        # Lần giải trước đã bị hủy nhưng module.solve chưa trả về: không chồng thêm luồng.
+        message_box.title="Đang Bận"; message_box.message="Thuật toán trước vẫn đang chạy nền.\nVui lòng thử lại sau giây lát."; message_box.active=True; return False
     if not is_valid_puzzle_state(start_state):
         message_box.title="Lỗi Trạng Thái"; message_box.message=f"Trạng thái bắt đầu không hợp lệ:\n{start_state}"; message_box.active=True; return False
     if not is_solvable(start_state):
@@ -426,23 +465,34 @@ def start_solving(selected_algorithm_index, start_state, goal_state, message_box
     print(f"Attempting solve: {algorithm_name}, State: {start_state}")
     try:
         module = importlib.import_module(f"algorithms.{module_name}")
-        start_time_solve = time.time(); solve_result = module.solve(start_state, goal_state); elapsed_time = time.time() - start_time_solve
-        path, steps_found = None, None
-        if isinstance(solve_result, tuple) and len(solve_result) > 0:
-            path = solve_result[0]; steps_found = solve_result[1] if len(solve_result) > 1 and isinstance(solve_result[1], int) else None
-        elif isinstance(solve_result, list): path = solve_result
-        
-        if path and isinstance(path, list) and len(path) > 0:
-            path_length = len(path) - 1; print(f"Solution found: {path_length} steps. Search took {elapsed_time:.3f}s.")
-            if steps_found is None: steps_found = path_length
-            current_view = "solver"; tiles = init_tiles(start_state, 150)
-            current_step = 0; last_switch = pygame.time.get_ticks(); return True
-        else: 
-            print(f"No solution found by {algorithm_name}. Search took {elapsed_time:.3f}s.")
-            message_box.title="Không tìm thấy"; message_box.message=f"{algorithm_name} không tìm thấy đường đi."; message_box.active=True; return False
+        if not callable(getattr(module, "solve", None)): raise AttributeError("solve")
     except ImportError: print(f"Import Error: algorithms.{module_name}"); message_box.title="Lỗi Import"; message_box.message=f"Không thể tải thuật toán:\n'{module_name}'."; message_box.active=True; return False
     except AttributeError: print(f"Attribute Error: 'solve' not in algorithms.{module_name}"); message_box.title="Lỗi Thuật Toán"; message_box.message=f"Thuật toán '{module_name}' thiếu hàm 'solve'."; message_box.active=True; return False
-    except Exception as e: print(f"Error solving with {algorithm_name}: {e}"); traceback.print_exc(); message_box.title="Lỗi Thực Thi"; message_box.message=f"Lỗi khi chạy {algorithm_name}:\n{e}"; message_box.active=True; return False
+
+    stop_solver()
+    path = DeltaTrace(); steps_found = None; elapsed_time = None  # Chỉ lưu các ô thay đổi giữa hai bước + keyframe định kỳ
+    solve_channel = TraceChannel(SOLVE_CHANNEL_SIZE)
+    solve_thread = start_producer(solve_channel, run_solver_thread, module, start_state, goal_state)
+    current_view = "solver"; tiles = init_tiles(start_state, 150)
+    current_step = 0; last_switch = pygame.time.get_ticks(); return True
+
+def poll_solver(algorithm_name, message_box):
+    global current_view, path, steps_found, elapsed_time, tiles, solve_channel
+    if solve_channel is None: return
+    for state in solve_channel.drain(): path.append(state)
+    if not solve_channel.done: return
+    channel = solve_channel; solve_channel = None
+    if channel.error is not None:
+        e = channel.error; print(f"Error solving with {algorithm_name}: {e}"); traceback.print_exception(type(e), e, e.__traceback__)
+        message_box.title="Lỗi Thực Thi"; message_box.message=f"Lỗi khi chạy {algorithm_name}:\n{e}"; message_box.active=True
+        current_view = "menu"; path = None; tiles = None; return
+    found, steps, elapsed_time = channel.result
+    if not found or not path:
+        print(f"No solution found by {algorithm_name}. Search took {elapsed_time:.3f}s.")
+        message_box.title="Không tìm thấy"; message_box.message=f"{algorithm_name} không tìm thấy đường đi."; message_box.active=True
+        current_view = "menu"; path = None; tiles = None; return
+    path_length = len(path) - 1; print(f"Solution found: {path_length} steps. Search took {elapsed_time:.3f}s.")
+    steps_found = steps if steps is not None else path_length
 
 # --- Main Function ---
 def main():
@@ -508,12 +558,16 @@ def main():
     original_screen_size = (WIDTH, HEIGHT)
 
 
+    last_view_key = None
     while running:
         mouse_pos = pygame.mouse.get_pos(); mouse_click = False
         is_algo_display_hovered = False 
         if current_view == "menu": algo_dropdown_hover_index = -1 
 
+        had_events = False
         for event in pygame.event.get():
+            had_events = True
+            if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED, pygame.WINDOWRESTORED): screen_tracker.invalidate()
             if event.type == pygame.QUIT: running = False
             if message_box.active:
                 if message_box.handle_event(event): continue
@@ -558,7 +612,7 @@ def main():
             if event.type == pygame.KEYDOWN: 
                 if event.key == pygame.K_ESCAPE:
                     if current_view == "editor": current_view = "menu"
-                    elif current_view == "solver": current_view = "menu"; path = None; tiles = None
+                    elif current_view == "solver": stop_solver(); current_view = "menu"; path = None; tiles = None
                     elif current_view == "blind_preview": current_view = "menu"
                 elif current_view == "editor": 
                     if event.key == pygame.K_RETURN or event.key == pygame.K_KP_ENTER:
@@ -641,6 +695,7 @@ def main():
                              pygame.display.init() # Ensure display module is initialized
                              pygame.font.init()  # Re-init font module too, just in case
                              screen = pygame.display.set_mode(original_screen_size, pygame.FULLSCREEN if is_fullscreen else 0)
+                             get_render_cache().clear(); screen_tracker.invalidate()  # Surface cũ thuộc chế độ hiển thị trước
                              pygame.display.set_caption("8-Puzzle Solver")
 
                          except FileNotFoundError: message_box.title = "Lỗi"; message_box.message = "Không tìm thấy file 'fill.py'."; message_box.active = True
@@ -660,6 +715,7 @@ def main():
                          pygame.display.init() 
                          pygame.font.init()
                          screen = pygame.display.set_mode(original_screen_size, pygame.FULLSCREEN if is_fullscreen else 0)
+                         get_render_cache().clear(); screen_tracker.invalidate()  # Surface cũ thuộc chế độ hiển thị trước
                          print("Returned from Blind Search.")
                      except ImportError: message_box.title="Lỗi Import"; message_box.message="Không tìm thấy file 'blind.py'."; message_box.active=True
                      except Exception as e: print(f"Error running Blind Search: {e}"); traceback.print_exc(); message_box.title="Lỗi Tìm Kiếm Mù"; message_box.message=f"Lỗi xảy ra khi chạy tìm kiếm mù:\n{e}"; message_box.active=True
@@ -671,8 +727,32 @@ def main():
                      if not auto_mode and path and current_step < len(path) - 1: current_step += 1; update_tiles(tiles, path[current_step], GOAL_STATE, 150)
                  elif reset_btn.is_clicked(mouse_pos, True):
                      if path: current_step = 0; last_switch = pygame.time.get_ticks(); update_tiles(tiles, path[0], GOAL_STATE, 150)
-                 elif back_menu_btn.is_clicked(mouse_pos, True): current_view = "menu"; path = None; tiles = None
+                 elif back_menu_btn.is_clicked(mouse_pos, True): stop_solver(); current_view = "menu"; path = None; tiles = None
         
+        # --- Cập nhật trạng thái (tách khỏi phần vẽ để có thể bỏ qua khung rảnh) ---
+        animating = False; settled = True; streamed = False; pending = False
+        if current_view == "solver":
+            steps_before = len(path) if path else 0
+            poll_solver(ALGORITHM_LIST[selected_algorithm_index][0], message_box)
+            streamed = (len(path) if path else 0) != steps_before
+            if tiles:
+                 # Vẽ mọi khung mà ô đổi vị trí, kể cả khung cuối ô vừa khớp vào đích.
+                 for tile_obj in tiles:
+                     before = tile_obj.rect.topleft; tile_obj.update()
+                     if tile_obj.rect.topleft != before: animating = True
+                 settled = all(tile_obj.is_at_target() for tile_obj in tiles)
+            now_ticks = pygame.time.get_ticks()
+            if path and tiles:
+                 if auto_mode and current_step < len(path) - 1 and settled and now_ticks - last_switch >= switch_time:
+                     last_switch = now_ticks; current_step += 1; update_tiles(tiles, path[current_step], GOAL_STATE, 150); animating = True
+            pending = solve_channel is not None or not settled or bool(path and auto_mode and current_step < len(path) - 1)
+        view_key = (current_view, message_box.active)
+        if view_key != last_view_key: screen_tracker.invalidate(); last_view_key = view_key
+        if not (had_events or animating or streamed or screen_tracker.needs_full):
+            # Không có gì thay đổi trên màn hình: không vẽ; chỉ giữ nhịp 60 khung khi sắp
+            # có bước hoạt ảnh hoặc đang chờ bộ giải, còn lại ngủ ở IDLE_FPS.
+            clock.tick(ACTIVE_FPS if pending else IDLE_FPS); continue
+
         screen.fill(DARK_BG)
         if current_view == "editor":
             editor_save_btn, editor_cancel_btn = draw_editor(screen, editor_tiles, current_start_state_editor, editor_selected_idx, title_font, font, info_font, puzzle_font, button_font)
@@ -690,20 +770,17 @@ def main():
             draw_blind_preview(screen, title_font, font, info_font, puzzle_font, button_font,
                                BLIND_PREVIEW_STATE_1, BLIND_PREVIEW_STATE_2, start_blind_run_btn, back_menu_from_preview_btn)
         elif current_view == "solver":
+            if solve_channel is not None and not path:
+                 solving_surf = render_text(title_font, "Đang giải...", True, SECONDARY); solving_rect = solving_surf.get_rect(center=(WIDTH // 2, 80))
+                 screen.blit(solving_surf, solving_rect); screen_tracker.mark("solving_text", solving_rect)
             if tiles:
-                 for tile_obj in tiles: tile_obj.update()
                  for tile_obj in tiles: tile_obj.draw(screen, puzzle_font)
-            now_ticks = pygame.time.get_ticks()
-            if path and tiles:
-                 all_at_target = all(tile_obj.is_at_target() for tile_obj in tiles)
-                 if auto_mode and current_step < len(path) - 1 and all_at_target and now_ticks - last_switch >= switch_time:
-                     last_switch = now_ticks; current_step += 1; update_tiles(tiles, path[current_step], GOAL_STATE, 150)
             for btn in [auto_btn, next_btn, reset_btn, back_menu_btn]: btn.check_hover(mouse_pos); btn.draw(screen, button_font)
             if path: path_length = len(path) - 1; draw_info_box(screen, font, info_font, steps_found, path_length, current_step, path_length, ALGORITHM_LIST[selected_algorithm_index][0], elapsed_time)
 
         if message_box.active: message_box.draw(screen, title_font, font, button_font); message_box.check_hover(mouse_pos)
-        pygame.display.flip(); clock.tick(60)
-    pygame.quit(); sys.exit()
+        screen_tracker.present(full=current_view != "solver" or message_box.active); clock.tick(ACTIVE_FPS)
+    stop_solver(); pygame.quit(); sys.exit()
 
 if __name__ == "__main__":
     pygame.init(); pygame.font.init()
@@ -0,0 +1,120 @@
+# render_cache.py
+import pygame
+from collections import OrderedDict
+
+_COLORKEY = (255, 0, 255)  # Màu trong suốt cho góc ô; không trùng màu nào của giao diện
+
+
+class LRUCache:
+    """Từ điển có giới hạn kích thước, bỏ phần tử ít dùng gần đây nhất khi đầy."""
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_create(self, key, create):
+        item = self._items.get(key)
+        if item is not None:
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item
+        self.misses += 1
+        item = create()
+        self._items[key] = item
+        if len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+        return item
+
+    def clear(self):
+        self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+
+class RenderCache:
+    """
+    Bộ đệm surface dùng chung cho main.py, fill.py và blind.py:
+    - text(font, text, antialias, color): thay cho font.render(...) mỗi khung hình.
+    - font(name, size, bold): SysFont theo cỡ (tạo SysFont rất chậm).
+    - tile(size, bg_color, label, font, text_color, ...): ô vuông bo góc đã vẽ
+      sẵn nền, viền và số, chỉ cần một lần blit.
+    Mỗi loại có LRU riêng; khóa gồm mọi tham số ảnh hưởng tới hình vẽ.
+    """
+    def __init__(self, max_text=512, max_fonts=64, max_tiles=512):
+        self.texts = LRUCache(max_text)
+        self.fonts = LRUCache(max_fonts)
+        self.tiles = LRUCache(max_tiles)
+
+    def text(self, font, text, antialias, color, background=None):
+        key = (font, text, antialias, tuple(color), None if background is None else tuple(background))
+        if background is None:
+            return self.texts.get_or_create(key, lambda: font.render(text, antialias, color))
+        return self.texts.get_or_create(key, lambda: font.render(text, antialias, color, background))
+
+    def font(self, name, size, bold=False):
+        def create():
+            try:
+                return pygame.font.SysFont(name, size, bold=bold)
+            except Exception:
+                return pygame.font.Font(None, size)
+        return self.fonts.get_or_create((name, size, bold), create)
+
+    def scaled_font(self, font, size, bold=True):
+        """Font cùng họ với `font` ở cỡ `size` (dùng cho hiệu ứng phóng to chữ)."""
+        def create():
+            try:
+                return pygame.font.SysFont(font.get_name(), size, bold=bold)
+            except Exception:
+                return pygame.font.Font(None, size)
+        return self.fonts.get_or_create((font, size, bold), create)
+
+    def tile(self, size, bg_color, label=None, font=None, text_color=None, border_radius=10,
+             border_color=None, border_width=0):
+        width, height = (size, size) if isinstance(size, int) else (int(size[0]), int(size[1]))
+        key = (width, height, tuple(bg_color), label, font, None if text_color is None else tuple(text_color),
+               border_radius, None if border_color is None else tuple(border_color), border_width)
+
+        def create():
+            # Surface thường + colorkey cho bốn góc bo tròn: blit nhanh hơn nhiều so với
+            # alpha từng điểm ảnh (chữ khử răng cưa đã được hòa sẵn vào màu nền).
+            surface = pygame.Surface((width, height))
+            surface.fill(_COLORKEY)
+            rect = surface.get_rect()
+            pygame.draw.rect(surface, bg_color, rect, border_radius=border_radius)
+            if label is not None and font is not None:
+                text = font.render(label, True, text_color)
+                surface.blit(text, text.get_rect(center=rect.center))
+            if border_color is not None and border_width > 0:
+                pygame.draw.rect(surface, border_color, rect, border_radius=border_radius, width=border_width)
+            surface.set_colorkey(_COLORKEY, pygame.RLEACCEL)
+            if pygame.display.get_init() and pygame.display.get_surface() is not None:
+                surface = surface.convert()
+            return surface
+        return self.tiles.get_or_create(key, create)
+
+    def clear(self):
+        """Xóa toàn bộ (gọi khi đổi chế độ màn hình hoặc khởi tạo lại pygame)."""
+        self.texts.clear(); self.fonts.clear(); self.tiles.clear()
+
+    def stats(self):
+        return {name: {"size": len(cache), "hits": cache.hits, "misses": cache.misses}
+                for name, cache in (("text", self.texts), ("font", self.fonts), ("tile", self.tiles))}
+
+
+_render_cache = None
+
+def get_render_cache():
+    global _render_cache
+    if _render_cache is None:
+        _render_cache = RenderCache()
+    return _render_cache
+
+def render_text(font, text, antialias, color, background=None):
+    """Như font.render(text, antialias, color), nhưng dùng lại surface đã vẽ."""
+    return get_render_cache().text(font, text, antialias, color, background)
+
+def render_tile(size, bg_color, label=None, font=None, text_color=None, border_radius=10,
+                border_color=None, border_width=0):
+    return get_render_cache().tile(size, bg_color, label, font, text_color, border_radius, border_color, border_width)